@@ -0,0 +1,168 @@
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional, Tuple, TypeVar
+import numpy as np
+import librosa
+import soxr
+from cache_utils import cache_key, evict_lru, touch
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+def with_last_flag(items: Iterable[T]) -> Iterator[Tuple[T, bool]]:
+    """Yields (item, is_last) pairs, looking one item ahead."""
+    iterator = iter(items)
+    try:
+        previous = next(iterator)
+    except StopIteration:
+        return
+    for item in iterator:
+        yield previous, False
+        previous = item
+    yield previous, True
+
+def iter_audio_blocks(audio_path: str, sr: int, block_seconds: float) -> Iterator[np.ndarray]:
+    """Decodes an audio file block by block, resampled to `sr` mono float32."""
+    native_sr = librosa.get_samplerate(audio_path)
+    frame_length = max(native_sr // 10, 1)
+    stream = librosa.stream(audio_path, block_length=max(int(block_seconds * 10), 1),
+                            frame_length=frame_length, hop_length=frame_length, mono=True)
+    if native_sr == sr:
+        for block in stream:
+            yield block.astype(np.float32, copy=False)
+        return
+    resampler = soxr.ResampleStream(native_sr, sr, 1, dtype='float32')
+    for block, is_last in with_last_flag(stream):
+        yield resampler.resample_chunk(block.astype(np.float32, copy=False), last=is_last)
+
+class AudioBufferService:
+    """Decodes each audio file once into a raw float32 PCM file and serves memory-mapped views of it.
+
+    Every `load` or `slice` counts as a user of the track's map until a matching
+    `release`; `open` does both around a block. A file with users is never evicted
+    or replaced, and its map is dropped once the last user releases it.
+    """
+    SUFFIX = '.f32.pcm'
+
+    def __init__(self, cache_dir: str, sr: int = 16000, max_bytes: int = 8 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.sr = sr
+        self.max_bytes = max_bytes
+        self._buffers: Dict[str, np.ndarray] = {}
+        self._users: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        logger.info(f"Audio buffer cache at {cache_dir} ({sr} Hz)")
+
+    def _pcm_path(self, audio_path: str) -> str:
+        stat = os.stat(audio_path)
+        key = cache_key(path=os.path.abspath(audio_path), size=stat.st_size, mtime=stat.st_mtime_ns, sr=self.sr)
+        return os.path.join(self.cache_dir, key + self.SUFFIX)
+
+    def _acquire(self, pcm_path: str) -> np.ndarray:
+        """The file's map, counting one more user of it."""
+        with self._lock:
+            if pcm_path not in self._buffers:
+                if os.path.getsize(pcm_path) == 0:
+                    self._buffers[pcm_path] = np.zeros(0, dtype=np.float32)
+                else:
+                    # Copy-on-write: callers get writable zero-copy views that never modify the cache file.
+                    self._buffers[pcm_path] = np.memmap(pcm_path, dtype=np.float32, mode='c')
+                touch(pcm_path)
+            self._users[pcm_path] = self._users.get(pcm_path, 0) + 1
+            return self._buffers[pcm_path]
+
+    def _release(self, pcm_path: str) -> None:
+        """Counts one user less; the last one drops the map, so the file can be unmapped."""
+        with self._lock:
+            users = self._users.get(pcm_path, 0) - 1
+            if users > 0:
+                self._users[pcm_path] = users
+            elif pcm_path in self._users:
+                del self._users[pcm_path]
+                del self._buffers[pcm_path]
+
+    def _evict(self, decoded: str) -> None:
+        """LRU eviction that never deletes a file that is still mapped (which fails on Windows),
+        nor the one just `decoded`, which its caller is about to map."""
+        with self._lock:
+            keep = list(self._buffers) + [decoded]
+        evict_lru(self.cache_dir, self.max_bytes, self.SUFFIX, keep=keep)
+
+    def _decoded_path(self, audio_path: str) -> str:
+        pcm_path = self._pcm_path(audio_path)
+        if not os.path.exists(pcm_path):
+            for _ in self.iter_blocks(audio_path):
+                pass
+        return pcm_path
+
+    def load(self, audio_path: str) -> np.ndarray:
+        """Returns the whole track at `sr`, decoding it on first request; call `release` when done with it."""
+        return self._acquire(self._decoded_path(audio_path))
+
+    def release(self, audio_path: str) -> None:
+        """Ends one `load` or `slice` of the track."""
+        self._release(self._pcm_path(audio_path))
+
+    @contextmanager
+    def open(self, audio_path: str) -> Iterator[np.ndarray]:
+        """The whole track for the duration of a with-block, released at its end."""
+        pcm_path = self._decoded_path(audio_path)
+        audio = self._acquire(pcm_path)
+        try:
+            yield audio
+        finally:
+            self._release(pcm_path)
+
+    def slice(self, audio_path: str, start_time: float = 0.0, end_time: Optional[float] = None) -> np.ndarray:
+        """Returns a zero-copy view of the samples between `start_time` and `end_time` seconds; see `load`."""
+        audio = self.load(audio_path)
+        start = int(start_time * self.sr)
+        end = int(end_time * self.sr) if end_time is not None else None
+        return audio[start:end]
+
+    def iter_blocks(self, audio_path: str, block_seconds: float = 30.0) -> Iterator[np.ndarray]:
+        """Yields the track in blocks, decoding and filling the cache on the fly if needed."""
+        pcm_path = self._pcm_path(audio_path)
+        if os.path.exists(pcm_path):
+            audio = self._acquire(pcm_path)
+            try:
+                step = max(int(block_seconds * self.sr), 1)
+                for start in range(0, len(audio), step):
+                    yield audio[start:start + step]
+            finally:
+                self._release(pcm_path)
+            return
+
+        logger.info(f"Decoding {audio_path} to {self.sr} Hz PCM")
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        complete = False
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for block in iter_audio_blocks(audio_path, self.sr, block_seconds):
+                    f.write(block.tobytes())
+                    yield block
+            with self._lock:
+                mapped = pcm_path in self._buffers
+            # A concurrent decode already produced this file and it is mapped; never overwrite it.
+            if not mapped:
+                os.replace(tmp_path, pcm_path)
+                complete = True
+        finally:
+            if not complete and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._evict(pcm_path)
+
+_service: Optional[AudioBufferService] = None
+
+def get_audio_buffer(cache_dir: Optional[str] = None, max_bytes: int = 8 * 1024 ** 3) -> AudioBufferService:
+    """Returns the process-wide buffer service, creating it in `cache_dir` on first call."""
+    global _service
+    if _service is None:
+        _service = AudioBufferService(cache_dir or os.path.join(tempfile.gettempdir(), 'meeting_audio_buffer'),
+                                      max_bytes=max_bytes)
+    return _service
@@ -1,59 +1,281 @@
-import numpy as np
-import librosa
-import whisper
-from typing import List, Dict
-import logging
-import torch
-
-logger = logging.getLogger(__name__)
-
-class AudioProcessor:
-    def __init__(self, whisper_model: str = 'large'):
-        logger.info(f"Initializing AudioProcessor with Whisper model: {whisper_model}")
-        self.whisper_model = whisper.load_model(whisper_model)
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        logger.info(f"Using device: {self.device}")
-        self.whisper_model.to(self.device)
-
-    async def process_audio(self, audio_path: str, speaker_name: str) -> List[Dict]:
-        logger.info(f"Processing audio for {speaker_name}: {audio_path}")
-        try:
-            audio, sr = librosa.load(audio_path, sr=16000)
-            logger.info(f"Audio loaded, duration: {len(audio)/sr:.2f} seconds")
-            
-            audio_tensor = torch.from_numpy(audio).float().to(self.device)
-            logger.info("Extracting MFCC features")
-            mfcc = self.extract_mfcc(audio_tensor, sr)
-            
-            logger.info("Transcribing audio")
-            transcription = self.transcribe_audio(audio_tensor)
-            
-            logger.info("Extracting segments")
-            segments = self.extract_segments(transcription, speaker_name, mfcc)
-            
-            logger.info(f'Processed audio for {speaker_name}: {len(segments)} segments')
-            return segments
-        except Exception as e:
-            logger.error(f'Error processing audio: {e}')
-            return []
-
-    def extract_mfcc(self, audio: torch.Tensor, sr: int) -> np.ndarray:
-        mfcc = librosa.feature.mfcc(y=audio.cpu().numpy(), sr=sr, n_mfcc=13)
-        return np.array(mfcc)
-
-    def transcribe_audio(self, audio: torch.Tensor) -> Dict:
-        return self.whisper_model.transcribe(audio.cpu().numpy())
-
-    def extract_segments(self, transcription: Dict, speaker_name: str, mfcc: np.ndarray) -> List[Dict]:
-        segments = []
-        for segment in transcription['segments']:
-            start_frame = int(segment['start'] * 100)
-            end_frame = int(segment['end'] * 100)
-            segments.append({
-                'start': segment['start'],
-                'end': segment['end'],
-                'speaker': speaker_name,
-                'text': segment['text'],
-                'mfcc': mfcc[:, start_frame:end_frame].tolist()
-            })
-        return segments
\ No newline at end of file
+import numpy as np
+import librosa
+import asyncio
+from dataclasses import dataclass
+from typing import List, Dict, AsyncIterator, Optional, Tuple
+import logging
+import torch
+from transcription_cache import CachedTranscription, TranscriptionCache
+from model_registry import get_registry
+from audio_buffer import get_audio_buffer, with_last_flag
+from feature_engine import get_feature_engine
+
+logger = logging.getLogger(__name__)
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns start (inclusive) and end (exclusive) indices of the True runs in a boolean mask."""
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+@dataclass(frozen=True)
+class SpeechRegions:
+    spans: np.ndarray
+    sr: int
+    gap_seconds: float = 0.5
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    @property
+    def speech_seconds(self) -> float:
+        return float(np.sum(self.spans[:, 1] - self.spans[:, 0])) / self.sr
+
+    def compact(self, audio: np.ndarray) -> np.ndarray:
+        """Concatenates the speech spans, separated by short silent gaps."""
+        gap = np.zeros(int(self.gap_seconds * self.sr), dtype=audio.dtype)
+        pieces = []
+        for start, end in self.spans:
+            pieces.extend([audio[start:end], gap])
+        return np.concatenate(pieces[:-1]) if pieces else audio[:0]
+
+    def to_original(self, times: np.ndarray) -> np.ndarray:
+        """Maps times on the compacted timeline back to the original timeline."""
+        lengths = (self.spans[:, 1] - self.spans[:, 0]) / self.sr
+        compact_starts = np.concatenate([[0.0], np.cumsum(lengths + self.gap_seconds)[:-1]])
+        times = np.asarray(times, dtype=np.float64)
+        index = np.clip(np.searchsorted(compact_starts, times, side='right') - 1, 0, len(self.spans) - 1)
+        offset = np.clip(times - compact_starts[index], 0.0, lengths[index])
+        return self.spans[index, 0] / self.sr + offset
+
+    def remap_segments(self, segments: List[Dict]) -> List[Dict]:
+        if not segments:
+            return segments
+        starts = self.to_original([segment['start'] for segment in segments])
+        ends = self.to_original([segment['end'] for segment in segments])
+        for segment, start, end in zip(segments, starts, ends):
+            segment['start'] = float(start)
+            segment['end'] = float(end)
+        return segments
+
+class VoiceActivityDetector:
+    def __init__(self, frame_seconds: float = 0.025, hop_seconds: float = 0.01, energy_margin_db: float = 10.0,
+                 flux_ratio: float = 1.5, min_energy_db: float = -60.0, min_speech_seconds: float = 0.25,
+                 min_silence_seconds: float = 0.3, padding_seconds: float = 0.2, batch_frames: int = 8192):
+        self.frame_seconds = frame_seconds
+        self.hop_seconds = hop_seconds
+        self.energy_margin_db = energy_margin_db
+        self.flux_ratio = flux_ratio
+        self.min_energy_db = min_energy_db
+        self.min_speech_seconds = min_speech_seconds
+        self.min_silence_seconds = min_silence_seconds
+        self.padding_seconds = padding_seconds
+        self.batch_frames = batch_frames
+
+    def frame_features(self, audio: np.ndarray, sr: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-frame energy (dB) and normalized spectral flux, computed in batches of frames."""
+        frame_length = int(self.frame_seconds * sr)
+        hop_length = int(self.hop_seconds * sr)
+        if len(audio) < frame_length:
+            audio = np.pad(audio, (0, frame_length - len(audio)))
+        frames = librosa.util.frame(audio, frame_length=frame_length, hop_length=hop_length)
+        window = np.hanning(frame_length).astype(np.float32)[:, None]
+        n_frames = frames.shape[1]
+        energy_db = np.empty(n_frames, dtype=np.float32)
+        flux = np.zeros(n_frames, dtype=np.float32)
+        previous = None
+        for start in range(0, n_frames, self.batch_frames):
+            batch = frames[:, start:start + self.batch_frames]
+            energy_db[start:start + batch.shape[1]] = 10 * np.log10(np.mean(batch ** 2, axis=0) + 1e-10)
+            magnitude = np.abs(np.fft.rfft(batch * window, axis=0))
+            if previous is not None:
+                magnitude = np.concatenate([previous, magnitude], axis=1)
+            rise = np.maximum(np.diff(magnitude, axis=1), 0).sum(axis=0) / (magnitude[:, 1:].sum(axis=0) + 1e-10)
+            flux[start + (previous is None):start + batch.shape[1]] = rise
+            previous = magnitude[:, -1:]
+        return energy_db, flux
+
+    def detect(self, audio: np.ndarray, sr: int) -> SpeechRegions:
+        energy_db, flux = self.frame_features(audio, sr)
+        noise_floor = np.percentile(energy_db, 10)
+        loud = (energy_db > noise_floor + self.energy_margin_db) & (energy_db > self.min_energy_db)
+        very_loud = energy_db > max(noise_floor + 2 * self.energy_margin_db, self.min_energy_db)
+        active = flux > self.flux_ratio * np.median(flux)
+        speech = (loud & active) | very_loud
+
+        hop_length = int(self.hop_seconds * sr)
+        frame_length = int(self.frame_seconds * sr)
+        starts, ends = _runs(speech)
+        if len(starts):
+            keep = (starts[1:] - ends[:-1]) * self.hop_seconds >= self.min_silence_seconds
+            starts = starts[np.concatenate([[True], keep])]
+            ends = ends[np.concatenate([keep, [True]])]
+            long_enough = (ends - starts) * self.hop_seconds >= self.min_speech_seconds
+            starts, ends = starts[long_enough], ends[long_enough]
+
+        padding = int(self.padding_seconds * sr)
+        sample_starts = np.maximum(starts * hop_length - padding, 0)
+        sample_ends = np.minimum((ends - 1) * hop_length + frame_length + padding, len(audio))
+        if len(sample_starts) > 1:
+            # Padding can make neighbouring spans overlap; merge them.
+            separate = sample_starts[1:] > sample_ends[:-1]
+            sample_starts = sample_starts[np.concatenate([[True], separate])]
+            sample_ends = sample_ends[np.concatenate([separate, [True]])]
+        spans = np.stack([sample_starts, sample_ends], axis=1).astype(np.int64)
+        return SpeechRegions(spans=spans.reshape(-1, 2), sr=sr)
+
+class AudioProcessor:
+    def __init__(self, whisper_model: str = 'large', vad: Optional[VoiceActivityDetector] = None,
+                 cache: Optional[TranscriptionCache] = None, quantize: bool = False):
+        logger.info(f"Initializing AudioProcessor with Whisper model: {whisper_model}" + (" (int8)" if quantize else ""))
+        self.model_name = whisper_model
+        self.quantize = quantize
+        self.vad = vad
+        self.cache = cache
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        logger.info(f"Using device: {self.device}")
+
+    @property
+    def whisper_model(self):
+        # Resolved on first use so that fully cached runs never load the model.
+        return get_registry().whisper(self.model_name, self.device, self.quantize)
+
+    async def process_audio(self, audio_path: str, speaker_name: str, transcription: Optional[Dict] = None) -> List[Dict]:
+        return await asyncio.to_thread(self.analyze_track, audio_path, speaker_name, transcription)
+
+    def analyze_track(self, audio_path: str, speaker_name: str, transcription: Optional[Dict] = None) -> List[Dict]:
+        """Transcribes and featurizes a track; a precomputed `transcription` (e.g. from batched decoding) skips Whisper."""
+        logger.info(f"Processing audio for {speaker_name}: {audio_path}")
+        try:
+            cache_key = self.cache.key(audio_path, self.model_name, self.cache_options()) if self.cache and transcription is None else None
+            cached = self.cache.get(cache_key) if cache_key else None
+            if transcription is not None:
+                regions = None
+                mfcc = get_feature_engine().mfcc(audio_path, 13)
+            elif cached is not None:
+                regions = SpeechRegions(cached.speech_spans, get_audio_buffer().sr) if cached.speech_spans is not None else None
+                transcription, mfcc = cached.transcription, cached.mfcc
+            else:
+                audio_buffer = get_audio_buffer()
+                with audio_buffer.open(audio_path) as audio:
+                    sr = audio_buffer.sr
+                    logger.info(f"Audio loaded, duration: {len(audio)/sr:.2f} seconds")
+                    logger.info("Extracting MFCC features")
+                    mfcc = get_feature_engine().mfcc(audio_path, 13)
+                    transcription, regions = self.run_models(audio, sr)
+                if cache_key:
+                    spans = regions.spans if regions is not None else None
+                    self.cache.put(cache_key, CachedTranscription(transcription, mfcc, spans))
+            
+            segments = self.build_segments(transcription, speaker_name, mfcc, regions)
+            
+            logger.info(f'Processed audio for {speaker_name}: {len(segments)} segments')
+            return segments
+        except Exception as e:
+            logger.error(f'Error processing audio: {e}')
+            return []
+
+    async def stream_audio(self, audio_path: str, speaker_name: str, window_seconds: float = 30.0,
+                           overlap_seconds: float = 5.0) -> AsyncIterator[Dict]:
+        """Transcribes audio in overlapping windows, yielding segments as each window completes."""
+        logger.info(f"Streaming audio for {speaker_name}: {audio_path} "
+                    f"(window: {window_seconds}s, overlap: {overlap_seconds}s)")
+        if not 0 <= overlap_seconds < window_seconds:
+            raise ValueError(f"Overlap must be in [0, {window_seconds}), got {overlap_seconds}")
+        sr = get_audio_buffer().sr
+        overlap_samples = int(overlap_seconds * sr)
+        carry = np.zeros(0, dtype=np.float32)
+        consumed_samples = 0
+        emitted_until = 0.0
+        prompt = ""
+        segment_count = 0
+        try:
+            blocks = get_audio_buffer().iter_blocks(audio_path, window_seconds - overlap_seconds)
+            for block, is_last in with_last_flag(blocks):
+                window = np.concatenate([carry, block])
+                window_start = (consumed_samples - len(carry)) / sr
+                window_end = window_start + len(window) / sr
+                consumed_samples += len(block)
+
+                window_segments = await asyncio.to_thread(self.analyze_speech, window, sr, speaker_name,
+                                                          initial_prompt=prompt or None)
+
+                # Segments starting in the first half of the overlap belong to this window;
+                # the next window skips anything ending before the last emitted segment.
+                cutoff = float('inf') if is_last else window_end - overlap_seconds / 2
+                for segment in window_segments:
+                    segment['start'] += window_start
+                    segment['end'] += window_start
+                    if segment['start'] >= cutoff:
+                        break
+                    if segment['end'] <= emitted_until:
+                        continue
+                    emitted_until = segment['end']
+                    prompt = segment['text']
+                    segment_count += 1
+                    yield segment
+
+                carry = window[-overlap_samples:] if overlap_samples else window[:0]
+                logger.info(f"Streamed window {window_start:.1f}-{window_end:.1f}s for {speaker_name}")
+            logger.info(f'Streamed audio for {speaker_name}: {segment_count} segments')
+        except Exception as e:
+            logger.error(f'Error streaming audio: {e}')
+
+    def cache_options(self) -> Dict:
+        """Settings that change the transcription or features, used in cache keys."""
+        return {'vad': vars(self.vad) if self.vad is not None else None, 'n_mfcc': 13, 'quantize': self.quantize,
+                'features': get_feature_engine().settings()}
+
+    def run_models(self, audio: np.ndarray, sr: int, **decode_options) -> Tuple[Dict, Optional[SpeechRegions]]:
+        """Transcribes audio, restricted to detected speech when a VAD is configured."""
+        regions = None
+        if self.vad is not None:
+            logger.info("Detecting speech regions")
+            regions = self.vad.detect(audio, sr)
+            logger.info(f"Speech: {regions.speech_seconds:.2f}s of {len(audio)/sr:.2f}s in {len(regions)} regions")
+            if not len(regions):
+                return {'text': '', 'segments': []}, regions
+            audio = regions.compact(audio)
+
+        audio_tensor = torch.from_numpy(audio).float().to(self.device)
+        logger.info("Transcribing audio")
+        transcription = self.transcribe_audio(audio_tensor, **decode_options)
+        return transcription, regions
+
+    def build_segments(self, transcription: Dict, speaker_name: str, mfcc: np.ndarray,
+                       regions: Optional[SpeechRegions] = None) -> List[Dict]:
+        """Builds output segments; `mfcc` covers the original timeline, so VAD times are remapped first."""
+        if regions is not None:
+            remapped = regions.remap_segments([dict(segment) for segment in transcription['segments']])
+            transcription = dict(transcription, segments=remapped)
+        logger.info("Extracting segments")
+        return self.extract_segments(transcription, speaker_name, mfcc)
+
+    def analyze_speech(self, audio: np.ndarray, sr: int, speaker_name: str, **decode_options) -> List[Dict]:
+        logger.info("Extracting MFCC features")
+        mfcc = self.extract_mfcc(torch.from_numpy(audio), sr)
+        transcription, regions = self.run_models(audio, sr, **decode_options)
+        return self.build_segments(transcription, speaker_name, mfcc, regions)
+
+    def extract_mfcc(self, audio: torch.Tensor, sr: int) -> np.ndarray:
+        engine = get_feature_engine()
+        if sr != engine.sr:
+            raise ValueError(f"Expected {engine.sr} Hz audio, got {sr} Hz")
+        return engine.mfcc_from_audio(audio.cpu().numpy(), n_mfcc=13)
+
+    def transcribe_audio(self, audio: torch.Tensor, **decode_options) -> Dict:
+        return self.whisper_model.transcribe(audio.cpu().numpy(), **decode_options)
+
+    def extract_segments(self, transcription: Dict, speaker_name: str, mfcc: np.ndarray) -> List[Dict]:
+        engine = get_feature_engine()
+        segments = []
+        for segment in transcription['segments']:
+            start_frame = engine.time_to_frame(segment['start'])
+            end_frame = engine.time_to_frame(segment['end'])
+            segments.append({
+                'start': segment['start'],
+                'end': segment['end'],
+                'speaker': speaker_name,
+                'text': segment['text'],
+                'mfcc': mfcc[:, start_frame:end_frame]
+            })
+        return segments
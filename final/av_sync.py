@@ -0,0 +1,149 @@
+import logging
+from typing import Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def audio_envelope(audio: np.ndarray, sr: int, fps: float, n_frames: Optional[int] = None) -> np.ndarray:
+    """RMS energy of the audio in one window per video frame, so it lines up with lip movement."""
+    hop = sr / fps
+    if n_frames is None:
+        n_frames = int(len(audio) * fps // sr)
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    # Frame boundaries in samples; cumulative energy makes every window an O(1) difference.
+    bounds = np.minimum(np.round(np.arange(n_frames + 1) * hop).astype(np.int64), len(audio))
+    energy = np.concatenate(([0.0], np.cumsum(np.square(audio, dtype=np.float64))))
+    lengths = np.maximum(np.diff(bounds), 1)
+    return np.sqrt((energy[bounds[1:]] - energy[bounds[:-1]]) / lengths).astype(np.float32)
+
+def fill_gaps(signal: np.ndarray) -> np.ndarray:
+    """Linearly interpolates NaN samples, such as frames where no lips were found."""
+    signal = np.asarray(signal, dtype=np.float64)
+    missing = np.isnan(signal)
+    if missing.all():
+        return np.zeros_like(signal)
+    if missing.any():
+        index = np.arange(len(signal))
+        signal = signal.copy()
+        signal[missing] = np.interp(index[missing], index[~missing], signal[~missing])
+    return signal
+
+def cross_correlation_offset(lip: np.ndarray, envelope: np.ndarray, max_lag: Optional[int] = None) -> Tuple[int, float]:
+    """Lag (in frames) maximizing the normalized cross-correlation, and the peak correlation.
+
+    Computed for every lag at once with an FFT in O(n log n). A positive lag means the
+    audio trails the lip movement. Each lag's sum is divided by its overlap length,
+    so the peak is comparable to a Pearson correlation.
+    """
+    n = min(len(lip), len(envelope))
+    if n < 2:
+        return 0, 0.0
+    a = np.asarray(lip[:n], dtype=np.float64)
+    b = np.asarray(envelope[:n], dtype=np.float64)
+    a = (a - a.mean()) / (a.std() or 1.0)
+    b = (b - b.mean()) / (b.std() or 1.0)
+    size = 1 << (2 * n - 1).bit_length()
+    spectrum = np.conj(np.fft.rfft(a, size)) * np.fft.rfft(b, size)
+    full = np.fft.irfft(spectrum, size)
+    # Circular layout: lags 0..n-1 at the start, lags -(n-1)..-1 at the end.
+    lags = np.concatenate((np.arange(-(n - 1), 0), np.arange(n)))
+    correlation = np.concatenate((full[size - (n - 1):], full[:n])) / (n - np.abs(lags))
+    if max_lag is not None:
+        keep = np.abs(lags) <= max_lag
+        lags, correlation = lags[keep], correlation[keep]
+    best = int(np.argmax(correlation))
+    return int(lags[best]), float(np.clip(correlation[best], -1.0, 1.0))
+
+class SyncWindows:
+    """Lip/audio correlation of any frame range in O(1) from prefix sums.
+
+    Built once per clip in linear time. Frames without lips are left out of every
+    window, and `lag` (frames the audio trails the lips) is applied up front, so each
+    window correlates lip frame i with envelope frame i + lag.
+    """
+
+    def __init__(self, lip: np.ndarray, envelope: np.ndarray, fps: float, start_time: float = 0.0, lag: int = 0):
+        self.fps = fps
+        self.start_time = start_time
+        self.lag = lag
+        lip = np.asarray(lip, dtype=np.float64)
+        envelope = np.asarray(envelope, dtype=np.float64)
+        n = len(lip)
+        aligned = np.full(n, np.nan)
+        index = np.arange(n) + lag
+        inside = (index >= 0) & (index < len(envelope))
+        aligned[inside] = envelope[index[inside]]
+        valid = ~np.isnan(lip) & ~np.isnan(aligned)
+        x = np.where(valid, lip, 0.0)
+        y = np.where(valid, aligned, 0.0)
+        if valid.any():
+            # Standardizing first keeps the prefix-sum differences well conditioned on long clips.
+            x = np.where(valid, (x - x[valid].mean()) / (x[valid].std() or 1.0), 0.0)
+            y = np.where(valid, (y - y[valid].mean()) / (y[valid].std() or 1.0), 0.0)
+        self._sums = {name: np.concatenate(([0.0], np.cumsum(values))) for name, values in
+                      (('n', valid.astype(np.float64)), ('x', x), ('y', y), ('xx', x * x), ('yy', y * y), ('xy', x * y))}
+        self.frames = n
+
+    def __len__(self) -> int:
+        return self.frames
+
+    def frame_range(self, start: float, end: float) -> Tuple[int, int]:
+        """Clip frame indices [a, b) covering `start`..`end` seconds of the source video."""
+        a = int(np.clip(np.floor((start - self.start_time) * self.fps), 0, self.frames))
+        b = int(np.clip(np.ceil((end - self.start_time) * self.fps), a, self.frames))
+        return a, b
+
+    def _window(self, name: str, a, b):
+        sums = self._sums[name]
+        return sums[b] - sums[a]
+
+    def correlation(self, a, b) -> np.ndarray:
+        """Pearson correlation over frames [a, b); scalars or arrays of bounds. 0 when undefined."""
+        count = self._window('n', a, b)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sx, sy = self._window('x', a, b), self._window('y', a, b)
+            cov = self._window('xy', a, b) - sx * sy / count
+            var_x = self._window('xx', a, b) - sx * sx / count
+            var_y = self._window('yy', a, b) - sy * sy / count
+            r = cov / np.sqrt(var_x * var_y)
+        r = np.where((count >= 2) & (var_x > 1e-9) & (var_y > 1e-9), r, 0.0)
+        return np.clip(r, -1.0, 1.0)
+
+    def coverage(self, a, b) -> np.ndarray:
+        """Fraction of frames in [a, b) where lips were found."""
+        return self._window('n', a, b) / np.maximum(np.asarray(b) - np.asarray(a), 1)
+
+    def score(self, start: float, end: float) -> Tuple[float, float]:
+        """(correlation, coverage) for `start`..`end` seconds of the source video."""
+        a, b = self.frame_range(start, end)
+        return float(self.correlation(a, b)), float(self.coverage(a, b))
+
+def resample(values: np.ndarray, rate: float, grid: np.ndarray) -> np.ndarray:
+    """Linearly resamples the columns of a (d, n) or (n,) series sampled at `rate` onto `grid` seconds.
+
+    The interpolation indices and weights are computed once and applied to every row.
+    Grid points past either end take the edge value.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = values.shape[-1]
+    if n == 1:
+        return np.repeat(values, len(grid), axis=-1)
+    position = np.clip(grid * rate, 0, n - 1)
+    left = np.minimum(position.astype(np.int64), n - 2)
+    weight = position - left
+    return values[..., left] * (1 - weight) + values[..., left + 1] * weight
+
+def align_to_grid(lip: np.ndarray, fps: float, features: np.ndarray, feature_rate: float,
+                  rate: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Puts per-frame lip movement and (d, m) audio features on one time grid.
+
+    Lip sample i is at i / fps seconds and feature frame j at j / feature_rate; both
+    are resampled onto a shared grid at `rate` (the video rate by default) covering
+    the time both signals span, with frames that have no face interpolated from their
+    neighbours. Returns the lip series (k,) and the features (d, k).
+    """
+    rate = rate or fps
+    duration = min(len(lip) / fps, features.shape[1] / feature_rate)
+    grid = np.arange(int(duration * rate)) / rate
+    return resample(fill_gaps(lip), fps, grid), resample(features, feature_rate, grid)
@@ -0,0 +1,193 @@
+import logging
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import torch
+import whisper
+from whisper.audio import N_SAMPLES, SAMPLE_RATE
+from whisper.tokenizer import get_tokenizer
+from audio_buffer import get_audio_buffer
+from audio_processing import VoiceActivityDetector
+from model_registry import get_registry
+
+logger = logging.getLogger(__name__)
+
+TIME_PRECISION = 0.02
+WINDOW_SECONDS = N_SAMPLES / SAMPLE_RATE
+# whisper.transcribe's defaults for retrying a window at a higher temperature.
+TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+def quietest_cut(audio: np.ndarray, start: int, end: int, sr: int, search_seconds: float = 5.0,
+                 frame_seconds: float = 0.02) -> int:
+    """Sample index in the last `search_seconds` before `end` where the audio is quietest.
+
+    Cutting a window there instead of at exactly `end` avoids splitting a word between
+    two windows, which Whisper would transcribe twice or not at all.
+    """
+    frame = max(1, int(frame_seconds * sr))
+    search_start = max(start + frame, end - int(search_seconds * sr))
+    frames = (end - search_start) // frame
+    if frames <= 0:
+        return end
+    energy = np.square(audio[end - frames * frame:end], dtype=np.float64).reshape(frames, frame).sum(axis=1)
+    return end - frames * frame + int(np.argmin(energy)) * frame + frame // 2
+
+@dataclass
+class TranscriptionWindow:
+    speaker: str
+    start: float
+    audio: np.ndarray
+
+class BatchedTranscriber:
+    """Transcribes 30-second windows from many tracks in shared Whisper decode batches."""
+
+    def __init__(self, whisper_model: str = 'large', batch_size: int = 8, language: Optional[str] = None,
+                 vad: Optional[VoiceActivityDetector] = None, quantize: bool = False,
+                 temperatures: Sequence[float] = TEMPERATURES):
+        self.model_name = whisper_model
+        self.quantize = quantize
+        self.batch_size = batch_size
+        self.language = language
+        self.vad = vad
+        self.temperatures = tuple(temperatures)
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+    @property
+    def whisper_model(self):
+        return get_registry().whisper(self.model_name, self.device, self.quantize)
+
+    def split_span(self, speaker: str, audio: np.ndarray, sr: int, start: int, end: int) -> List[TranscriptionWindow]:
+        """Cuts audio[start:end] into windows of at most 30 seconds, each ending at the quietest nearby point."""
+        window_samples = int(WINDOW_SECONDS * sr)
+        windows = []
+        while end - start > window_samples:
+            cut = quietest_cut(audio, start, start + window_samples, sr)
+            windows.append(TranscriptionWindow(speaker, float(start / sr), audio[start:cut]))
+            start = cut
+        if end > start:
+            windows.append(TranscriptionWindow(speaker, float(start / sr), audio[start:end]))
+        return windows
+
+    def plan_windows(self, speaker: str, audio: np.ndarray, sr: int) -> List[TranscriptionWindow]:
+        """Cuts a track into windows of at most 30 seconds, split in silence.
+
+        With a VAD, windows hold whole speech spans where they fit; otherwise, and for
+        spans longer than a window, cuts fall at the quietest point of each window's
+        last seconds.
+        """
+        window_samples = int(WINDOW_SECONDS * sr)
+        if self.vad is None:
+            return self.split_span(speaker, audio, sr, 0, len(audio))
+
+        windows = []
+        window_start = window_end = None
+        for span_start, span_end in self.vad.detect(audio, sr).spans:
+            if window_start is not None and span_end - window_start <= window_samples:
+                window_end = span_end
+                continue
+            if window_start is not None:
+                windows.append(TranscriptionWindow(speaker, float(window_start / sr), audio[window_start:window_end]))
+            if span_end - span_start > window_samples:
+                # A span longer than one window keeps its last piece open for the spans after it.
+                pieces = self.split_span(speaker, audio, sr, span_start, span_end)
+                windows.extend(pieces[:-1])
+                span_start = span_end - len(pieces[-1].audio)
+            window_start, window_end = span_start, span_end
+        if window_start is not None:
+            windows.append(TranscriptionWindow(speaker, float(window_start / sr), audio[window_start:window_end]))
+        return windows
+
+    @staticmethod
+    def needs_fallback(result: whisper.DecodingResult) -> bool:
+        """whisper.transcribe's test for a degenerate decode: repetitive or unlikely text that is not silence."""
+        if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+            return False
+        return result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD
+
+    def decode_batch(self, windows: List[TranscriptionWindow]) -> List[whisper.DecodingResult]:
+        """Decodes a batch greedily, then re-decodes the windows that fail `needs_fallback` at rising temperatures."""
+        model = self.whisper_model
+        # Mels are computed per window: log_mel_spectrogram normalizes by the maximum of its whole input.
+        mel = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(np.asarray(window.audio, dtype=np.float32)), model.dims.n_mels)
+            for window in windows
+        ]).to(self.device)
+        results: List[Optional[whisper.DecodingResult]] = [None] * len(windows)
+        pending = list(range(len(windows)))
+        for temperature in self.temperatures:
+            options = whisper.DecodingOptions(task='transcribe', language=self.language, without_timestamps=False,
+                                              temperature=temperature, fp16=self.device.type == 'cuda')
+            for index, result in zip(pending, whisper.decode(model, mel[pending], options)):
+                results[index] = result
+            pending = [index for index in pending if self.needs_fallback(results[index])]
+            if not pending:
+                break
+            logger.info(f"Re-decoding {len(pending)} windows above temperature {temperature}")
+        return results
+
+    def parse_segments(self, result: whisper.DecodingResult, window: TranscriptionWindow, tokenizer) -> List[Dict]:
+        """Splits a window's tokens into segments at timestamp tokens, on the track's timeline."""
+        # Same silence rule as whisper.transcribe.
+        if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+            return []
+        duration = len(window.audio) / get_audio_buffer().sr
+        segments = []
+        segment_start = 0.0
+        text_tokens: List[int] = []
+        for token in result.tokens:
+            if token < tokenizer.timestamp_begin:
+                text_tokens.append(token)
+                continue
+            timestamp = min((token - tokenizer.timestamp_begin) * TIME_PRECISION, duration)
+            if text_tokens:
+                segments.append((segment_start, timestamp, text_tokens))
+                text_tokens = []
+            segment_start = timestamp
+        if text_tokens:
+            segments.append((segment_start, duration, text_tokens))
+        return [{
+            'start': window.start + start,
+            'end': window.start + end,
+            'text': tokenizer.decode(tokens),
+            'tokens': tokens,
+            'avg_logprob': result.avg_logprob,
+            'no_speech_prob': result.no_speech_prob,
+        } for start, end, tokens in segments if end > start]
+
+    def transcribe_tracks(self, tracks: Dict[str, str]) -> Dict[str, Dict]:
+        """Transcribes every speaker's track; returns whisper.transcribe-shaped results per speaker."""
+        audio_buffer = get_audio_buffer()
+        # Windows are views of the tracks' buffers, so the tracks stay open until decoding ends.
+        with ExitStack() as stack:
+            windows = []
+            for speaker, audio_path in tracks.items():
+                speaker_windows = self.plan_windows(speaker, stack.enter_context(audio_buffer.open(audio_path)),
+                                                     audio_buffer.sr)
+                logger.info(f"Planned {len(speaker_windows)} Whisper windows for {speaker}")
+                windows.extend(speaker_windows)
+
+            model = self.whisper_model
+            tokenizer = get_tokenizer(model.is_multilingual, num_languages=model.num_languages, task='transcribe')
+            results: Dict[str, Dict] = {speaker: {'text': '', 'segments': [], 'language': self.language}
+                                        for speaker in tracks}
+            start_time = time.perf_counter()
+            for first in range(0, len(windows), self.batch_size):
+                batch = windows[first:first + self.batch_size]
+                for window, result in zip(batch, self.decode_batch(batch)):
+                    speaker_result = results[window.speaker]
+                    speaker_result['segments'].extend(self.parse_segments(result, window, tokenizer))
+                    speaker_result['language'] = speaker_result['language'] or result.language
+                logger.info(f"Decoded {min(first + self.batch_size, len(windows))}/{len(windows)} windows")
+            logger.info(f"Batched transcription of {len(windows)} windows took {time.perf_counter() - start_time:.2f}s")
+
+        for speaker_result in results.values():
+            speaker_result['segments'].sort(key=lambda segment: segment['start'])
+            for index, segment in enumerate(speaker_result['segments']):
+                segment['id'] = index
+            speaker_result['text'] = ''.join(segment['text'] for segment in speaker_result['segments'])
+        return results
@@ -0,0 +1,57 @@
+import argparse
+import logging
+import time
+from typing import Callable, Dict, List
+import numpy as np
+from av_sync import cross_correlation_offset
+from dtw import dtw_antidiagonal, dtw_distance, dtw_naive, njit
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def timed(fn: Callable[[], float]) -> Dict[str, float]:
+    start = time.perf_counter()
+    value = fn()
+    return {'seconds': time.perf_counter() - start, 'value': value}
+
+def benchmark(lengths: List[int], band: int, naive_limit: int, max_lag: int) -> List[Dict]:
+    rng = np.random.default_rng(0)
+    if njit is not None:
+        # Compile the kernel before timing.
+        dtw_distance(np.zeros(4), np.zeros(4), band)
+    results = []
+    for length in lengths:
+        logger.info(f"Benchmarking DTW on {length} frames")
+        lip = rng.random(length)
+        audio = np.roll(lip, 3) + 0.1 * rng.standard_normal(length)
+        row = {'length': length}
+        if length <= naive_limit:
+            row['naive'] = timed(lambda: dtw_naive(lip, audio))
+            row['full'] = timed(lambda: dtw_distance(lip, audio, 0))
+        row['antidiagonal'] = timed(lambda: dtw_antidiagonal(lip, audio, band))
+        if njit is not None:
+            row['compiled'] = timed(lambda: dtw_distance(lip, audio, band))
+        row['xcorr'] = timed(lambda: cross_correlation_offset(lip, audio, max_lag)[1])
+        results.append(row)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the naive DTW loop with the banded DTW engine and FFT cross-correlation.")
+    parser.add_argument('--lengths', default='100,300,1000,3000,30000,108000', help="Comma-separated sequence lengths")
+    parser.add_argument('--band', type=int, default=30, help="Sakoe-Chiba band in frames")
+    parser.add_argument('--max-lag', type=int, default=30, help="Largest offset searched by cross-correlation")
+    parser.add_argument('--naive-limit', type=int, default=1000, help="Longest sequence to run the naive loop on")
+    args = parser.parse_args()
+
+    lengths = [int(length) for length in args.lengths.split(',')]
+    results = benchmark(lengths, args.band, args.naive_limit, args.max_lag)
+    columns = ['naive', 'full', 'antidiagonal'] + (['compiled'] if njit is not None else []) + ['xcorr']
+    print(f"{'frames':>8}" + ''.join(f"{column + ' s':>16}" for column in columns))
+    for row in results:
+        cells = ''.join(f"{row[column]['seconds']:>16.4f}" if column in row else f"{'-':>16}" for column in columns)
+        print(f"{row['length']:>8}{cells}")
+    print(f"'full' is unconstrained DTW through the fast path; banded columns use a band of {args.band} frames; "
+          f"'xcorr' is the FFT offset search within {args.max_lag} frames.")
+
+if __name__ == "__main__":
+    main()
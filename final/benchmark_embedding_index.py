@@ -0,0 +1,85 @@
+import argparse
+import logging
+import time
+from typing import Callable, Dict, List
+import numpy as np
+from embedding_index import EmbeddingIndex, faiss
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def loop_search(gallery: Dict[str, List[np.ndarray]], query: np.ndarray) -> str:
+    """Per-pair cosine distance over the gallery, as FaceRecognizer.recognize_face used to do."""
+    min_distance = float('inf')
+    recognized_name = "Unknown"
+    for name, stored_embeddings in gallery.items():
+        for stored_embedding in stored_embeddings:
+            distance = 1 - np.dot(query, stored_embedding) / (np.linalg.norm(query) * np.linalg.norm(stored_embedding))
+            if distance < min_distance:
+                min_distance = distance
+                recognized_name = name
+    return recognized_name
+
+def time_per_query(search: Callable[[np.ndarray], object], queries: np.ndarray, batch_size: int) -> float:
+    start = time.perf_counter()
+    for first in range(0, len(queries), batch_size):
+        search(queries[first:first + batch_size])
+    return (time.perf_counter() - start) / len(queries)
+
+def benchmark(sizes: List[int], dim: int, people: int, num_queries: int, batch_size: int, loop_limit: int) -> List[Dict]:
+    rng = np.random.default_rng(0)
+    results = []
+    for size in sizes:
+        logger.info(f"Benchmarking a gallery of {size} embeddings")
+        vectors = rng.standard_normal((size, dim)).astype(np.float32)
+        labels = rng.integers(0, people, size)
+        queries = vectors[rng.integers(0, size, num_queries)] + 0.1 * rng.standard_normal((num_queries, dim)).astype(np.float32)
+        row = {'size': size}
+
+        if size <= loop_limit:
+            gallery: Dict[str, List[np.ndarray]] = {}
+            for vector, label in zip(vectors, labels):
+                gallery.setdefault(f"person_{label}", []).append(vector)
+            row['loop'] = time_per_query(lambda batch: loop_search(gallery, batch[0]), queries, 1)
+
+        index = EmbeddingIndex("cosine")
+        for label in range(people):
+            index.add(f"person_{label}", vectors[labels == label])
+        row['exact'] = time_per_query(index.search, queries, 1)
+        row['exact_batch'] = time_per_query(index.search, queries, batch_size)
+
+        if faiss is not None:
+            ann = EmbeddingIndex("cosine", backend="faiss")
+            for label in range(people):
+                ann.add(f"person_{label}", vectors[labels == label])
+            exact_names = index.search(queries)[0]
+            row['faiss_batch'] = time_per_query(ann.search, queries, batch_size)
+            row['faiss_recall'] = float(np.mean([a == b for a, b in zip(ann.search(queries)[0], exact_names)]))
+        results.append(row)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-pair loop search with the vectorized embedding index.")
+    parser.add_argument('--sizes', default='100,1000,10000,100000', help="Comma-separated gallery sizes")
+    parser.add_argument('--dim', type=int, default=512, help="Embedding dimension (Facenet512: 512)")
+    parser.add_argument('--people', type=int, default=20, help="Number of enrolled identities")
+    parser.add_argument('--queries', type=int, default=256, help="Number of queries per gallery size")
+    parser.add_argument('--batch-size', type=int, default=32, help="Queries per batched search")
+    parser.add_argument('--loop-limit', type=int, default=10000, help="Largest gallery to run the loop baseline on")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    results = benchmark(sizes, args.dim, args.people, args.queries, args.batch_size, args.loop_limit)
+    header = f"{'gallery':>9}{'loop ms':>10}{'exact ms':>10}{'batch ms':>10}"
+    if faiss is not None:
+        header += f"{'faiss ms':>10}{'recall':>8}"
+    print(header)
+    for row in results:
+        loop = f"{row['loop'] * 1000:>10.3f}" if 'loop' in row else f"{'-':>10}"
+        line = f"{row['size']:>9}{loop}{row['exact'] * 1000:>10.3f}{row['exact_batch'] * 1000:>10.3f}"
+        if faiss is not None:
+            line += f"{row['faiss_batch'] * 1000:>10.3f}{row['faiss_recall']:>8.3f}"
+        print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import logging
+import time
+from typing import Dict, List
+import numpy as np
+import cv2
+from face_recognition_module import FaceRecognizer
+from face_tracking import iou_matrix
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def sample_frames(video_path: str, count: int) -> List[np.ndarray]:
+    """Up to `count` frames spread evenly over the video."""
+    cap = cv2.VideoCapture(video_path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    frames = []
+    for index in np.linspace(0, max(total - 1, 0), num=count, dtype=int):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, int(index))
+        ret, frame = cap.read()
+        if ret:
+            frames.append(frame)
+    cap.release()
+    return frames
+
+def recall(reference: List[np.ndarray], detected: List[np.ndarray], iou_threshold: float) -> float:
+    """Fraction of full-resolution boxes matched by a box at IoU >= `iou_threshold`."""
+    found = total = 0
+    for ref_boxes, boxes in zip(reference, detected):
+        total += len(ref_boxes)
+        if len(ref_boxes) and len(boxes):
+            found += int((iou_matrix(ref_boxes, boxes).max(axis=1) >= iou_threshold).sum())
+    return found / total if total else 1.0
+
+def benchmark(video_path: str, scales: List[float], frame_count: int, iou_threshold: float) -> List[Dict]:
+    frames = sample_frames(video_path, frame_count)
+    logger.info(f"Benchmarking detection on {len(frames)} frames of {frames[0].shape[1]}x{frames[0].shape[0]}")
+    # Warm up the detector so model loading is not timed.
+    FaceRecognizer().detect_faces(frames[0])
+
+    results, reference = [], None
+    for scale in [1.0] + [scale for scale in scales if scale != 1.0]:
+        recognizer = FaceRecognizer(detection_scale=scale)
+        start = time.perf_counter()
+        detected = [np.asarray(recognizer.detect_faces(frame), dtype=np.float64).reshape(-1, 4) for frame in frames]
+        elapsed = (time.perf_counter() - start) / len(frames)
+        if reference is None:
+            reference = detected
+        results.append({'scale': scale, 'ms_per_frame': elapsed * 1000,
+                        'faces': sum(len(boxes) for boxes in detected),
+                        'recall': recall(reference, detected, iou_threshold)})
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Detection time and recall of downscaled face detection.")
+    parser.add_argument('video', help="Local sample footage")
+    parser.add_argument('--scales', default='1.0,0.75,0.5,0.33,0.25', help="Comma-separated detection scales")
+    parser.add_argument('--frames', type=int, default=100, help="Frames sampled from the video")
+    parser.add_argument('--iou', type=float, default=0.5, help="IoU needed to count a full-resolution face as found")
+    args = parser.parse_args()
+
+    scales = [float(scale) for scale in args.scales.split(',')]
+    results = benchmark(args.video, scales, args.frames, args.iou)
+    print(f"{'scale':>6}{'ms/frame':>10}{'faces':>7}{'recall':>8}")
+    for row in results:
+        print(f"{row['scale']:>6.2f}{row['ms_per_frame']:>10.1f}{row['faces']:>7}{row['recall']:>8.3f}")
+
+if __name__ == "__main__":
+    main()
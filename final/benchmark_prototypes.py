@@ -0,0 +1,104 @@
+import argparse
+import logging
+import time
+from typing import Dict, List, Tuple
+import numpy as np
+from embedding_index import EmbeddingIndex
+from prototypes import acceptance_limits, compress_embeddings
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def synthetic_identity(rng: np.random.Generator, identity: np.ndarray, poses: int, count: int, pose_spread: float,
+                       noise: float) -> np.ndarray:
+    """Embeddings of one person: a few pose clusters around an identity direction, plus noise."""
+    dim = len(identity)
+    offsets = pose_spread * rng.standard_normal((poses, dim))
+    samples = identity + offsets[rng.integers(0, poses, count)] + noise * rng.standard_normal((count, dim))
+    return samples.astype(np.float32)
+
+def build_dataset(people: int, impostors: int, frames: int, queries: int, dim: int, resemblance: float,
+                  seed: int = 0) -> Tuple[Dict[str, np.ndarray], np.ndarray, List[str]]:
+    """Enrolled galleries plus labelled queries.
+
+    Each impostor is a lookalike of an enrolled person: its identity direction shares
+    `resemblance` (a cosine similarity) with theirs, so wide acceptance limits show up
+    as false accepts.
+    """
+    rng = np.random.default_rng(seed)
+    identities = rng.standard_normal((people, dim))
+    gallery, query_vectors, query_labels = {}, [], []
+    for person in range(people + impostors):
+        if person < people:
+            identity = identities[person]
+        else:
+            other = rng.standard_normal(dim)
+            identity = resemblance * identities[person % people] + np.sqrt(1.0 - resemblance ** 2) * other
+        samples = synthetic_identity(rng, identity, poses=4, count=frames + queries, pose_spread=0.6, noise=1.2)
+        name = f"person_{person}" if person < people else "Unknown"
+        if person < people:
+            gallery[name] = samples[:frames]
+        query_vectors.append(samples[frames:])
+        query_labels.extend([name] * queries)
+    return gallery, np.concatenate(query_vectors), query_labels
+
+def evaluate(index: EmbeddingIndex, queries: np.ndarray, labels: List[str], threshold: float,
+             max_widen: float) -> Dict[str, float]:
+    """Accuracy, false-accept rate (impostor queries given a name) and per-query latency."""
+    start = time.perf_counter()
+    names, distances, radii = index.search(queries)
+    elapsed = (time.perf_counter() - start) / len(queries)
+    # Same rule as FaceRecognizer.match_embeddings.
+    limits = acceptance_limits(radii, threshold, max_widen)
+    predicted = [name if distance < limit else "Unknown" for name, distance, limit in zip(names, distances, limits)]
+    impostor = [p != "Unknown" for p, label in zip(predicted, labels) if label == "Unknown"]
+    return {'accuracy': float(np.mean([p == label for p, label in zip(predicted, labels)])),
+            'false_accepts': float(np.mean(impostor)) if impostor else 0.0, 'latency': elapsed}
+
+def benchmark(people: int, impostors: int, frames: int, queries: int, dim: int, ks: List[int],
+              threshold: float, radius_quantile: float, max_widen: float, resemblance: float) -> List[Dict]:
+    gallery, query_vectors, labels = build_dataset(people, impostors, frames, queries, dim, resemblance)
+    results = []
+
+    full = EmbeddingIndex("cosine")
+    for name, embeddings in gallery.items():
+        full.add(name, embeddings)
+    results.append({'k': 'all', 'rows': len(full), 'compress': 0.0,
+                    **evaluate(full, query_vectors, labels, threshold, max_widen)})
+
+    for k in ks:
+        logger.info(f"Compressing to {k} prototypes per person")
+        compressed = EmbeddingIndex("cosine")
+        start = time.perf_counter()
+        for name, embeddings in gallery.items():
+            compressed.add(name, *compress_embeddings(embeddings, k, "cosine", radius_quantile))
+        compress_seconds = time.perf_counter() - start
+        results.append({'k': k, 'rows': len(compressed), 'compress': compress_seconds,
+                        **evaluate(compressed, query_vectors, labels, threshold, max_widen)})
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full face galleries with k-means prototype galleries.")
+    parser.add_argument('--people', type=int, default=10, help="Enrolled identities")
+    parser.add_argument('--impostors', type=int, default=5, help="Lookalike identities queried but never enrolled")
+    parser.add_argument('--resemblance', type=float, default=0.6,
+                        help="Cosine similarity between an impostor's identity and the enrolled person it resembles")
+    parser.add_argument('--frames', type=int, default=3000, help="Embeddings enrolled per person")
+    parser.add_argument('--queries', type=int, default=100, help="Queries per identity")
+    parser.add_argument('--dim', type=int, default=512, help="Embedding dimension")
+    parser.add_argument('--k', default='1,4,8,16', help="Comma-separated prototype counts")
+    parser.add_argument('--threshold', type=float, default=0.6, help="Cosine distance threshold")
+    parser.add_argument('--radius-quantile', type=float, default=0.99, help="Quantile used for prototype radii")
+    parser.add_argument('--max-widen', type=float, default=1.25, help="Largest factor a radius widens the threshold by")
+    args = parser.parse_args()
+
+    ks = [int(k) for k in args.k.split(',')]
+    results = benchmark(args.people, args.impostors, args.frames, args.queries, args.dim, ks,
+                        args.threshold, args.radius_quantile, args.max_widen, args.resemblance)
+    print(f"{'k':>5}{'rows':>8}{'accuracy':>10}{'false acc':>11}{'query ms':>10}{'compress s':>12}")
+    for row in results:
+        print(f"{row['k']:>5}{row['rows']:>8}{row['accuracy']:>10.3f}{row['false_accepts']:>11.3f}"
+              f"{row['latency'] * 1000:>10.4f}{row['compress']:>12.2f}")
+
+if __name__ == "__main__":
+    main()
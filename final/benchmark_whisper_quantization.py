@@ -0,0 +1,96 @@
+import argparse
+import logging
+import multiprocessing
+import re
+import time
+from typing import Dict, List, Optional
+import numpy as np
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def normalize_words(text: str) -> List[str]:
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level Levenshtein distance divided by the reference length."""
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, start=1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1] / len(ref)
+
+def run_mode(audio_path: str, model_name: str, quantize: bool, language: Optional[str], queue) -> None:
+    """Runs in a fresh process so that peak RSS reflects a single model."""
+    import torch
+    from audio_buffer import get_audio_buffer
+    from model_registry import get_registry, peak_rss_bytes
+
+    audio_buffer = get_audio_buffer()
+    with audio_buffer.open(audio_path) as buffered:
+        audio = np.array(buffered)
+    duration = len(audio) / audio_buffer.sr
+    registry = get_registry()
+    model = registry.whisper(model_name, torch.device('cpu'), quantize)
+    start = time.perf_counter()
+    result = model.transcribe(audio, fp16=False, language=language, temperature=0.0)
+    elapsed = time.perf_counter() - start
+    queue.put({
+        'mode': 'int8' if quantize else 'fp32',
+        'load_seconds': registry.stats()[0].load_seconds,
+        'transcribe_seconds': elapsed,
+        'real_time_factor': elapsed / duration,
+        'peak_rss_mb': (peak_rss_bytes() or 0) / 1024 ** 2,
+        'text': result['text'],
+    })
+
+def benchmark(audio_path: str, model_name: str, language: Optional[str], reference: Optional[str]) -> List[Dict]:
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for quantize in (False, True):
+        logger.info(f"Benchmarking {'int8' if quantize else 'fp32'} Whisper {model_name} on {audio_path}")
+        queue = context.Queue()
+        process = context.Process(target=run_mode, args=(audio_path, model_name, quantize, language, queue))
+        process.start()
+        results.append(queue.get())
+        process.join()
+
+    fp32_text = results[0]['text']
+    for result in results:
+        result['wer_vs_fp32'] = word_error_rate(fp32_text, result['text'])
+        if reference is not None:
+            result['wer_vs_reference'] = word_error_rate(reference, result['text'])
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare fp32 and int8 dynamic-quantized Whisper on CPU.")
+    parser.add_argument('audio', help="Local audio clip to transcribe")
+    parser.add_argument('--model', default='large', help="Whisper model name")
+    parser.add_argument('--language', default=None, help="Language code; detected if omitted")
+    parser.add_argument('--reference', default=None, help="Text file with the reference transcript")
+    args = parser.parse_args()
+
+    reference = None
+    if args.reference:
+        with open(args.reference, encoding='utf-8') as f:
+            reference = f.read()
+
+    results = benchmark(args.audio, args.model, args.language, reference)
+    header = f"{'mode':<6}{'load s':>9}{'RTF':>8}{'peak RSS MB':>13}{'WER/fp32':>10}"
+    if reference is not None:
+        header += f"{'WER/ref':>9}"
+    print(header)
+    for result in results:
+        row = (f"{result['mode']:<6}{result['load_seconds']:>9.2f}{result['real_time_factor']:>8.3f}"
+               f"{result['peak_rss_mb']:>13.0f}{result['wer_vs_fp32']:>10.3f}")
+        if reference is not None:
+            row += f"{result['wer_vs_reference']:>9.3f}"
+        print(row)
+
+if __name__ == "__main__":
+    main()
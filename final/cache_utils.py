@@ -0,0 +1,55 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Collection, Dict
+
+logger = logging.getLogger(__name__)
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """Returns the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def cache_key(**parts) -> str:
+    """Builds a stable key from JSON-serializable parts."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def touch(path: str) -> None:
+    """Marks a cache entry as recently used."""
+    try:
+        os.utime(path)
+    except OSError as e:
+        logger.warning(f"Failed to touch cache entry {path}: {e}")
+
+def evict_lru(directory: str, max_bytes: int, suffix: str = '', keep: Collection[str] = ()) -> int:
+    """Deletes least recently used files ending in `suffix` until the directory fits in `max_bytes`.
+
+    Paths in `keep`, such as files that are still memory-mapped, are never deleted.
+    """
+    keep = {os.path.abspath(path) for path in keep}
+    entries: Dict[str, os.stat_result] = {}
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.endswith(suffix):
+                entries[entry.path] = entry.stat()
+    total = sum(stat.st_size for stat in entries.values())
+    removed = 0
+    for path, stat in sorted(entries.items(), key=lambda item: item[1].st_mtime):
+        if total <= max_bytes:
+            break
+        if os.path.abspath(path) in keep:
+            continue
+        try:
+            os.remove(path)
+            total -= stat.st_size
+            removed += 1
+        except OSError as e:
+            logger.warning(f"Failed to evict cache entry {path}: {e}")
+    if removed:
+        logger.info(f"Evicted {removed} cache entries from {directory}")
+    return removed
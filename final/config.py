@@ -1,183 +1,269 @@
-from decouple import config, Csv
-from dataclasses import dataclass
-from typing import Dict, Tuple, List
-import os
-import logging
-
-logger = logging.getLogger(__name__)
-
-@dataclass(frozen=True)
-class PerplexityConfig:
-    api_key: str
-    api_url: str
-
-@dataclass
-class TestConfig:
-    enabled: bool
-    start_time: float
-    end_time: float
-    target_person: str
-    individual_video_path: str
-    individual_audio_path: str
-    side_video_path: str
-    full_video_path: str
-    full_audio_path: str
-
-@dataclass(frozen=True)
-class FaceRecognitionConfig:
-    model: str
-    distance_metric: str
-
-@dataclass(frozen=True)
-class AudioConfig:
-    whisper_model: str
-
-@dataclass(frozen=True)
-class LipSyncConfig:
-    landmark_predictor_path: str
-
-@dataclass(frozen=True)
-class OutputConfig:
-    path: str
-
-@dataclass(frozen=True)
-class DiarizationConfig:
-    min_clusters: int
-    max_clusters: int
-
-@dataclass(frozen=True)
-class ProcessingConfig:
-    num_workers: int
-
-@dataclass(frozen=True)
-class DatabaseConfig:
-    host: str
-    user: str
-    password: str
-    name: str
-    pool_size: int
-    port: int 
-
-@dataclass(frozen=True)
-class VideoConfig:
-    path: str
-    audio_path: str
-    fps: float
-
-@dataclass(frozen=True)
-class APIConfig:
-    key: str
-
-@dataclass(frozen=True)
-class Config:
-    FACE_RECOGNITION: FaceRecognitionConfig
-    AUDIO: AudioConfig
-    LIPSYNC: LipSyncConfig
-    DIARIZATION: DiarizationConfig
-    PROCESSING: ProcessingConfig
-    DATABASE: DatabaseConfig
-    VIDEO: VideoConfig
-    OUTPUT: OutputConfig
-    PARTICIPANTS: Dict[str, Tuple[str, str]]
-    SIDE_VIDEOS: Dict[str, str]
-    API: APIConfig
-    TEST: TestConfig
-    PERPLEXITY: PerplexityConfig
-
-def parse_csv_to_dict(raw_data: List[str], tuple_size: int) -> Dict[str, Tuple[str, ...]]:
-    result = {}
-    for i in range(0, len(raw_data), tuple_size):
-        if i + tuple_size <= len(raw_data):
-            key = raw_data[i]
-            values = tuple(raw_data[i+1:i+tuple_size])
-            result[key] = values
-    return result
-
-def validate_paths(*paths):
-    for path in paths:
-        if not os.path.exists(path):
-            raise FileNotFoundError(f"Path does not exist: {path}")
-
-def load_config() -> Config:
-    try:
-        participants_raw = config('PARTICIPANTS', cast=Csv())
-        side_videos_raw = config('SIDE_VIDEOS', cast=Csv())
-
-        participants = parse_csv_to_dict(participants_raw, 3)
-        side_videos = parse_csv_to_dict(side_videos_raw, 2)
-
-        landmark_predictor_path = config('LANDMARK_PREDICTOR_PATH')
-        video_path = config('VIDEO_PATH')
-        video_audio_path = config('VIDEO_AUDIO_PATH')
-        output_path = config('OUTPUT_PATH')
-
-        validate_paths(landmark_predictor_path, video_path, video_audio_path)
-
-        return Config(
-            FACE_RECOGNITION=FaceRecognitionConfig(
-                model=config('FACE_RECOGNITION_MODEL'),
-                distance_metric=config('FACE_RECOGNITION_DISTANCE_METRIC')
-            ),
-            AUDIO=AudioConfig(
-                whisper_model=config('WHISPER_MODEL')
-            ),
-            LIPSYNC=LipSyncConfig(
-                landmark_predictor_path=landmark_predictor_path
-            ),
-            DIARIZATION=DiarizationConfig(
-                min_clusters=config('MIN_CLUSTERS', cast=int),
-                max_clusters=config('MAX_CLUSTERS', cast=int),
-            ),
-            PROCESSING=ProcessingConfig(
-                num_workers=config('NUM_WORKERS', cast=int)
-            ),
-            DATABASE=DatabaseConfig(
-                host=config('DB_HOST'),
-                user=config('DB_USER'),
-                password=config('DB_PASSWORD'),
-                name=config('DB_NAME'),
-                pool_size=config('DB_POOL_SIZE', cast=int),
-                port=config('DB_PORT', cast=int)  
-            ),
-            VIDEO=VideoConfig(
-                path=video_path,
-                audio_path=video_audio_path,
-                fps=config('VIDEO_FPS', cast=float)
-            ),
-            OUTPUT=OutputConfig(
-                path=output_path
-            ),
-            PARTICIPANTS=participants,
-            SIDE_VIDEOS=side_videos,
-            API=APIConfig(
-                key=config('API_KEY')
-            ),
-            TEST=TestConfig(
-                enabled=config('TEST_MODE_ENABLED', cast=bool, default=False),
-                start_time=config('TEST_START_TIME', cast=float, default=0.0),
-                end_time=config('TEST_END_TIME', cast=float, default=60.0),
-                target_person=config('TEST_TARGET_PERSON', default=''),
-                individual_video_path=config('TEST_INDIVIDUAL_VIDEO_PATH', default=''),
-                individual_audio_path=config('TEST_INDIVIDUAL_AUDIO_PATH', default=''),
-                side_video_path=config('TEST_SIDE_VIDEO_PATH', default=''),
-                full_video_path=config('TEST_FULL_VIDEO_PATH', default=''),
-                full_audio_path=config('TEST_FULL_AUDIO_PATH', default='')
-            ),
-            PERPLEXITY=PerplexityConfig(
-                api_key=config('PERPLEXITY_API_KEY'),
-                api_url=config('PERPLEXITY_API_URL', default="https://api.perplexity.ai/chat/completions")
-            ),
-        )
-    except Exception as e:
-        logger.error(f"Error loading configuration: {e}")
-        raise
-
-if __name__ == "__main__":
-    logging.basicConfig(level=logging.INFO)
-    try:
-        config = load_config()
-        logger.info("Configuration loaded successfully")
-        logger.info(f"Number of participants: {len(config.PARTICIPANTS)}")
-        logger.info(f"Number of side videos: {len(config.SIDE_VIDEOS)}")
-    except Exception as e:
-        logger.error(f"Failed to load configuration: {e}")
\ No newline at end of file
+from decouple import config, Csv
+from dataclasses import dataclass
+from typing import Dict, Tuple, List
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class PerplexityConfig:
+    api_key: str
+    api_url: str
+
+@dataclass
+class TestConfig:
+    enabled: bool
+    start_time: float
+    end_time: float
+    target_person: str
+    individual_video_path: str
+    individual_audio_path: str
+    side_video_path: str
+    full_video_path: str
+    full_audio_path: str
+
+@dataclass(frozen=True)
+class FaceRecognitionConfig:
+    model: str
+    distance_metric: str
+    index_backend: str
+    batch_size: int
+    enroll_stride: int
+    enroll_scene_threshold: float
+    enroll_max_gap: int
+    enroll_stability_tolerance: float
+    enroll_stability_patience: int
+    enroll_min_faces: int
+    track_iou_threshold: float
+    track_max_misses: int
+    track_refresh_interval: int
+    gallery_dir: str
+    prototypes: int
+    prototype_radius_quantile: float
+    prototype_max_widen: float
+    detection_scale: float
+    detection_short_side: int
+
+@dataclass(frozen=True)
+class AudioConfig:
+    whisper_model: str
+    whisper_quantize: bool
+    streaming: bool
+    stream_window: float
+    stream_overlap: float
+    vad: bool
+    vad_energy_margin_db: float
+    vad_padding: float
+    cache_dir: str
+    cache_max_bytes: int
+    buffer_dir: str
+    buffer_max_bytes: int
+    batched: bool
+    batch_size: int
+    language: str
+
+@dataclass(frozen=True)
+class LipSyncConfig:
+    landmark_predictor_path: str
+    dtw_band: int
+    method: str
+    max_offset: float
+    detect_interval: int
+    roi_margin: float
+    verify_interval: int
+    chunk_frames: int
+    cache_dir: str
+    cache_max_bytes: int
+
+@dataclass(frozen=True)
+class OutputConfig:
+    path: str
+
+@dataclass(frozen=True)
+class DiarizationConfig:
+    min_clusters: int
+    max_clusters: int
+
+@dataclass(frozen=True)
+class ProcessingConfig:
+    num_workers: int
+    threads_per_worker: int
+    detect_workers: int
+    queue_size: int
+
+@dataclass(frozen=True)
+class DatabaseConfig:
+    host: str
+    user: str
+    password: str
+    name: str
+    pool_size: int
+    port: int 
+
+@dataclass(frozen=True)
+class VideoConfig:
+    path: str
+    audio_path: str
+    fps: float
+
+@dataclass(frozen=True)
+class APIConfig:
+    key: str
+
+@dataclass(frozen=True)
+class Config:
+    FACE_RECOGNITION: FaceRecognitionConfig
+    AUDIO: AudioConfig
+    LIPSYNC: LipSyncConfig
+    DIARIZATION: DiarizationConfig
+    PROCESSING: ProcessingConfig
+    DATABASE: DatabaseConfig
+    VIDEO: VideoConfig
+    OUTPUT: OutputConfig
+    PARTICIPANTS: Dict[str, Tuple[str, str]]
+    SIDE_VIDEOS: Dict[str, str]
+    API: APIConfig
+    TEST: TestConfig
+    PERPLEXITY: PerplexityConfig
+
+def parse_csv_to_dict(raw_data: List[str], tuple_size: int) -> Dict[str, Tuple[str, ...]]:
+    result = {}
+    for i in range(0, len(raw_data), tuple_size):
+        if i + tuple_size <= len(raw_data):
+            key = raw_data[i]
+            values = tuple(raw_data[i+1:i+tuple_size])
+            result[key] = values
+    return result
+
+def validate_paths(*paths):
+    for path in paths:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Path does not exist: {path}")
+
+def load_config() -> Config:
+    try:
+        participants_raw = config('PARTICIPANTS', cast=Csv())
+        side_videos_raw = config('SIDE_VIDEOS', cast=Csv())
+
+        participants = parse_csv_to_dict(participants_raw, 3)
+        side_videos = parse_csv_to_dict(side_videos_raw, 2)
+
+        landmark_predictor_path = config('LANDMARK_PREDICTOR_PATH')
+        video_path = config('VIDEO_PATH')
+        video_audio_path = config('VIDEO_AUDIO_PATH')
+        output_path = config('OUTPUT_PATH')
+
+        validate_paths(landmark_predictor_path, video_path, video_audio_path)
+
+        return Config(
+            FACE_RECOGNITION=FaceRecognitionConfig(
+                model=config('FACE_RECOGNITION_MODEL'),
+                distance_metric=config('FACE_RECOGNITION_DISTANCE_METRIC'),
+                index_backend=config('FACE_INDEX_BACKEND', default='exact'),
+                batch_size=config('FACE_EMBEDDING_BATCH_SIZE', cast=int, default=32),
+                enroll_stride=config('FACE_ENROLL_STRIDE', cast=int, default=5),
+                enroll_scene_threshold=config('FACE_ENROLL_SCENE_THRESHOLD', cast=float, default=0.05),
+                enroll_max_gap=config('FACE_ENROLL_MAX_GAP', cast=int, default=30),
+                enroll_stability_tolerance=config('FACE_ENROLL_STABILITY_TOLERANCE', cast=float, default=0.01),
+                enroll_stability_patience=config('FACE_ENROLL_STABILITY_PATIENCE', cast=int, default=0),
+                enroll_min_faces=config('FACE_ENROLL_MIN_FACES', cast=int, default=50),
+                track_iou_threshold=config('FACE_TRACK_IOU_THRESHOLD', cast=float, default=0.3),
+                track_max_misses=config('FACE_TRACK_MAX_MISSES', cast=int, default=5),
+                track_refresh_interval=config('FACE_TRACK_REFRESH_INTERVAL', cast=int, default=90),
+                gallery_dir=config('FACE_GALLERY_DIR', default=''),
+                prototypes=config('FACE_PROTOTYPES', cast=int, default=0),
+                prototype_radius_quantile=config('FACE_PROTOTYPE_RADIUS_QUANTILE', cast=float, default=0.99),
+                prototype_max_widen=config('FACE_PROTOTYPE_MAX_WIDEN', cast=float, default=1.25),
+                detection_scale=config('FACE_DETECTION_SCALE', cast=float, default=1.0),
+                detection_short_side=config('FACE_DETECTION_SHORT_SIDE', cast=int, default=0)
+            ),
+            AUDIO=AudioConfig(
+                whisper_model=config('WHISPER_MODEL'),
+                whisper_quantize=config('WHISPER_QUANTIZE', cast=bool, default=False),
+                streaming=config('AUDIO_STREAMING', cast=bool, default=False),
+                stream_window=config('AUDIO_STREAM_WINDOW', cast=float, default=30.0),
+                stream_overlap=config('AUDIO_STREAM_OVERLAP', cast=float, default=5.0),
+                vad=config('AUDIO_VAD', cast=bool, default=False),
+                vad_energy_margin_db=config('AUDIO_VAD_ENERGY_MARGIN_DB', cast=float, default=10.0),
+                vad_padding=config('AUDIO_VAD_PADDING', cast=float, default=0.2),
+                cache_dir=config('AUDIO_CACHE_DIR', default=''),
+                cache_max_bytes=config('AUDIO_CACHE_MAX_BYTES', cast=int, default=2 * 1024 ** 3),
+                buffer_dir=config('AUDIO_BUFFER_DIR', default=''),
+                buffer_max_bytes=config('AUDIO_BUFFER_MAX_BYTES', cast=int, default=8 * 1024 ** 3),
+                batched=config('AUDIO_BATCHED', cast=bool, default=False),
+                batch_size=config('AUDIO_BATCH_SIZE', cast=int, default=8),
+                language=config('AUDIO_LANGUAGE', default='')
+            ),
+            LIPSYNC=LipSyncConfig(
+                landmark_predictor_path=landmark_predictor_path,
+                dtw_band=config('LIPSYNC_DTW_BAND', cast=int, default=0),
+                method=config('LIPSYNC_METHOD', default='dtw'),
+                max_offset=config('LIPSYNC_MAX_OFFSET', cast=float, default=1.0),
+                detect_interval=config('LIPSYNC_DETECT_INTERVAL', cast=int, default=1),
+                roi_margin=config('LIPSYNC_ROI_MARGIN', cast=float, default=0.1),
+                verify_interval=config('LIPSYNC_VERIFY_INTERVAL', cast=int, default=5),
+                chunk_frames=config('LIPSYNC_CHUNK_FRAMES', cast=int, default=1500),
+                cache_dir=config('LIPSYNC_CACHE_DIR', default=''),
+                cache_max_bytes=config('LIPSYNC_CACHE_MAX_BYTES', cast=int, default=1024 ** 3)
+            ),
+            DIARIZATION=DiarizationConfig(
+                min_clusters=config('MIN_CLUSTERS', cast=int),
+                max_clusters=config('MAX_CLUSTERS', cast=int),
+            ),
+            PROCESSING=ProcessingConfig(
+                num_workers=config('NUM_WORKERS', cast=int),
+                threads_per_worker=config('THREADS_PER_WORKER', cast=int, default=0),
+                detect_workers=config('PIPELINE_DETECT_WORKERS', cast=int, default=2),
+                queue_size=config('PIPELINE_QUEUE_SIZE', cast=int, default=8)
+            ),
+            DATABASE=DatabaseConfig(
+                host=config('DB_HOST'),
+                user=config('DB_USER'),
+                password=config('DB_PASSWORD'),
+                name=config('DB_NAME'),
+                pool_size=config('DB_POOL_SIZE', cast=int),
+                port=config('DB_PORT', cast=int)  
+            ),
+            VIDEO=VideoConfig(
+                path=video_path,
+                audio_path=video_audio_path,
+                fps=config('VIDEO_FPS', cast=float)
+            ),
+            OUTPUT=OutputConfig(
+                path=output_path
+            ),
+            PARTICIPANTS=participants,
+            SIDE_VIDEOS=side_videos,
+            API=APIConfig(
+                key=config('API_KEY')
+            ),
+            TEST=TestConfig(
+                enabled=config('TEST_MODE_ENABLED', cast=bool, default=False),
+                start_time=config('TEST_START_TIME', cast=float, default=0.0),
+                end_time=config('TEST_END_TIME', cast=float, default=60.0),
+                target_person=config('TEST_TARGET_PERSON', default=''),
+                individual_video_path=config('TEST_INDIVIDUAL_VIDEO_PATH', default=''),
+                individual_audio_path=config('TEST_INDIVIDUAL_AUDIO_PATH', default=''),
+                side_video_path=config('TEST_SIDE_VIDEO_PATH', default=''),
+                full_video_path=config('TEST_FULL_VIDEO_PATH', default=''),
+                full_audio_path=config('TEST_FULL_AUDIO_PATH', default='')
+            ),
+            PERPLEXITY=PerplexityConfig(
+                api_key=config('PERPLEXITY_API_KEY'),
+                api_url=config('PERPLEXITY_API_URL', default="https://api.perplexity.ai/chat/completions")
+            ),
+        )
+    except Exception as e:
+        logger.error(f"Error loading configuration: {e}")
+        raise
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        config = load_config()
+        logger.info("Configuration loaded successfully")
+        logger.info(f"Number of participants: {len(config.PARTICIPANTS)}")
+        logger.info(f"Number of side videos: {len(config.SIDE_VIDEOS)}")
+    except Exception as e:
+        logger.error(f"Failed to load configuration: {e}")
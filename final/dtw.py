@@ -0,0 +1,108 @@
+import logging
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+logger = logging.getLogger(__name__)
+
+def band_bound(n: int, m: int, band: int) -> int:
+    """Sakoe-Chiba constraint |i*m - j*n| <= bound: about `band` cells either side of the diagonal.
+
+    The bound is scaled so sequences of different lengths keep a connected band
+    around the line from (0, 0) to (n, m); for equal lengths it is exactly |i - j| <= band.
+    A band of 0 leaves DTW unconstrained.
+    """
+    if band <= 0:
+        return n * m
+    return band * max(n, m)
+
+def dtw_naive(x: np.ndarray, y: np.ndarray) -> float:
+    """Reference O(n*m) time and memory DTW with absolute-difference cost."""
+    n, m = len(x), len(y)
+    dtw_matrix = np.zeros((n + 1, m + 1))
+    dtw_matrix[0, 1:] = np.inf
+    dtw_matrix[1:, 0] = np.inf
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            cost = abs(x[i - 1] - y[j - 1])
+            dtw_matrix[i, j] = cost + min(dtw_matrix[i - 1, j], dtw_matrix[i, j - 1], dtw_matrix[i - 1, j - 1])
+    return float(dtw_matrix[n, m])
+
+def _take(values: np.ndarray, lo: int, index: np.ndarray) -> np.ndarray:
+    """values[index - lo] with +inf outside the stored range."""
+    padded = np.concatenate(([np.inf], values, [np.inf]))
+    return padded[np.clip(index - lo + 1, 0, len(values) + 1)]
+
+def dtw_antidiagonal(x: np.ndarray, y: np.ndarray, band: int = 0) -> float:
+    """Banded DTW vectorized along anti-diagonals, keeping only the last two diagonals.
+
+    Every cell on diagonal i + j = d depends only on diagonals d - 1 and d - 2, so a
+    whole diagonal is one vectorized update and memory is O(band).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n, m = len(x), len(y)
+    if n == 0 or m == 0:
+        return float('inf')
+    bound = band_bound(n, m, band)
+    # Diagonal 0 holds only D[0, 0] = 0; diagonal 1 holds border cells, which are all +inf.
+    prev2, lo2 = np.zeros(1), 0
+    prev1, lo1 = np.zeros(0), 1
+    for d in range(2, n + m + 1):
+        # Cells (i, d - i) inside the matrix and inside |i*m - (d - i)*n| <= bound.
+        lo = max(1, d - m, -((bound - d * n) // (n + m)))
+        hi = min(n, d - 1, (d * n + bound) // (n + m))
+        if lo > hi:
+            current = np.zeros(0)
+        else:
+            i = np.arange(lo, hi + 1)
+            cost = np.abs(x[i - 1] - y[d - i - 1])
+            current = cost + np.minimum(np.minimum(_take(prev1, lo1, i - 1), _take(prev1, lo1, i)),
+                                        _take(prev2, lo2, i - 1))
+        prev2, lo2 = prev1, lo1
+        prev1, lo1 = current, lo
+    return float(_take(prev1, lo1, np.array([n]))[0])
+
+if njit is not None:
+    @njit(cache=True)
+    def _dtw_rows(x, y, bound):
+        n, m = len(x), len(y)
+        width = min(m, 2 * bound // n + 2) + 1
+        prev = np.full(width, np.inf)
+        current = np.full(width, np.inf)
+        prev[0] = 0.0
+        prev_lo, prev_hi = 0, 0
+        for i in range(1, n + 1):
+            lo = max(1, -((bound - i * m) // n))
+            hi = min(m, (i * m + bound) // n)
+            for j in range(lo, hi + 1):
+                best = np.inf
+                if prev_lo <= j <= prev_hi:
+                    best = prev[j - prev_lo]
+                if prev_lo <= j - 1 <= prev_hi and prev[j - 1 - prev_lo] < best:
+                    best = prev[j - 1 - prev_lo]
+                if j - 1 >= lo and current[j - 1 - lo] < best:
+                    best = current[j - 1 - lo]
+                current[j - lo] = abs(x[i - 1] - y[j - 1]) + best
+            prev, current = current, prev
+            prev_lo, prev_hi = lo, hi
+        if prev_lo <= m <= prev_hi:
+            return prev[m - prev_lo]
+        return np.inf
+
+def dtw_distance(x: np.ndarray, y: np.ndarray, band: int = 0, compiled: bool = True) -> float:
+    """DTW distance between two 1-D sequences with an optional Sakoe-Chiba band.
+
+    Uses a numba-compiled rolling-row kernel when numba is installed and `compiled`
+    is set, otherwise the vectorized anti-diagonal version; both use O(band) memory.
+    """
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    y = np.ascontiguousarray(y, dtype=np.float64)
+    if len(x) == 0 or len(y) == 0:
+        return float('inf')
+    if compiled and njit is not None:
+        return float(_dtw_rows(x, y, band_bound(len(x), len(y), band)))
+    return dtw_antidiagonal(x, y, band)
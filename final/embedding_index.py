@@ -0,0 +1,161 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingIndex:
+    """Labelled embedding gallery stored as one contiguous float32 matrix.
+
+    For the cosine metric rows are L2-normalized on insert, so a lookup is a single
+    matrix multiply plus argmax. "euclidean_l2" normalizes rows and queries the same
+    way and then reports their Euclidean distance, as DeepFace defines it. Rows may
+    carry a radius (for prototypes standing in for a cluster of embeddings),
+    returned with each match; plain embeddings have a radius of 0. The optional
+    'faiss' backend keeps an HNSW graph alongside the matrix for approximate
+    search over very large galleries.
+    """
+
+    def __init__(self, metric: str = "cosine", backend: str = "exact", initial_capacity: int = 1024):
+        if metric not in ("cosine", "euclidean", "euclidean_l2"):
+            raise ValueError(f"Unsupported distance metric: {metric}")
+        if backend not in ("exact", "faiss"):
+            raise ValueError(f"Unsupported index backend: {backend}")
+        if backend == "faiss" and faiss is None:
+            raise ImportError("The 'faiss' index backend requires the faiss package")
+        self.metric = metric
+        self.backend = backend
+        self.initial_capacity = initial_capacity
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._sq_norms = np.zeros(0, dtype=np.float32)
+        self._radii = np.zeros(0, dtype=np.float32)
+        self._labels = np.zeros(0, dtype=np.int32)
+        self._size = 0
+        self._names: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+        self._ann = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def dim(self) -> int:
+        return self._vectors.shape[1]
+
+    @property
+    def names(self) -> List[str]:
+        present = np.unique(self._labels[:self._size])
+        return [self._names[label] for label in present]
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors[:self._size]
+
+    @property
+    def labels(self) -> np.ndarray:
+        return self._labels[:self._size]
+
+    def _prepare(self, embeddings: np.ndarray) -> np.ndarray:
+        embeddings = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+        if self.metric in ("cosine", "euclidean_l2"):
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.maximum(norms, 1e-12)
+        return np.ascontiguousarray(embeddings)
+
+    def _reserve(self, count: int, dim: int) -> None:
+        if self._vectors.shape[1] not in (0, dim):
+            raise ValueError(f"Embedding dimension {dim} does not match index dimension {self._vectors.shape[1]}")
+        needed = self._size + count
+        if needed <= self._vectors.shape[0]:
+            return
+        capacity = max(needed, 2 * self._vectors.shape[0], self.initial_capacity)
+        vectors = np.zeros((capacity, dim), dtype=np.float32)
+        if self._size:
+            vectors[:self._size] = self._vectors[:self._size]
+        sq_norms = np.zeros(capacity, dtype=np.float32)
+        sq_norms[:self._size] = self._sq_norms[:self._size]
+        radii = np.zeros(capacity, dtype=np.float32)
+        radii[:self._size] = self._radii[:self._size]
+        labels = np.zeros(capacity, dtype=np.int32)
+        labels[:self._size] = self._labels[:self._size]
+        self._vectors, self._sq_norms, self._radii, self._labels = vectors, sq_norms, radii, labels
+
+    def add(self, name: str, embeddings: np.ndarray, radii: Optional[np.ndarray] = None) -> None:
+        """Adds one embedding or a (n, dim) batch of embeddings under `name`, optionally with per-row radii."""
+        embeddings = self._prepare(embeddings)
+        if embeddings.size == 0:
+            return
+        count, dim = embeddings.shape
+        self._reserve(count, dim)
+        label = self._name_ids.setdefault(name, len(self._names))
+        if label == len(self._names):
+            self._names.append(name)
+        end = self._size + count
+        self._vectors[self._size:end] = embeddings
+        self._sq_norms[self._size:end] = np.einsum('ij,ij->i', embeddings, embeddings)
+        self._radii[self._size:end] = 0.0 if radii is None else radii
+        self._labels[self._size:end] = label
+        self._size = end
+        if self._ann is not None:
+            self._ann.add(embeddings)
+
+    def get(self, name: str) -> np.ndarray:
+        if name not in self._name_ids:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return self.vectors[self.labels == self._name_ids[name]]
+
+    def remove(self, name: str) -> np.ndarray:
+        """Removes and returns every embedding stored under `name`."""
+        removed = self.get(name)
+        if len(removed):
+            keep = self.labels != self._name_ids[name]
+            kept = int(keep.sum())
+            self._vectors[:kept] = self.vectors[keep]
+            self._sq_norms[:kept] = self._sq_norms[:self._size][keep]
+            self._radii[:kept] = self._radii[:self._size][keep]
+            self._labels[:kept] = self.labels[keep]
+            self._size = kept
+            self._ann = None
+        return removed
+
+    def _ann_index(self):
+        if self._ann is None:
+            faiss_metric = faiss.METRIC_INNER_PRODUCT if self.metric == "cosine" else faiss.METRIC_L2
+            self._ann = faiss.IndexHNSWFlat(self.dim, 32, faiss_metric)
+            if self._size:
+                logger.info(f"Building HNSW index over {self._size} embeddings")
+                self._ann.add(self.vectors)
+        return self._ann
+
+    def search(self, queries: np.ndarray) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Nearest stored embedding for each query row: (names, distances, radii of the matched rows)."""
+        queries = self._prepare(queries)
+        if self._size == 0:
+            empty = np.full(len(queries), np.inf, dtype=np.float32)
+            return ["Unknown"] * len(queries), empty, empty
+
+        if self.backend == "faiss":
+            scores, indices = self._ann_index().search(queries, 1)
+            indices, scores = indices[:, 0], scores[:, 0]
+            if self.metric == "cosine":
+                distances = 1.0 - scores
+            else:
+                distances = np.sqrt(np.maximum(scores, 0.0))
+        else:
+            similarity = queries @ self.vectors.T
+            if self.metric == "cosine":
+                indices = np.argmax(similarity, axis=1)
+                distances = 1.0 - similarity[np.arange(len(queries)), indices]
+            else:
+                sq_distances = self._sq_norms[:self._size][None, :] - 2.0 * similarity
+                indices = np.argmin(sq_distances, axis=1)
+                query_sq_norms = np.einsum('ij,ij->i', queries, queries)
+                best = sq_distances[np.arange(len(queries)), indices] + query_sq_norms
+                distances = np.sqrt(np.maximum(best, 0.0))
+        names = [self._names[label] for label in self.labels[indices]]
+        return names, distances.astype(np.float32), self._radii[:self._size][indices]
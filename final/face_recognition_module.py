@@ -1,88 +1,252 @@
-import numpy as np
-import torch
-from deepface import DeepFace
-from typing import List, Dict, Union, Optional
-import logging
-import cv2
-from deepface.modules import verification
-
-logger = logging.getLogger(__name__)
-
-class FaceRecognizer:
-    def __init__(self, model_name: str = "Facenet512", distance_metric: str = "cosine", threshold: float = 0.6):
-        logger.info(f"Initializing FaceRecognizer with model: {model_name}")
-        self.model = DeepFace.build_model(model_name)
-        self.distance_metric = distance_metric
-        self.threshold = threshold
-        self.face_embeddings: Dict[str, List[np.ndarray]] = {}
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        logger.info(f"Using device: {self.device}")
-        if isinstance(self.model, torch.nn.Module):
-            self.model.to(self.device)
-
-    async def process_individual_video(self, video_path: str, person_name: str):
-        logger.info(f"Processing video for {person_name}: {video_path}")
-        cap = cv2.VideoCapture(video_path)
-        frame_count = 0
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            face_locations = self.face_locations(frame)
-            for face in face_locations:
-                embedding = self.get_embedding(face)
-                if embedding is not None:
-                    self.add_face(person_name, embedding)
-            frame_count += 1
-            if frame_count % 100 == 0:
-                logger.info(f"Processed {frame_count} frames for {person_name}")
-        cap.release()
-        logger.info(f"Completed processing video for {person_name}, total frames: {frame_count}")
-
-    def add_face(self, name: str, embedding: np.ndarray):
-        if name not in self.face_embeddings:
-            self.face_embeddings[name] = []
-        self.face_embeddings[name].append(embedding)
-
-    def get_embedding(self, face_image: np.ndarray) -> Optional[np.ndarray]:
-        try:
-            if isinstance(self.model, torch.nn.Module):
-                face_tensor = torch.from_numpy(face_image).float().unsqueeze(0).to(self.device)
-                with torch.no_grad():
-                    embedding = self.model(face_tensor).cpu().numpy()
-            else:
-                embedding = DeepFace.represent(face_image, model_name="Facenet512", enforce_detection=False)
-            return embedding[0] if isinstance(embedding, list) else embedding
-        except Exception as e:
-            logger.error(f"Error getting face embedding: {e}")
-            return None
-
-    def face_locations(self, image: np.ndarray) -> List[np.ndarray]:
-        faces = DeepFace.extract_faces(image, enforce_detection=False, align=False)
-        return [face['face'] for face in faces]
-
-    def calculate_distance(self, embedding1: np.ndarray, embedding2: np.ndarray) -> float:
-        if self.distance_metric == "cosine":
-            return verification.find_cosine_distance(embedding1, embedding2)
-        return verification.find_euclidean_distance(embedding1, embedding2)
-
-    async def recognize_face(self, face_image: np.ndarray) -> str:
-        logger.info("Recognizing face")
-        embedding = self.get_embedding(face_image)
-        if embedding is None:
-            logger.warning("Failed to get embedding for face")
-            return "Unknown"
-        
-        min_distance = float('inf')
-        recognized_name = "Unknown"
-        for name, stored_embeddings in self.face_embeddings.items():
-            for stored_embedding in stored_embeddings:
-                distance = self.calculate_distance(embedding, stored_embedding)
-                if distance < min_distance:
-                    min_distance = distance
-                    recognized_name = name
-        
-        result = recognized_name if min_distance < self.threshold else "Unknown"
-        logger.info(f"Face recognized as: {result}")
-        return result
\ No newline at end of file
+import asyncio
+import numpy as np
+import torch
+from deepface import DeepFace
+from typing import List, Dict, Union, Optional, Tuple, Iterable, Iterator
+import logging
+import cv2
+from dataclasses import asdict
+from deepface.modules import verification, preprocessing
+from model_registry import get_registry
+from embedding_index import EmbeddingIndex
+from frame_sampling import EnrollmentSampler, EnrollmentSampling, EnrollmentStats
+from face_tracking import Box, FaceTracker
+from prototypes import acceptance_limits, compress_embeddings
+from pipeline import Pipeline
+
+logger = logging.getLogger(__name__)
+
+class FaceRecognizer:
+    def __init__(self, model_name: str = "Facenet512", distance_metric: str = "cosine", threshold: float = 0.6,
+                 index_backend: str = "exact", batch_size: int = 32,
+                 sampling: EnrollmentSampling = EnrollmentSampling(), prototypes: int = 0,
+                 radius_quantile: float = 0.99, max_widen: float = 1.25, detection_scale: float = 1.0,
+                 detection_short_side: int = 0, detect_workers: int = 2, queue_size: int = 8):
+        logger.info(f"Initializing FaceRecognizer with model: {model_name}")
+        self.model_name = model_name
+        self.distance_metric = distance_metric
+        self.threshold = threshold
+        self.batch_size = batch_size
+        self.sampling = sampling
+        self.prototypes = prototypes
+        self.radius_quantile = radius_quantile
+        self.max_widen = max_widen
+        self.detection_scale = detection_scale
+        self.detection_short_side = detection_short_side
+        self.detect_workers = detect_workers
+        self.queue_size = queue_size
+        self.gallery = EmbeddingIndex(distance_metric, index_backend)
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        logger.info(f"Using device: {self.device}")
+
+    @property
+    def model(self):
+        return get_registry().face_model(self.model_name, self.device)
+
+    def settings(self) -> Dict:
+        """Settings that determine which embeddings enrollment produces."""
+        return {'model': self.model_name, 'distance_metric': self.distance_metric, 'sampling': asdict(self.sampling),
+                'detection_scale': self.detection_scale, 'detection_short_side': self.detection_short_side}
+
+    async def process_individual_video(self, video_path: str, person_name: str):
+        await asyncio.to_thread(self.enroll_from_video, video_path, person_name)
+        if self.prototypes:
+            self.add_person(person_name, self.gallery.remove(person_name))
+
+    def sampled_frames(self, video_path: str, sampler: EnrollmentSampler) -> Iterator[Tuple[int, np.ndarray]]:
+        """Decodes the frames the sampler keeps, as (index, RGB frame)."""
+        cap = cv2.VideoCapture(video_path)
+        try:
+            while True:
+                frame_index = sampler.stats.frames_read
+                if not sampler.is_candidate(frame_index):
+                    # grab() advances the stream without converting the frame.
+                    if not cap.grab():
+                        break
+                    sampler.stats.frames_read += 1
+                    continue
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                sampler.stats.frames_read += 1
+                if sampler.should_sample(frame_index, frame):
+                    yield frame_index, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        finally:
+            cap.release()
+
+    def face_pipeline(self, frames: Iterable[Tuple[int, np.ndarray]], name: str = "faces") -> Pipeline:
+        """Pipeline from (index, RGB frame) pairs to (index, (n, dim) embeddings) for frames with faces.
+
+        Decoding, detection (`detect_workers` threads) and batched embedding overlap.
+        """
+        def detect(item):
+            frame_index, frame = item
+            crops = self.face_locations(frame)
+            return (frame_index, crops) if crops else None
+
+        def embed(items):
+            embeddings = self.get_embeddings([crop for _, crops in items for crop in crops])
+            if embeddings is None:
+                return []
+            results, offset = [], 0
+            for frame_index, crops in items:
+                results.append((frame_index, embeddings[offset:offset + len(crops)]))
+                offset += len(crops)
+            return results
+
+        return (Pipeline(frames, queue_size=self.queue_size, name=name)
+                .add_stage("detect", detect, workers=self.detect_workers)
+                .add_stage("embed", embed, batch_size=self.batch_size))
+
+    def enroll_from_video(self, video_path: str, person_name: str) -> EnrollmentStats:
+        logger.info(f"Processing video for {person_name}: {video_path}")
+        sampler = EnrollmentSampler(self.sampling)
+        with self.face_pipeline(self.sampled_frames(video_path, sampler), f"enrollment of {person_name}") as pipeline:
+            for frame_index, embeddings in pipeline:
+                self.add_face(person_name, embeddings)
+                if sampler.update(embeddings):
+                    logger.info(f"Embeddings for {person_name} stabilized after {frame_index + 1} frames")
+                    break
+        pipeline.log_stats()
+        stats = sampler.stats
+        logger.info(f"Completed processing video for {person_name}, total frames: {stats.frames_read}, "
+                    f"sampled {stats.frames_sampled}, skipped {stats.frames_skipped} "
+                    f"({stats.skipped_stride} by stride, {stats.skipped_unchanged} unchanged), "
+                    f"{stats.faces_embedded} faces, {pipeline.throughput():.1f} sampled frames/s")
+        return stats
+
+    @property
+    def face_embeddings(self) -> Dict[str, np.ndarray]:
+        return {name: self.gallery.get(name) for name in self.gallery.names}
+
+    def add_face(self, name: str, embedding: np.ndarray, radii: Optional[np.ndarray] = None):
+        self.gallery.add(name, embedding, radii)
+
+    def add_person(self, name: str, embeddings: np.ndarray):
+        """Enrolls a person's embeddings, compressed to `prototypes` k-means prototypes when enabled."""
+        if self.prototypes and len(embeddings) > self.prototypes:
+            prototypes, radii = compress_embeddings(embeddings, self.prototypes, self.distance_metric, self.radius_quantile)
+            logger.info(f"Compressed {len(embeddings)} embeddings for {name} to {len(prototypes)} prototypes")
+            self.add_face(name, prototypes, radii)
+        else:
+            self.add_face(name, embeddings)
+
+    @property
+    def input_size(self) -> Tuple[int, int]:
+        return tuple(getattr(self.model, 'input_shape', (160, 160)))
+
+    def preprocess_faces(self, face_images: List[np.ndarray]) -> np.ndarray:
+        """Resizes RGB face crops to the model input and stacks them into one (n, h, w, 3) batch."""
+        # Same steps DeepFace.represent applies to a single face: BGR order, padded resize, base normalization.
+        height, width = self.input_size
+        batch = np.concatenate([
+            preprocessing.resize_image(np.ascontiguousarray(face[:, :, ::-1]), (width, height))
+            for face in face_images
+        ])
+        return np.ascontiguousarray(preprocessing.normalize_input(batch, normalization="base"), dtype=np.float32)
+
+    def get_embeddings(self, face_images: List[np.ndarray]) -> Optional[np.ndarray]:
+        """Embeds face crops in batches of `batch_size` with one forward pass each; returns (n, dim)."""
+        if not face_images:
+            return None
+        try:
+            model = self.model
+            embeddings = []
+            for first in range(0, len(face_images), self.batch_size):
+                batch = self.preprocess_faces(face_images[first:first + self.batch_size])
+                if isinstance(model, torch.nn.Module):
+                    face_tensor = torch.from_numpy(batch).to(self.device)
+                    with torch.no_grad():
+                        embeddings.append(model(face_tensor).cpu().numpy())
+                else:
+                    embeddings.append(np.asarray(model.model(batch, training=False)))
+            return np.concatenate(embeddings).astype(np.float32)
+        except Exception as e:
+            logger.error(f"Error getting face embeddings: {e}")
+            return None
+
+    def get_embedding(self, face_image: np.ndarray) -> Optional[np.ndarray]:
+        embeddings = self.get_embeddings([face_image])
+        return embeddings[0] if embeddings is not None else None
+
+    def face_locations(self, image: np.ndarray) -> List[np.ndarray]:
+        """Full-resolution face crops, whatever resolution detection ran at."""
+        return [image[y:y + h, x:x + w] for x, y, w, h in self.detect_faces(image)]
+
+    def detection_factor(self, image: np.ndarray) -> float:
+        """Downscale factor for detection: `detection_short_side` if set, otherwise `detection_scale`."""
+        if self.detection_short_side > 0:
+            return min(1.0, self.detection_short_side / min(image.shape[:2]))
+        return min(1.0, self.detection_scale)
+
+    def detect_faces(self, image: np.ndarray) -> List[Box]:
+        """Face boxes as (x, y, w, h) in image coordinates, detected on a downscaled copy when configured."""
+        factor = self.detection_factor(image)
+        small = image if factor >= 1.0 else cv2.resize(image, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+        faces = DeepFace.extract_faces(small, enforce_detection=False, align=False)
+        height, width = image.shape[:2]
+        boxes = []
+        for face in faces:
+            area = face['facial_area']
+            # With enforce_detection=False a frame without faces comes back as one whole-frame "face".
+            if face.get('confidence', 1) <= 0:
+                continue
+            x, y = max(int(area['x'] / factor), 0), max(int(area['y'] / factor), 0)
+            w = min(int(round(area['w'] / factor)), width - x)
+            h = min(int(round(area['h'] / factor)), height - y)
+            if w > 0 and h > 0:
+                boxes.append((x, y, w, h))
+        return boxes
+
+    def calculate_distance(self, embedding1: np.ndarray, embedding2: np.ndarray) -> float:
+        if self.distance_metric == "cosine":
+            return verification.find_cosine_distance(embedding1, embedding2)
+        if self.distance_metric == "euclidean_l2":
+            return verification.find_euclidean_distance(verification.l2_normalize(embedding1),
+                                                        verification.l2_normalize(embedding2))
+        return verification.find_euclidean_distance(embedding1, embedding2)
+
+    def match_embeddings(self, embeddings: np.ndarray) -> List[str]:
+        """Names of the nearest enrolled faces for a batch of embeddings, or "Unknown" beyond the threshold.
+
+        A prototype's radius can widen acceptance beyond the threshold, by at most a
+        factor of `max_widen`; see `acceptance_limits`.
+        """
+        names, distances, radii = self.gallery.search(embeddings)
+        limits = acceptance_limits(radii, self.threshold, self.max_widen)
+        return [name if distance < limit else "Unknown" for name, distance, limit in zip(names, distances, limits)]
+
+    async def recognize_face(self, face_image: np.ndarray) -> str:
+        logger.info("Recognizing face")
+        embedding = self.get_embedding(face_image)
+        if embedding is None:
+            logger.warning("Failed to get embedding for face")
+            return "Unknown"
+
+        result = self.match_embeddings(embedding)[0]
+        logger.info(f"Face recognized as: {result}")
+        return result
+
+    async def recognize_tracked(self, frame: np.ndarray, boxes: List[Box], tracker: FaceTracker,
+                                frame_index: int) -> List[Tuple[Box, str]]:
+        """Names for the (x, y, w, h) boxes in a BGR frame, embedding only tracks without a fresh identity."""
+        tracks = tracker.update(boxes, frame_index)
+        stale = [track for track in tracks if tracker.needs_embedding(track, frame_index)]
+        if stale:
+            crops = []
+            for track in stale:
+                x, y, w, h = (int(v) for v in track.box)
+                crops.append(cv2.cvtColor(frame[max(y, 0):y + h, max(x, 0):x + w], cv2.COLOR_BGR2RGB))
+            for track, name in zip(stale, await self.recognize_faces(crops)):
+                tracker.set_identity(track, name, frame_index)
+        return [(box, track.name) for box, track in zip(boxes, tracks)]
+
+    async def recognize_faces(self, face_images: List[np.ndarray]) -> List[str]:
+        """Recognizes several faces with one batched embedding pass and one index search."""
+        if not face_images:
+            return []
+        embeddings = await asyncio.to_thread(self.get_embeddings, face_images)
+        if embeddings is None:
+            logger.warning("Failed to get embeddings for faces")
+            return ["Unknown"] * len(face_images)
+        return self.match_embeddings(embeddings)
@@ -0,0 +1,105 @@
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Box = Tuple[int, int, int, int]
+
+@dataclass
+class FaceTrack:
+    track_id: int
+    box: np.ndarray
+    last_seen: int
+    name: Optional[str] = None
+    last_embedded: int = -1
+    misses: int = 0
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Pairwise intersection-over-union of (n, 4) and (m, 4) arrays of (x, y, w, h) boxes."""
+    a = boxes_a[:, None, :].astype(np.float64)
+    b = boxes_b[None, :, :].astype(np.float64)
+    overlap_w = np.clip(np.minimum(a[..., 0] + a[..., 2], b[..., 0] + b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    overlap_h = np.clip(np.minimum(a[..., 1] + a[..., 3], b[..., 1] + b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    intersection = overlap_w * overlap_h
+    union = a[..., 2] * a[..., 3] + b[..., 2] * b[..., 3] - intersection
+    return intersection / np.maximum(union, 1e-9)
+
+class FaceTracker:
+    """Greedy IoU/centroid tracker that keeps one cached identity per face track.
+
+    Boxes are matched to live tracks by IoU first and then by centroid distance
+    (relative to the face size) for fast movers. A track needs a new embedding when
+    it is new, when it has no identity yet, or every `refresh_interval` frames; a
+    face lost for more than `max_misses` frames comes back as a new track.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, centroid_threshold: float = 0.5, max_misses: int = 5,
+                 refresh_interval: int = 90):
+        self.iou_threshold = iou_threshold
+        self.centroid_threshold = centroid_threshold
+        self.max_misses = max_misses
+        self.refresh_interval = refresh_interval
+        self.tracks: List[FaceTrack] = []
+        self.faces_seen = 0
+        self.embeddings_requested = 0
+        self._next_id = 0
+
+    def _match(self, boxes: np.ndarray) -> List[Optional[int]]:
+        """Index of the matched track for each box, or None."""
+        matches: List[Optional[int]] = [None] * len(boxes)
+        if not self.tracks or not len(boxes):
+            return matches
+        track_boxes = np.stack([track.box for track in self.tracks])
+        iou = iou_matrix(boxes, track_boxes)
+        centers = boxes[:, :2] + boxes[:, 2:] / 2
+        track_centers = track_boxes[:, :2] + track_boxes[:, 2:] / 2
+        scale = np.maximum(np.sqrt(boxes[:, 2:3] * boxes[:, 3:4]), 1.0)
+        centroid = np.linalg.norm(centers[:, None, :] - track_centers[None, :, :], axis=2) / scale
+
+        used_boxes, used_tracks = set(), set()
+        for scores, threshold in ((iou, self.iou_threshold), (-centroid, -self.centroid_threshold)):
+            order = np.dstack(np.unravel_index(np.argsort(-scores, axis=None), scores.shape))[0]
+            for box_index, track_index in order:
+                if scores[box_index, track_index] < threshold:
+                    break
+                if box_index in used_boxes or track_index in used_tracks:
+                    continue
+                matches[box_index] = track_index
+                used_boxes.add(box_index)
+                used_tracks.add(track_index)
+        return matches
+
+    def update(self, boxes: Sequence[Box], frame_index: int) -> List[FaceTrack]:
+        """Assigns each detected (x, y, w, h) box to a track, in the order given."""
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        matches = self._match(boxes)
+        assigned: List[FaceTrack] = []
+        for box, track_index in zip(boxes, matches):
+            if track_index is None:
+                track = FaceTrack(self._next_id, box, frame_index)
+                self._next_id += 1
+                self.tracks.append(track)
+            else:
+                track = self.tracks[track_index]
+                track.box, track.last_seen, track.misses = box, frame_index, 0
+            assigned.append(track)
+        for track in self.tracks:
+            if track.last_seen != frame_index:
+                track.misses += 1
+        self.tracks = [track for track in self.tracks if track.misses <= self.max_misses]
+        self.faces_seen += len(assigned)
+        return assigned
+
+    def needs_embedding(self, track: FaceTrack, frame_index: int) -> bool:
+        return track.name is None or frame_index - track.last_embedded >= self.refresh_interval
+
+    def set_identity(self, track: FaceTrack, name: str, frame_index: int) -> None:
+        track.name = name
+        track.last_embedded = frame_index
+        self.embeddings_requested += 1
+
+    def log_stats(self, label: str) -> None:
+        logger.info(f"Face tracking for {label}: {self.embeddings_requested} embeddings for "
+                    f"{self.faces_seen} detected faces, {self._next_id} tracks")
@@ -0,0 +1,158 @@
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import numpy as np
+import librosa
+import scipy.fft
+from audio_buffer import get_audio_buffer
+from cache_utils import cache_key, evict_lru, touch
+
+logger = logging.getLogger(__name__)
+
+class FeatureEngine:
+    """Computes one log-mel spectrogram per track and derives every MFCC/delta variant from it.
+
+    Settings match librosa.feature.mfcc defaults, so derived features equal what
+    librosa would compute on the same audio.
+    """
+    LOG_MEL_SUFFIX = '.logmel.npy'
+
+    def __init__(self, sr: int = 16000, n_fft: int = 2048, hop_length: int = 512, n_mels: int = 128,
+                 batch_frames: int = 2048, max_tracks: int = 8):
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.n_mels = n_mels
+        self.batch_frames = batch_frames
+        self.max_tracks = max_tracks
+        self._window = librosa.filters.get_window('hann', n_fft, fftbins=True).astype(np.float32)[:, None]
+        self._mel_basis = librosa.filters.mel(sr=sr, n_fft=n_fft, n_mels=n_mels).astype(np.float32)
+        self._tracks: "OrderedDict[str, Dict[Tuple, np.ndarray]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    @property
+    def frames_per_second(self) -> float:
+        return self.sr / self.hop_length
+
+    def time_to_frame(self, seconds: float) -> int:
+        return int(round(seconds * self.frames_per_second))
+
+    def frame_to_time(self, frame: int) -> float:
+        return frame / self.frames_per_second
+
+    def settings(self) -> Dict:
+        return {'sr': self.sr, 'n_fft': self.n_fft, 'hop_length': self.hop_length, 'n_mels': self.n_mels}
+
+    def mel_power(self, audio: np.ndarray) -> np.ndarray:
+        """Mel power spectrogram with centered frames, computed a batch of frames at a time."""
+        pad = self.n_fft // 2
+        n_frames = 1 + len(audio) // self.hop_length
+        mel = np.empty((self.n_mels, n_frames), dtype=np.float32)
+        for first in range(0, n_frames, self.batch_frames):
+            last = min(first + self.batch_frames, n_frames)
+            # Zero-fill samples beyond either end instead of padding (and copying) the whole track.
+            begin = first * self.hop_length - pad
+            end = (last - 1) * self.hop_length - pad + self.n_fft
+            chunk = np.zeros(end - begin, dtype=np.float32)
+            src_begin, src_end = max(begin, 0), min(end, len(audio))
+            if src_end > src_begin:
+                chunk[src_begin - begin:src_end - begin] = audio[src_begin:src_end]
+            frames = librosa.util.frame(chunk, frame_length=self.n_fft, hop_length=self.hop_length)
+            spectrum = np.fft.rfft(frames * self._window, axis=0)
+            power = spectrum.real ** 2 + spectrum.imag ** 2
+            mel[:, first:last] = self._mel_basis @ power
+        return mel
+
+    def _track(self, track: str) -> Dict[Tuple, np.ndarray]:
+        with self._lock:
+            if track in self._tracks:
+                self._tracks.move_to_end(track)
+                return self._tracks[track]
+            logger.info(f"Computing mel spectrogram for {track}")
+            with get_audio_buffer().open(track) as audio:
+                features = {('log_mel',): librosa.power_to_db(self.mel_power(audio))}
+            self._tracks[track] = features
+            while len(self._tracks) > self.max_tracks:
+                self._tracks.popitem(last=False)
+            return features
+
+    def log_mel_file(self, track: str) -> str:
+        """Writes the track's log-mel spectrogram next to the audio buffer, once, and returns its path.
+
+        Other processes pass the path to `attach_log_mel` and memory-map the file
+        instead of recomputing the spectrogram.
+        """
+        audio_buffer = get_audio_buffer()
+        stat = os.stat(track)
+        key = cache_key(path=os.path.abspath(track), size=stat.st_size, mtime=stat.st_mtime_ns, **self.settings())
+        path = os.path.join(audio_buffer.cache_dir, key + self.LOG_MEL_SUFFIX)
+        if os.path.exists(path):
+            touch(path)
+            return path
+        log_mel = self._track(track)[('log_mel',)]
+        fd, tmp_path = tempfile.mkstemp(dir=audio_buffer.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, log_mel)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        evict_lru(audio_buffer.cache_dir, audio_buffer.max_bytes, self.LOG_MEL_SUFFIX, keep=[path])
+        return path
+
+    def attach_log_mel(self, track: str, path: str) -> None:
+        """Uses a log-mel file written by `log_mel_file` for `track` unless it is already loaded."""
+        with self._lock:
+            if track in self._tracks:
+                return
+            logger.info(f"Memory-mapping mel spectrogram for {track} from {path}")
+            self._tracks[track] = {('log_mel',): np.load(path, mmap_mode='r')}
+            while len(self._tracks) > self.max_tracks:
+                self._tracks.popitem(last=False)
+
+    def _derive(self, track: str, key: Tuple, compute) -> np.ndarray:
+        with self._lock:
+            features = self._track(track)
+            if key not in features:
+                features[key] = compute(features)
+            return features[key]
+
+    def _slice(self, features: np.ndarray, start_time: float, end_time: Optional[float]) -> np.ndarray:
+        start = self.time_to_frame(start_time)
+        end = self.time_to_frame(end_time) if end_time is not None else None
+        return features[:, start:end]
+
+    def log_mel(self, track: str, start_time: float = 0.0, end_time: Optional[float] = None) -> np.ndarray:
+        return self._slice(self._track(track)[('log_mel',)], start_time, end_time)
+
+    def mfcc(self, track: str, n_mfcc: int = 13, start_time: float = 0.0, end_time: Optional[float] = None) -> np.ndarray:
+        mfcc = self._derive(track, ('mfcc', n_mfcc), lambda features: self.mfcc_from_log_mel(features[('log_mel',)], n_mfcc))
+        return self._slice(mfcc, start_time, end_time)
+
+    def mfcc_with_deltas(self, track: str, n_mfcc: int = 13, start_time: float = 0.0,
+                         end_time: Optional[float] = None) -> np.ndarray:
+        """MFCCs stacked with their first and second order deltas."""
+        def compute(features):
+            mfcc = self.mfcc(track, n_mfcc)
+            return np.concatenate([mfcc, librosa.feature.delta(mfcc), librosa.feature.delta(mfcc, order=2)])
+        return self._slice(self._derive(track, ('mfcc_deltas', n_mfcc), compute), start_time, end_time)
+
+    def mfcc_from_log_mel(self, log_mel: np.ndarray, n_mfcc: int) -> np.ndarray:
+        return scipy.fft.dct(log_mel, axis=0, type=2, norm='ortho')[:n_mfcc]
+
+    def mfcc_from_audio(self, audio: np.ndarray, n_mfcc: int = 13) -> np.ndarray:
+        """Uncached MFCCs for audio that is not a whole track, such as a streaming window."""
+        return self.mfcc_from_log_mel(librosa.power_to_db(self.mel_power(audio)), n_mfcc)
+
+_engine: Optional[FeatureEngine] = None
+
+def get_feature_engine() -> FeatureEngine:
+    """Returns the process-wide feature engine."""
+    global _engine
+    if _engine is None:
+        _engine = FeatureEngine(sr=get_audio_buffer().sr)
+    return _engine
@@ -0,0 +1,43 @@
+import logging
+import os
+from typing import Dict, List
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def sidecar_path(json_path: str, key: str = 'mfcc') -> str:
+    return f"{os.path.splitext(json_path)[0]}.{key}.npy"
+
+def write_feature_sidecar(segments: List[Dict], json_path: str, key: str = 'mfcc') -> str:
+    """Moves each segment's (features, frames) array into one float16 .npy next to `json_path`.
+
+    The array is stored frame-major, so a segment's frames are contiguous rows.
+    Each segment keeps only a reference: {'file', 'offset', 'frames'}.
+    """
+    path = sidecar_path(json_path, key)
+    arrays = [np.asarray(segment[key]) for segment in segments if isinstance(segment.get(key), np.ndarray)]
+    n_features = arrays[0].shape[0] if arrays else 0
+    total_frames = sum(array.shape[1] for array in arrays)
+    sidecar = np.lib.format.open_memmap(path, mode='w+', dtype=np.float16, shape=(total_frames, n_features))
+    offset = 0
+    for segment in segments:
+        features = segment.get(key)
+        if not isinstance(features, np.ndarray):
+            continue
+        frames = features.shape[1]
+        sidecar[offset:offset + frames] = features.T
+        segment[key] = {'file': os.path.basename(path), 'offset': offset, 'frames': frames}
+        offset += frames
+    sidecar.flush()
+    del sidecar
+    logger.info(f"Wrote {total_frames} {key} frames for {len(arrays)} segments to {path}")
+    return path
+
+def load_feature_sidecar(json_path: str, key: str = 'mfcc') -> np.ndarray:
+    """Memory-maps the sidecar written for `json_path`."""
+    return np.load(sidecar_path(json_path, key), mmap_mode='r')
+
+def segment_features(sidecar: np.ndarray, segment: Dict, key: str = 'mfcc') -> np.ndarray:
+    """Returns a segment's features as (features, frames), matching the in-memory layout."""
+    reference = segment[key]
+    return sidecar[reference['offset']:reference['offset'] + reference['frames']].T
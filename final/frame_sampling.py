@@ -0,0 +1,96 @@
+import logging
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+import cv2
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class EnrollmentSampling:
+    stride: int = 5
+    scene_threshold: float = 0.05
+    max_gap: int = 30
+    stability_tolerance: float = 0.01
+    # Early stopping is opt-in: 0 keeps embedding every sampled frame to the end of the video.
+    stability_patience: int = 0
+    min_faces: int = 50
+
+@dataclass
+class EnrollmentStats:
+    frames_read: int = 0
+    frames_sampled: int = 0
+    skipped_stride: int = 0
+    skipped_unchanged: int = 0
+    faces_embedded: int = 0
+    stopped_early: bool = False
+
+    @property
+    def frames_skipped(self) -> int:
+        return self.skipped_stride + self.skipped_unchanged
+
+class EnrollmentSampler:
+    """Picks which enrollment frames to embed and detects when a person's embeddings have stabilized.
+
+    Only every `stride`-th frame is decoded. A decoded frame is kept when its colour
+    histogram differs from the last kept frame by more than `scene_threshold`
+    (Bhattacharyya distance), or when `max_gap` frames have passed since it.
+    With a positive `stability_patience`, enrollment can stop once at least
+    `min_faces` faces are embedded and the embedding centroid and spread changed by
+    less than `stability_tolerance` over the last `stability_patience` sampled frames.
+    """
+
+    def __init__(self, sampling: EnrollmentSampling):
+        self.sampling = sampling
+        self.stats = EnrollmentStats()
+        self._last_histogram: Optional[np.ndarray] = None
+        self._last_sampled = -sampling.max_gap
+        self._embedding_sum: Optional[np.ndarray] = None
+        self._centroid: Optional[np.ndarray] = None
+        self._spread = 0.0
+        self._stable_updates = 0
+
+    def is_candidate(self, frame_index: int) -> bool:
+        """Whether the frame falls on the stride; other frames can be grabbed without decoding."""
+        candidate = frame_index % max(1, self.sampling.stride) == 0
+        if not candidate:
+            self.stats.skipped_stride += 1
+        return candidate
+
+    def histogram(self, frame: np.ndarray) -> np.ndarray:
+        small = cv2.resize(frame, (64, 36), interpolation=cv2.INTER_AREA)
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+        histogram = cv2.calcHist([hsv], [0, 1], None, [16, 16], [0, 180, 0, 256])
+        return cv2.normalize(histogram, histogram)
+
+    def should_sample(self, frame_index: int, frame: np.ndarray) -> bool:
+        """Scene-change test for a decoded BGR frame; updates the reference frame when kept."""
+        histogram = self.histogram(frame)
+        changed = (self._last_histogram is None
+                   or frame_index - self._last_sampled >= self.sampling.max_gap
+                   or cv2.compareHist(self._last_histogram, histogram, cv2.HISTCMP_BHATTACHARYYA) > self.sampling.scene_threshold)
+        if not changed:
+            self.stats.skipped_unchanged += 1
+            return False
+        self._last_histogram = histogram
+        self._last_sampled = frame_index
+        self.stats.frames_sampled += 1
+        return True
+
+    def update(self, embeddings: np.ndarray) -> bool:
+        """Adds the face embeddings of one sampled frame; returns True once enrollment can stop."""
+        self.stats.faces_embedded += len(embeddings)
+        unit = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        self._embedding_sum = unit.sum(axis=0) if self._embedding_sum is None else self._embedding_sum + unit.sum(axis=0)
+        centroid = self._embedding_sum / self.stats.faces_embedded
+        # One minus the mean resultant length: 0 when every embedding points the same way.
+        spread = 1.0 - float(np.linalg.norm(centroid))
+        if self._centroid is not None:
+            shift = float(np.linalg.norm(centroid - self._centroid) / max(np.linalg.norm(self._centroid), 1e-12))
+            stable = shift < self.sampling.stability_tolerance and abs(spread - self._spread) < self.sampling.stability_tolerance
+            self._stable_updates = self._stable_updates + 1 if stable else 0
+        self._centroid, self._spread = centroid, spread
+        if (self.sampling.stability_patience > 0 and self.stats.faces_embedded >= self.sampling.min_faces
+                and self._stable_updates >= self.sampling.stability_patience):
+            self.stats.stopped_early = True
+        return self.stats.stopped_early
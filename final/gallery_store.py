@@ -0,0 +1,96 @@
+import json
+import logging
+import os
+import re
+import tempfile
+from typing import Dict, Optional
+import numpy as np
+from cache_utils import cache_key, file_digest
+
+logger = logging.getLogger(__name__)
+
+class GalleryStore:
+    """On-disk enrollment gallery: one .npy of embeddings per person plus a versioned JSON manifest.
+
+    Each entry is keyed by the hash of the source video and the recognizer settings,
+    so a person is re-enrolled only when their video or the settings change. Stored
+    embeddings are opened with memory mapping.
+    """
+
+    # 2: faces are cropped at full resolution from boxes found on a downscaled frame.
+    VERSION = 2
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+        os.makedirs(store_dir, exist_ok=True)
+        self.entries: Dict[str, Dict] = self._load_manifest()
+        logger.info(f"Enrollment gallery at {store_dir} with {len(self.entries)} people")
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        path = os.path.join(self.store_dir, self.MANIFEST)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable gallery manifest {path}: {e}")
+            return {}
+        if manifest.get('version') != self.VERSION:
+            logger.info(f"Ignoring gallery manifest version {manifest.get('version')}, expected {self.VERSION}")
+            return {}
+        return manifest.get('entries', {})
+
+    def _write_atomic(self, path: str, write) -> None:
+        # Write to a temporary file first so readers never see a partial file.
+        fd, tmp_path = tempfile.mkstemp(dir=self.store_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _save_manifest(self) -> None:
+        payload = json.dumps({'version': self.VERSION, 'entries': self.entries}, indent=2, sort_keys=True)
+        self._write_atomic(os.path.join(self.store_dir, self.MANIFEST), lambda f: f.write(payload.encode('utf-8')))
+
+    def key(self, video_path: str, settings: Dict) -> str:
+        return cache_key(video=file_digest(video_path), settings=settings)
+
+    def get(self, person_name: str, key: str) -> Optional[np.ndarray]:
+        """Stored embeddings for `person_name` if they were enrolled under `key`, memory-mapped."""
+        entry = self.entries.get(person_name)
+        if entry is None or entry['key'] != key:
+            return None
+        path = os.path.join(self.store_dir, entry['file'])
+        try:
+            embeddings = np.load(path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable gallery entry {path}: {e}")
+            return None
+        logger.info(f"Gallery hit for {person_name}: {len(embeddings)} embeddings")
+        return embeddings
+
+    def put(self, person_name: str, key: str, embeddings: np.ndarray) -> None:
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        safe_name = re.sub(r'[^\w.-]', '_', person_name)
+        filename = f"{safe_name}-{key[:16]}.npy"
+        try:
+            self._write_atomic(os.path.join(self.store_dir, filename), lambda f: np.save(f, embeddings))
+            previous = self.entries.get(person_name)
+            self.entries[person_name] = {'key': key, 'file': filename, 'count': len(embeddings),
+                                         'dim': int(embeddings.shape[1]) if embeddings.ndim == 2 else 0}
+            self._save_manifest()
+        except OSError as e:
+            logger.error(f"Error writing gallery entry for {person_name}: {e}")
+            return
+        if previous is not None and previous['file'] != filename:
+            try:
+                os.remove(os.path.join(self.store_dir, previous['file']))
+            except OSError as e:
+                logger.warning(f"Failed to remove stale gallery entry {previous['file']}: {e}")
+        logger.info(f"Stored {len(embeddings)} embeddings for {person_name} in the gallery")
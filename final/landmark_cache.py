@@ -0,0 +1,72 @@
+import logging
+import os
+import tempfile
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+from cache_utils import cache_key, evict_lru, file_digest, touch
+
+logger = logging.getLogger(__name__)
+
+class LandmarkCache:
+    """Per-frame lip landmarks and lip movement of video frame ranges, kept as memory-mappable .npy files.
+
+    Each entry is one float32 (n, 41) array: 40 landmark coordinates per frame followed
+    by that frame's movement, NaN where no lips were found. Entries are keyed by the
+    video's content hash, the frame range, the predictor file's hash and the extraction
+    settings, and evicted least recently used once the directory outgrows `max_bytes`.
+    """
+    SUFFIX = '.lips.npy'
+    # Bump whenever landmark extraction or the entry layout changes, to invalidate old entries.
+    VERSION = 1
+
+    def __init__(self, cache_dir: str, max_bytes: int = 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        os.makedirs(cache_dir, exist_ok=True)
+        logger.info(f"Landmark cache at {cache_dir} (limit: {max_bytes / 1024 ** 2:.0f} MB)")
+
+    def _digest(self, path: str) -> str:
+        """Content hash of a file, remembered while its size and mtime are unchanged."""
+        stat = os.stat(path)
+        memo = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        if memo not in self._digests:
+            self._digests[memo] = file_digest(path)
+        return self._digests[memo]
+
+    def key(self, video_path: str, start_frame: int, end_frame: int, predictor_path: str, settings: Dict[str, Any]) -> str:
+        return cache_key(version=self.VERSION, video=self._digest(video_path), start=start_frame, end=end_frame,
+                         predictor=self._digest(predictor_path), settings=settings)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + self.SUFFIX)
+
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(landmarks, movements) views of a memory-mapped entry, or None on a miss."""
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            entry = np.load(path, mmap_mode='r')
+        except Exception as e:
+            logger.warning(f"Discarding unreadable landmark cache entry {path}: {e}")
+            os.remove(path)
+            return None
+        touch(path)
+        logger.info(f"Landmark cache hit: {key[:12]} ({len(entry)} frames)")
+        return entry[:, :-1], entry[:, -1]
+
+    def put(self, key: str, landmarks: np.ndarray, movements: np.ndarray) -> None:
+        entry = np.concatenate([landmarks, movements[:, None]], axis=1).astype(np.float32)
+        # Write to a temporary file first so concurrent readers never see a partial entry.
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, entry)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.error(f"Error writing landmark cache entry: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        evict_lru(self.cache_dir, self.max_bytes, self.SUFFIX)
@@ -0,0 +1,128 @@
+import logging
+from typing import Callable, Optional
+import numpy as np
+from face_tracking import Box, iou_matrix
+
+logger = logging.getLogger(__name__)
+
+LIP_POINTS = slice(48, 68)
+LIP_LANDMARK_DIM = 2 * (LIP_POINTS.stop - LIP_POINTS.start)
+
+class LipLandmarkTracker:
+    """Lip landmarks for consecutive frames of one video, running the face detector only when needed.
+
+    The HOG detector runs every `detect_interval` frames and whenever tracking is lost;
+    in between the shape predictor runs on the previous face box, expanded by `margin`
+    and re-centred on the last landmarks. A box supplied by the caller, such as one the
+    face-recognition stage already found, replaces detection for that frame. An
+    interval of 1 detects on every frame.
+
+    dlib's predictor always places its points inside the box it is given, so landmarks
+    alone cannot reveal a lost face. Every `verify_interval` tracked frames the detector
+    therefore runs on a crop around the box only, and tracking counts as lost when it
+    finds no face overlapping the box; drift is bounded by that interval.
+    """
+
+    def __init__(self, detector: Callable, predictor: Callable, detect_interval: int = 1, margin: float = 0.1,
+                 extent_tolerance: float = 0.35, verify_interval: int = 5, verify_iou: float = 0.3):
+        self.detector = detector
+        self.predictor = predictor
+        self.detect_interval = max(1, detect_interval)
+        self.margin = margin
+        self.extent_tolerance = extent_tolerance
+        self.verify_interval = max(1, verify_interval)
+        self.verify_iou = verify_iou
+        self.box: Optional[np.ndarray] = None
+        self._offset = np.zeros(2)
+        self._extent = 0.0
+        self._since_detect = 0
+        self.frames = 0
+        self.detections = 0
+        self.reused = 0
+        self.tracked = 0
+        self.lost = 0
+        self.verifications = 0
+
+    def _predict(self, gray: np.ndarray, box: np.ndarray) -> np.ndarray:
+        """All 68 landmarks predicted inside an (x, y, w, h) box."""
+        import dlib
+        left, top = int(round(box[0])), int(round(box[1]))
+        rect = dlib.rectangle(left, top, left + int(round(box[2])), top + int(round(box[3])))
+        shape = self.predictor(gray, rect)
+        return np.array([(point.x, point.y) for point in shape.parts()], dtype=np.float32)
+
+    def _anchor(self, box: np.ndarray, points: np.ndarray) -> None:
+        """Remembers where the face box sits relative to its landmarks, for tracking."""
+        self.box = box
+        self._offset = box[:2] + box[2:] / 2 - points.mean(axis=0)
+        self._extent = np.ptp(points[:, 0]) / max(box[2], 1.0)
+        self._since_detect = 1
+
+    def _verify(self, gray: np.ndarray) -> Optional[np.ndarray]:
+        """Re-detects the face in a crop twice the box size; the detected box, or None if it is gone."""
+        self.verifications += 1
+        x, y, w, h = self.box
+        left, top = int(max(x - w / 2, 0)), int(max(y - h / 2, 0))
+        right, bottom = int(min(x + 1.5 * w, gray.shape[1])), int(min(y + 1.5 * h, gray.shape[0]))
+        if right <= left or bottom <= top:
+            return None
+        # HOG finds faces from about 80 px; upsample crops of smaller faces once.
+        faces = self.detector(np.ascontiguousarray(gray[top:bottom, left:right]), 1 if min(w, h) < 80 else 0)
+        if len(faces) == 0:
+            return None
+        boxes = np.array([[face.left() + left, face.top() + top, face.width(), face.height()] for face in faces],
+                         dtype=np.float64)
+        overlap = iou_matrix(boxes, self.box[None, :])[:, 0]
+        best = int(np.argmax(overlap))
+        return boxes[best] if overlap[best] >= self.verify_iou else None
+
+    def _track(self, gray: np.ndarray) -> Optional[np.ndarray]:
+        """Landmarks from the expanded previous box, or None when the face was lost."""
+        if self._since_detect % self.verify_interval == 0:
+            box = self._verify(gray)
+            if box is None:
+                return None
+            points = self._predict(gray, box)
+            since_detect = self._since_detect
+            self._anchor(box, points)
+            self._since_detect = since_detect + 1
+            return points
+        roi = np.concatenate((self.box[:2] - self.box[2:] * self.margin, self.box[2:] * (1 + 2 * self.margin)))
+        points = self._predict(gray, roi)
+        extent = np.ptp(points[:, 0]) / max(self.box[2], 1.0)
+        if abs(extent - self._extent) > self.extent_tolerance * self._extent:
+            return None
+        self.box = np.concatenate((points.mean(axis=0) + self._offset - self.box[2:] / 2, self.box[2:]))
+        self._since_detect += 1
+        return points
+
+    def landmarks(self, gray: np.ndarray, face_box: Optional[Box] = None) -> Optional[np.ndarray]:
+        """Flattened (x, y) lip landmarks for the next frame, or None when no face is found."""
+        self.frames += 1
+        if face_box is not None:
+            box = np.asarray(face_box, dtype=np.float64)
+            points = self._predict(gray, box)
+            self._anchor(box, points)
+            self.reused += 1
+            return points[LIP_POINTS].flatten()
+        if self.box is not None and self._since_detect < self.detect_interval:
+            points = self._track(gray)
+            if points is not None:
+                self.tracked += 1
+                return points[LIP_POINTS].flatten()
+            self.lost += 1
+        faces = self.detector(gray)
+        self.detections += 1
+        if len(faces) == 0:
+            self.box = None
+            return None
+        face = faces[0]
+        box = np.array([face.left(), face.top(), face.width(), face.height()], dtype=np.float64)
+        points = self._predict(gray, box)
+        self._anchor(box, points)
+        return points[LIP_POINTS].flatten()
+
+    def log_stats(self) -> None:
+        logger.info(f"Lip landmarks for {self.frames} frames: {self.detections} detections, "
+                    f"{self.tracked} tracked ({self.verifications} verified on a crop), {self.reused} reused boxes, "
+                    f"{self.lost} tracking losses")
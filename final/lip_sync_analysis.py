@@ -1,117 +1,280 @@
-import numpy as np
-import torch
-import cv2
-import dlib
-from typing import List, Dict, Optional
-import logging
-import librosa
-
-logger = logging.getLogger(__name__)
-
-class LipSyncAnalyzer:
-    def __init__(self, landmark_predictor_path: str):
-        logger.info("Initializing LipSyncAnalyzer")
-        self.face_detector = dlib.get_frontal_face_detector()
-        self.landmark_predictor = dlib.shape_predictor(landmark_predictor_path)
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        logger.info(f"Using device: {self.device}")
-
-    def extract_lip_landmarks(self, frame: np.ndarray) -> Optional[np.ndarray]:
-        try:
-            if frame.ndim == 2:
-                frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
-            elif frame.shape[2] == 4:
-                frame = frame[:, :, :3]
-            
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = self.face_detector(gray)
-            if len(faces) == 0:
-                return None
-            
-            landmarks = self.landmark_predictor(gray, faces[0])
-            lip_landmarks = np.array([(landmarks.part(i).x, landmarks.part(i).y) for i in range(48, 68)], dtype=np.float32)
-            return lip_landmarks.flatten()
-        except Exception as e:
-            logger.error(f"Error extracting lip landmarks: {e}")
-            return None
-
-    def compute_lip_movement(self, landmarks: np.ndarray) -> float:
-        landmarks = landmarks.reshape(-1, 2)
-        centroid = np.mean(landmarks, axis=0)
-        distances = np.linalg.norm(landmarks - centroid, axis=1)
-        return np.mean(distances)
-
-    def extract_audio_features(self, audio: np.ndarray, sr: int) -> np.ndarray:
-        logger.info("Extracting audio features")
-        mfcc = librosa.feature.mfcc(y=audio, sr=sr, n_mfcc=13)
-        delta = librosa.feature.delta(mfcc)
-        delta2 = librosa.feature.delta(mfcc, order=2)
-        return np.concatenate([mfcc, delta, delta2])
-
-    def compute_dtw(self, lip_movements: np.ndarray, audio_features: np.ndarray) -> float:
-        logger.info("Computing DTW")
-        n, m = len(lip_movements), len(audio_features)
-        dtw_matrix = np.zeros((n+1, m+1))
-        dtw_matrix[0, 1:] = np.inf
-        dtw_matrix[1:, 0] = np.inf
-        
-        for i in range(1, n+1):
-            for j in range(1, m+1):
-                cost = abs(lip_movements[i-1] - audio_features[j-1])
-                dtw_matrix[i, j] = cost + min(dtw_matrix[i-1, j], dtw_matrix[i, j-1], dtw_matrix[i-1, j-1])
-        
-        return dtw_matrix[n, m]
-
-    async def analyze_lip_sync(self, video_frames: List[np.ndarray], audio_data: np.ndarray, sr: int) -> Dict[str, float]:
-        try:
-            logger.info("Starting lip sync analysis")
-            lip_movements = []
-            for i, frame in enumerate(video_frames):
-                landmarks = self.extract_lip_landmarks(frame)
-                if landmarks is not None:
-                    movement = self.compute_lip_movement(landmarks)
-                    lip_movements.append(movement)
-                if i % 100 == 0:
-                    logger.info(f"Processed {i} frames for lip movements")
-
-            if not lip_movements:
-                logger.warning("No lip movements detected in the provided frames.")
-                return {"correlation_score": 0.0, "dtw_score": float('inf'), "confidence": 0.0}
-
-            lip_movements = np.array(lip_movements)
-            audio_features = self.extract_audio_features(audio_data, sr)
-
-            logger.info("Aligning lip movements and audio features")
-            min_len = min(len(lip_movements), audio_features.shape[1])
-            lip_movements = lip_movements[:min_len]
-            audio_features = audio_features[:, :min_len]
-
-            logger.info("Computing correlation")
-            if torch.cuda.is_available():
-                lip_movements_tensor = torch.from_numpy(lip_movements).float().to(self.device)
-                audio_features_tensor = torch.from_numpy(audio_features).float().to(self.device)
-                correlation = torch.nn.functional.cosine_similarity(
-                    lip_movements_tensor.unsqueeze(0),
-                    audio_features_tensor.mean(dim=0).unsqueeze(0)
-                ).item()
-            else:
-                correlation = np.corrcoef(lip_movements, audio_features.mean(axis=0))[0, 1]
-
-            dtw_score = self.compute_dtw(lip_movements, audio_features.mean(axis=0))
-
-            logger.info("Computing confidence")
-            confidence = np.mean(lip_movements) / np.max(lip_movements)
-
-            result = {
-                "correlation_score": float(correlation),
-                "dtw_score": float(dtw_score),
-                "confidence": float(confidence)
-            }
-
-            logger.info("Lip sync analysis completed successfully.")
-            return result
-
-        except Exception as e:
-            logger.error(f"Error analyzing lip sync: {e}")
-            logger.error(f"Error details: {type(e).__name__}, {str(e)}")
-            return {"correlation_score": 0.0, "dtw_score": float('inf'), "confidence": 0.0}
\ No newline at end of file
+import asyncio
+from concurrent.futures import Executor
+from itertools import repeat
+import numpy as np
+import torch
+import cv2
+from typing import Any, List, Dict, Optional, Sequence
+import logging
+import librosa
+from feature_engine import get_feature_engine
+from model_registry import get_registry
+from dtw import dtw_distance
+from face_tracking import Box
+from lip_landmarks import LIP_LANDMARK_DIM, LipLandmarkTracker
+from landmark_cache import LandmarkCache
+from av_sync import SyncWindows, align_to_grid, audio_envelope, cross_correlation_offset, fill_gaps
+
+logger = logging.getLogger(__name__)
+
+class LipSyncAnalyzer:
+    def __init__(self, landmark_predictor_path: str, dtw_band: int = 0, method: str = "dtw", max_offset: float = 1.0,
+                 detect_interval: int = 1, roi_margin: float = 0.1, verify_interval: int = 5,
+                 chunk_frames: int = 1500, cache: Optional[LandmarkCache] = None):
+        logger.info("Initializing LipSyncAnalyzer")
+        self.landmark_predictor_path = landmark_predictor_path
+        self.detect_interval = detect_interval
+        self.roi_margin = roi_margin
+        self.verify_interval = verify_interval
+        self.chunk_frames = chunk_frames
+        self.cache = cache
+        self.dtw_band = dtw_band
+        self.method = method
+        self.max_offset = max_offset
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        logger.info(f"Using device: {self.device}")
+
+    @property
+    def face_detector(self):
+        return get_registry().dlib_face_detector()
+
+    @property
+    def landmark_predictor(self):
+        return get_registry().dlib_shape_predictor(self.landmark_predictor_path)
+
+    def landmark_tracker(self) -> LipLandmarkTracker:
+        """A fresh landmark tracker for one run of consecutive frames."""
+        return LipLandmarkTracker(self.face_detector, self.landmark_predictor, self.detect_interval, self.roi_margin,
+                                  verify_interval=self.verify_interval)
+
+    def extract_lip_landmarks(self, frame: np.ndarray, face_box: Optional[Box] = None,
+                              tracker: Optional[LipLandmarkTracker] = None) -> Optional[np.ndarray]:
+        """Lip landmarks of the first face, inside `face_box` when given; `tracker` carries state between frames."""
+        try:
+            if frame.ndim == 2:
+                frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+            elif frame.shape[2] == 4:
+                frame = frame[:, :, :3]
+            
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            return (tracker or self.landmark_tracker()).landmarks(gray, face_box)
+        except Exception as e:
+            logger.error(f"Error extracting lip landmarks: {e}")
+            return None
+
+    def extract_audio_features(self, audio: np.ndarray, sr: int) -> np.ndarray:
+        logger.info("Extracting audio features")
+        engine = get_feature_engine()
+        if sr != engine.sr:
+            audio = librosa.resample(audio, orig_sr=sr, target_sr=engine.sr)
+        mfcc = engine.mfcc_from_audio(audio, n_mfcc=13)
+        delta = librosa.feature.delta(mfcc)
+        delta2 = librosa.feature.delta(mfcc, order=2)
+        return np.concatenate([mfcc, delta, delta2])
+
+    def compute_dtw(self, lip_movements: np.ndarray, audio_features: np.ndarray, band: Optional[int] = None) -> float:
+        band = self.dtw_band if band is None else band
+        logger.info(f"Computing DTW (band: {band or 'none'})")
+        return dtw_distance(lip_movements, audio_features, band)
+
+    async def analyze_lip_sync(self, video_frames: List[np.ndarray], audio_data: np.ndarray, sr: int,
+                               audio_features: Optional[np.ndarray] = None, fps: Optional[float] = None,
+                               method: Optional[str] = None, start_time: float = 0.0,
+                               face_boxes: Optional[Sequence[Optional[Box]]] = None) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.compute_lip_sync, video_frames, audio_data, sr, audio_features, fps, method,
+                                       start_time, face_boxes)
+
+    def compute_offset(self, frame_movements: np.ndarray, envelope: np.ndarray, fps: float) -> Dict[str, float]:
+        """Audio-visual lag and sync score from FFT cross-correlation of lip movement and audio energy."""
+        logger.info("Computing audio-visual offset by cross-correlation")
+        max_lag = int(round(self.max_offset * fps)) if self.max_offset > 0 else None
+        lag, peak = cross_correlation_offset(fill_gaps(frame_movements), envelope, max_lag)
+        return {"correlation_score": peak, "offset_frames": float(lag), "offset_seconds": lag / fps}
+
+    def frame_landmarks(self, video_frames: List[np.ndarray],
+                        face_boxes: Optional[Sequence[Optional[Box]]] = None) -> np.ndarray:
+        """(n, 40) float32 lip landmarks for consecutive frames, NaN where no lips were found."""
+        landmarks = np.full((len(video_frames), LIP_LANDMARK_DIM), np.nan, dtype=np.float32)
+        tracker = self.landmark_tracker()
+        for i, frame in enumerate(video_frames):
+            points = self.extract_lip_landmarks(frame, face_boxes[i] if face_boxes else None, tracker)
+            if points is not None:
+                landmarks[i] = points
+            if i % 100 == 0:
+                logger.info(f"Processed {i} frames for lip movements")
+        tracker.log_stats()
+        return landmarks
+
+    def read_landmarks(self, video_path: str, start_frame: int, end_frame: int) -> np.ndarray:
+        """Lip landmarks for frames [start_frame, end_frame) decoded straight from the video."""
+        landmarks = np.full((end_frame - start_frame, LIP_LANDMARK_DIM), np.nan, dtype=np.float32)
+        tracker = self.landmark_tracker()
+        cap = cv2.VideoCapture(video_path)
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+        for i in range(len(landmarks)):
+            ret, frame = cap.read()
+            if not ret:
+                landmarks = landmarks[:i]
+                break
+            points = self.extract_lip_landmarks(frame, tracker=tracker)
+            if points is not None:
+                landmarks[i] = points
+        cap.release()
+        tracker.log_stats()
+        return landmarks
+
+    def video_landmarks(self, video_path: str, start_frame: int, end_frame: int,
+                        executor: Optional[Executor] = None) -> np.ndarray:
+        """Lip landmarks for a frame range, split into contiguous chunks of `chunk_frames`.
+
+        With an `executor`, such as the meeting's stage pool, the chunks run on it;
+        each opens the video and seeks to its own chunk, so no frames cross process
+        boundaries. The chunks come back in order as one (n, 40) float32 array.
+        """
+        chunks = [(start, min(start + self.chunk_frames, end_frame))
+                  for start in range(start_frame, end_frame, max(1, self.chunk_frames))]
+        logger.info(f"Extracting lip landmarks for frames {start_frame}-{end_frame} in {len(chunks)} chunks")
+        if executor is None:
+            parts = [self.read_landmarks(video_path, start, end) for start, end in chunks]
+        else:
+            parts = list(executor.map(landmark_chunk, repeat(self.settings()), repeat(video_path),
+                                      [start for start, _ in chunks], [end for _, end in chunks]))
+        return np.concatenate(parts) if parts else np.zeros((0, LIP_LANDMARK_DIM), dtype=np.float32)
+
+    def landmark_settings(self) -> Dict[str, Any]:
+        """Settings that change the extracted landmarks; scoring settings are left out so re-tuning keeps the cache.
+
+        Each chunk starts a fresh tracker with a detection, so the chunk size matters too.
+        """
+        return {"detect_interval": self.detect_interval, "roi_margin": self.roi_margin,
+                "verify_interval": self.verify_interval, "chunk_frames": self.chunk_frames}
+
+    def settings(self) -> Dict[str, Any]:
+        """Constructor arguments that rebuild an equivalent analyzer in a worker process."""
+        return {"landmark_predictor_path": self.landmark_predictor_path, "dtw_band": self.dtw_band,
+                "method": self.method, "max_offset": self.max_offset, "detect_interval": self.detect_interval,
+                "roi_margin": self.roi_margin, "verify_interval": self.verify_interval}
+
+    def movements_from_landmarks(self, landmarks: np.ndarray) -> np.ndarray:
+        """Per-frame lip movement (mean distance of the lip points from their centroid); NaN rows stay NaN."""
+        points = landmarks.reshape(len(landmarks), -1, 2).astype(np.float64)
+        centroids = points.mean(axis=1, keepdims=True)
+        return np.linalg.norm(points - centroids, axis=2).mean(axis=1)
+
+    def analyze_video(self, video_path: str, audio_data: np.ndarray, sr: int, audio_features: Optional[np.ndarray] = None,
+                      start_time: float = 0.0, end_time: Optional[float] = None, method: Optional[str] = None,
+                      executor: Optional[Executor] = None) -> Dict[str, Any]:
+        """Scores lip sync for `start_time`..`end_time` of a video file without holding its frames in memory.
+
+        Landmark chunks run on `executor` when one is given; see `video_landmarks`.
+        """
+        cap = cv2.VideoCapture(video_path)
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        start_frame = int(round((start_time or 0.0) * fps))
+        end_frame = min(int(round(end_time * fps)), frame_count) if end_time else frame_count
+        end_frame = max(start_frame, end_frame)
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key(video_path, start_frame, end_frame, self.landmark_predictor_path,
+                                       self.landmark_settings())
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return self.score_movements(np.asarray(cached[1]), audio_data, sr, audio_features, fps, method,
+                                            start_time or 0.0)
+        landmarks = self.video_landmarks(video_path, start_frame, end_frame, executor)
+        # Stored precision, so a rerun from the cache scores exactly the same.
+        frame_movements = self.movements_from_landmarks(landmarks).astype(np.float32)
+        if cache_key is not None:
+            self.cache.put(cache_key, landmarks, frame_movements)
+        return self.score_movements(frame_movements, audio_data, sr, audio_features, fps, method, start_time or 0.0)
+
+    def compute_lip_sync(self, video_frames: List[np.ndarray], audio_data: np.ndarray, sr: int,
+                         audio_features: Optional[np.ndarray] = None, fps: Optional[float] = None,
+                         method: Optional[str] = None, start_time: float = 0.0,
+                         face_boxes: Optional[Sequence[Optional[Box]]] = None) -> Dict[str, Any]:
+        """Scores lip sync of decoded frames; `face_boxes`, one (x, y, w, h) box or None per frame, skips detection."""
+        frame_movements = self.movements_from_landmarks(self.frame_landmarks(video_frames, face_boxes))
+        return self.score_movements(frame_movements, audio_data, sr, audio_features, fps, method, start_time)
+
+    def score_movements(self, frame_movements: np.ndarray, audio_data: np.ndarray, sr: int,
+                        audio_features: Optional[np.ndarray] = None, fps: Optional[float] = None,
+                        method: Optional[str] = None, start_time: float = 0.0) -> Dict[str, Any]:
+        """Scores per-frame lip movement (NaN where no lips were found) with `method`, 'dtw' or 'xcorr'.
+
+        The analyzer's method is used when `method` is None. Given `fps`, the result also
+        holds 'windows', a SyncWindows that scores any sub-range of the clip (which starts
+        `start_time` seconds into the video) in O(1).
+        """
+        method = method or self.method
+        try:
+            logger.info(f"Starting lip sync analysis ({method})")
+            lip_movements = frame_movements[~np.isnan(frame_movements)]
+            if not len(lip_movements):
+                logger.warning("No lip movements detected in the provided frames.")
+                return {"correlation_score": 0.0, "dtw_score": float('inf'), "confidence": 0.0}
+
+            confidence = np.mean(lip_movements) / np.max(lip_movements)
+            envelope = audio_envelope(audio_data, sr, fps, len(frame_movements)) if fps else None
+            if method == "xcorr":
+                if not fps:
+                    raise ValueError("The xcorr lip sync method needs the video frame rate")
+                result = self.compute_offset(frame_movements, envelope, fps)
+                result["confidence"] = float(confidence)
+                result["windows"] = SyncWindows(frame_movements, envelope, fps, start_time, int(result["offset_frames"]))
+                logger.info(f"Lip sync offset {result['offset_seconds']:.3f}s, peak correlation {result['correlation_score']:.3f}")
+                return result
+
+            # extract_audio_features resamples to the engine's rate, so features from either
+            # source are at the engine's hop rate.
+            if audio_features is None:
+                audio_features = self.extract_audio_features(audio_data, sr)
+            feature_rate = get_feature_engine().frames_per_second
+
+            band = self.dtw_band
+            if fps:
+                logger.info("Resampling lip movements and audio features onto the video frame grid")
+                lip_movements, audio_features = align_to_grid(frame_movements, fps, audio_features, feature_rate)
+                # On a shared clock, warping further than the largest plausible offset is not a match.
+                if not band and self.max_offset > 0:
+                    band = int(round(self.max_offset * fps))
+            else:
+                logger.info("Frame rate unknown; truncating lip movements and audio features to the same length")
+                min_len = min(len(lip_movements), audio_features.shape[1])
+                lip_movements = lip_movements[:min_len]
+                audio_features = audio_features[:, :min_len]
+
+            logger.info("Computing correlation")
+            if torch.cuda.is_available():
+                lip_movements_tensor = torch.from_numpy(lip_movements).float().to(self.device)
+                audio_features_tensor = torch.from_numpy(audio_features).float().to(self.device)
+                correlation = torch.nn.functional.cosine_similarity(
+                    lip_movements_tensor.unsqueeze(0),
+                    audio_features_tensor.mean(dim=0).unsqueeze(0)
+                ).item()
+            else:
+                correlation = np.corrcoef(lip_movements, audio_features.mean(axis=0))[0, 1]
+
+            dtw_score = self.compute_dtw(lip_movements, audio_features.mean(axis=0), band)
+
+            result = {
+                "correlation_score": float(correlation),
+                "dtw_score": float(dtw_score),
+                "confidence": float(confidence)
+            }
+            if envelope is not None:
+                result["windows"] = SyncWindows(frame_movements, envelope, fps, start_time)
+
+            logger.info("Lip sync analysis completed successfully.")
+            return result
+
+        except Exception as e:
+            logger.error(f"Error analyzing lip sync: {e}")
+            logger.error(f"Error details: {type(e).__name__}, {str(e)}")
+            return {"correlation_score": 0.0, "dtw_score": float('inf'), "confidence": 0.0}
+
+
+def landmark_chunk(settings: Dict[str, Any], video_path: str, start_frame: int, end_frame: int) -> np.ndarray:
+    """Process-pool entry point: one chunk of LipSyncAnalyzer.video_landmarks."""
+    return LipSyncAnalyzer(**settings).read_landmarks(video_path, start_frame, end_frame)
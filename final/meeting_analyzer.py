@@ -1,106 +1,283 @@
-import asyncio
-import logging
-from typing import Dict, List
-from face_recognition_module import FaceRecognizer
-from audio_processing import AudioProcessor
-from lip_sync_analysis import LipSyncAnalyzer
-import aiohttp
-import numpy as np
-import cv2
-import librosa
-
-logger = logging.getLogger(__name__)
-
-class MeetingAnalyzer:
-    def __init__(self, config):
-        self.config = config
-        self.face_recognizer = FaceRecognizer()
-        self.audio_processor = AudioProcessor()
-        self.lip_sync_analyzer = LipSyncAnalyzer(config.LIPSYNC.landmark_predictor_path)
-        logger.info("MeetingAnalyzer components initialized")
-
-    async def analyze_meeting(self, participants: Dict[str, Dict[str, str]], start_time: float = 0, end_time: float = None):
-        logger.info(f"Starting meeting analysis for {len(participants)} participants")
-        tasks = []
-        for person_name, paths in participants.items():
-            tasks.append(self.process_person_data(person_name, paths, start_time, end_time))
-        results = await asyncio.gather(*tasks)
-        
-        logger.info("Combining results from all participants")
-        all_segments = [segment for result in results for segment in result]
-        all_segments.sort(key=lambda x: x['start'])
-        
-        logger.info("Generating meeting summary")
-        summary = await self.generate_summary(all_segments)
-        return all_segments, summary
-
-    async def process_person_data(self, person_name: str, paths: Dict[str, str], start_time: float, end_time: float):
-        logger.info(f"Processing data for {person_name}")
-        logger.info(f"Performing face recognition for {person_name}")
-        await self.face_recognizer.process_individual_video(paths['video'], person_name)
-        
-        logger.info(f"Processing audio for {person_name}")
-        audio_segments = await self.audio_processor.process_audio(paths['audio'], person_name)
-        
-        logger.info(f"Extracting video frames for {person_name}")
-        video_frames = self.extract_video_frames(paths['video'], start_time, end_time)
-        
-        logger.info(f"Loading audio data for {person_name}")
-        audio_data, sr = librosa.load(paths['audio'], sr=16000, offset=start_time, duration=end_time-start_time if end_time else None)
-        
-        logger.info(f"Performing lip sync analysis for {person_name}")
-        lip_sync_result = await self.lip_sync_analyzer.analyze_lip_sync(video_frames, audio_data, sr)
-        
-        for segment in audio_segments:
-            segment['lip_sync_score'] = lip_sync_result['correlation_score']
-            segment['lip_sync_confidence'] = lip_sync_result['confidence']
-        
-        logger.info(f'Completed processing data for {person_name}')
-        return audio_segments
-
-    def extract_video_frames(self, video_path: str, start_time: float, end_time: float) -> List[np.ndarray]:
-        logger.info(f"Extracting video frames from {video_path}")
-        frames = []
-        cap = cv2.VideoCapture(video_path)
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        cap.set(cv2.CAP_PROP_POS_MSEC, start_time * 1000)
-        while True:
-            ret, frame = cap.read()
-            if not ret or (end_time and cap.get(cv2.CAP_PROP_POS_MSEC) / 1000 > end_time):
-                break
-            frames.append(frame)
-        cap.release()
-        logger.info(f"Extracted {len(frames)} frames")
-        return frames
-
-    async def generate_summary(self, segments: List[Dict]) -> str:
-        logger.info("Generating meeting summary using Perplexity API")
-        try:
-            transcript = " ".join([f"{seg['speaker']}: {seg['text']}" for seg in segments])
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.config.PERPLEXITY.api_url,
-                    headers={
-                        "Authorization": f"Bearer {self.config.PERPLEXITY.api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": "llama-3.1-sonar-huge-128k-online",  # 유효한 모델로 변경
-                        "messages": [
-                            {"role": "system", "content": "You are a helpful korean assistant that summarizes meeting transcripts."},
-                            {"role": "user", "content": f"Please summarize the following meeting transcript in korean:\n\n{transcript}"}
-                        ]
-                    }
-                ) as response:
-                    result = await response.json()
-                    if 'choices' in result:
-                        summary = result['choices'][0]['message']['content']
-                        logger.info("Meeting summary generated successfully")
-                        return summary
-                    else:
-                        error_message = result.get('error', {}).get('message', 'Unknown error occurred')
-                        logger.error(f'Error in Perplexity API response: {error_message}')
-                        return f'Failed to generate summary: {error_message}'
-        except Exception as e:
-            logger.error(f"Error generating summary: {e}")
-            return "Failed to generate summary"
\ No newline at end of file
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from face_recognition_module import FaceRecognizer
+from frame_sampling import EnrollmentSampling
+from face_tracking import FaceTracker
+from gallery_store import GalleryStore
+from audio_processing import AudioProcessor, VoiceActivityDetector
+from transcription_cache import TranscriptionCache
+from model_registry import get_registry
+from audio_buffer import get_audio_buffer
+from feature_engine import get_feature_engine
+from lip_sync_analysis import LipSyncAnalyzer
+from landmark_cache import LandmarkCache
+from batched_transcription import BatchedTranscriber
+from stage_executor import StageExecutor
+import aiohttp
+import numpy as np
+import cv2
+
+logger = logging.getLogger(__name__)
+
+def build_vad(config) -> Optional[VoiceActivityDetector]:
+    return VoiceActivityDetector(
+        energy_margin_db=config.AUDIO.vad_energy_margin_db,
+        padding_seconds=config.AUDIO.vad_padding
+    ) if config.AUDIO.vad else None
+
+def build_face_recognizer(config) -> FaceRecognizer:
+    return FaceRecognizer(config.FACE_RECOGNITION.model, config.FACE_RECOGNITION.distance_metric,
+                          index_backend=config.FACE_RECOGNITION.index_backend,
+                          batch_size=config.FACE_RECOGNITION.batch_size,
+                          prototypes=config.FACE_RECOGNITION.prototypes,
+                          radius_quantile=config.FACE_RECOGNITION.prototype_radius_quantile,
+                          max_widen=config.FACE_RECOGNITION.prototype_max_widen,
+                          detection_scale=config.FACE_RECOGNITION.detection_scale,
+                          detection_short_side=config.FACE_RECOGNITION.detection_short_side,
+                          detect_workers=config.PROCESSING.detect_workers,
+                          queue_size=config.PROCESSING.queue_size,
+                          sampling=EnrollmentSampling(
+                              stride=config.FACE_RECOGNITION.enroll_stride,
+                              scene_threshold=config.FACE_RECOGNITION.enroll_scene_threshold,
+                              max_gap=config.FACE_RECOGNITION.enroll_max_gap,
+                              stability_tolerance=config.FACE_RECOGNITION.enroll_stability_tolerance,
+                              stability_patience=config.FACE_RECOGNITION.enroll_stability_patience,
+                              min_faces=config.FACE_RECOGNITION.enroll_min_faces
+                          ))
+
+def build_audio_processor(config) -> AudioProcessor:
+    cache = TranscriptionCache(config.AUDIO.cache_dir, config.AUDIO.cache_max_bytes) if config.AUDIO.cache_dir else None
+    return AudioProcessor(config.AUDIO.whisper_model, vad=build_vad(config), cache=cache,
+                          quantize=config.AUDIO.whisper_quantize)
+
+def build_lip_sync_analyzer(config) -> LipSyncAnalyzer:
+    cache = LandmarkCache(config.LIPSYNC.cache_dir, config.LIPSYNC.cache_max_bytes) if config.LIPSYNC.cache_dir else None
+    return LipSyncAnalyzer(config.LIPSYNC.landmark_predictor_path, dtw_band=config.LIPSYNC.dtw_band,
+                           method=config.LIPSYNC.method, max_offset=config.LIPSYNC.max_offset,
+                           detect_interval=config.LIPSYNC.detect_interval, roi_margin=config.LIPSYNC.roi_margin,
+                           verify_interval=config.LIPSYNC.verify_interval,
+                           chunk_frames=config.LIPSYNC.chunk_frames, cache=cache)
+
+def extract_video_frames(video_path: str, start_time: float, end_time: float) -> List[np.ndarray]:
+    logger.info(f"Extracting video frames from {video_path}")
+    frames = []
+    cap = cv2.VideoCapture(video_path)
+    cap.set(cv2.CAP_PROP_POS_MSEC, start_time * 1000)
+    while True:
+        ret, frame = cap.read()
+        if not ret or (end_time and cap.get(cv2.CAP_PROP_POS_MSEC) / 1000 > end_time):
+            break
+        frames.append(frame)
+    cap.release()
+    logger.info(f"Extracted {len(frames)} frames")
+    return frames
+
+# Stage entry points for StageExecutor. They take the picklable config and build
+# their components inside the worker, once per process; models come from that
+# process's registry.
+_stage_components: Dict[str, object] = {}
+
+def _stage_component(name: str, config, factory):
+    if name not in _stage_components:
+        get_audio_buffer(config.AUDIO.buffer_dir or None, config.AUDIO.buffer_max_bytes)
+        _stage_components[name] = factory(config)
+    return _stage_components[name]
+
+def enroll_faces_stage(config, video_path: str, person_name: str) -> np.ndarray:
+    recognizer = _stage_component('face', config, build_face_recognizer)
+    recognizer.enroll_from_video(video_path, person_name)
+    return recognizer.gallery.remove(person_name)
+
+def audio_stage(config, audio_path: str, person_name: str, transcription: Optional[Dict],
+                log_mel_path: Optional[str] = None) -> List[Dict]:
+    if log_mel_path:
+        get_feature_engine().attach_log_mel(audio_path, log_mel_path)
+    return _stage_component('audio', config, build_audio_processor).analyze_track(audio_path, person_name, transcription)
+
+class MeetingAnalyzer:
+    def __init__(self, config):
+        self.config = config
+        self.audio_buffer = get_audio_buffer(config.AUDIO.buffer_dir or None, config.AUDIO.buffer_max_bytes)
+        self.executor = StageExecutor(config.PROCESSING.num_workers, config.PROCESSING.threads_per_worker or None)
+        self.face_recognizer = build_face_recognizer(config)
+        self.gallery_store = GalleryStore(config.FACE_RECOGNITION.gallery_dir) if config.FACE_RECOGNITION.gallery_dir else None
+        self.batched_transcriber = BatchedTranscriber(
+            config.AUDIO.whisper_model,
+            batch_size=config.AUDIO.batch_size,
+            language=config.AUDIO.language or None,
+            vad=build_vad(config),
+            quantize=config.AUDIO.whisper_quantize
+        ) if config.AUDIO.batched and not config.AUDIO.streaming else None
+        logger.info("MeetingAnalyzer components initialized")
+
+    # Built on first use and shared with in-process stages; with a process pool the
+    # stages build their own, so the parent only pays for what it calls directly.
+    @property
+    def audio_processor(self) -> AudioProcessor:
+        return _stage_component('audio', self.config, build_audio_processor)
+
+    @property
+    def lip_sync_analyzer(self) -> LipSyncAnalyzer:
+        return _stage_component('lip_sync', self.config, build_lip_sync_analyzer)
+
+    async def shared_log_mel(self, audio_path: str) -> Optional[str]:
+        """Path of the track's log-mel file for stage processes, so the spectrogram is computed once."""
+        if self.executor.num_workers <= 1:
+            return None
+        return await asyncio.to_thread(get_feature_engine().log_mel_file, audio_path)
+
+    async def analyze_meeting(self, participants: Dict[str, Dict[str, str]], start_time: float = 0, end_time: float = None,
+                              on_segment: Optional[Callable[[Dict], None]] = None):
+        """Segments of every participant, sorted by start, and a summary.
+
+        `on_segment` is called with each segment as soon as it is scored; in streaming
+        mode that is one window after its speech, long before the meeting is done.
+        """
+        logger.info(f"Starting meeting analysis for {len(participants)} participants")
+        transcriptions = {}
+        if self.batched_transcriber is not None:
+            logger.info("Transcribing all participants in shared Whisper batches")
+            tracks = {person_name: paths['audio'] for person_name, paths in participants.items()}
+            loop = asyncio.get_running_loop()
+            transcriptions = await loop.run_in_executor(None, self.batched_transcriber.transcribe_tracks, tracks)
+        tasks = []
+        for person_name, paths in participants.items():
+            tasks.append(self.process_person_data(person_name, paths, start_time, end_time, transcriptions.get(person_name),
+                                                  on_segment))
+        results = await asyncio.gather(*tasks)
+        
+        logger.info("Combining results from all participants")
+        all_segments = [segment for result in results for segment in result]
+        all_segments.sort(key=lambda x: x['start'])
+        
+        logger.info("Generating meeting summary")
+        summary = await self.generate_summary(all_segments)
+        get_registry().log_report()
+        return all_segments, summary
+
+    async def process_person_data(self, person_name: str, paths: Dict[str, str], start_time: float, end_time: float,
+                                  transcription: Optional[Dict] = None,
+                                  on_segment: Optional[Callable[[Dict], None]] = None):
+        logger.info(f"Processing data for {person_name}")
+        logger.info(f"Performing face recognition for {person_name}")
+        enrollment = asyncio.ensure_future(self.enroll_person(person_name, paths['video']))
+        
+        log_mel_path = await self.shared_log_mel(paths['audio'])
+        logger.info(f"Performing lip sync analysis for {person_name}")
+        lip_sync = asyncio.ensure_future(
+            asyncio.to_thread(self.analyze_lip_sync, paths['video'], paths['audio'], start_time, end_time))
+        
+        logger.info(f"Processing audio for {person_name}")
+        if self.config.AUDIO.streaming:
+            # Segments arriving before the lip sync result wait for it; later ones are scored on arrival.
+            audio_segments, unscored = [], []
+            async for segment in self.stream_segments(paths['audio'], person_name):
+                audio_segments.append(segment)
+                unscored.append(segment)
+                if lip_sync.done():
+                    self.score_segments(unscored, lip_sync.result(), on_segment)
+                    unscored = []
+            self.score_segments(unscored, await lip_sync, on_segment)
+        else:
+            audio_segments = await self.executor.run(audio_stage, self.config, paths['audio'], person_name,
+                                                     transcription, log_mel_path)
+            self.score_segments(audio_segments, await lip_sync, on_segment)
+        await enrollment
+        
+        logger.info(f'Completed processing data for {person_name}')
+        return audio_segments
+
+    def score_segments(self, segments: List[Dict], lip_sync_result: Dict[str, Any],
+                       on_segment: Optional[Callable[[Dict], None]] = None) -> None:
+        """Adds lip sync scores to segments, per segment when the result has windows."""
+        windows = lip_sync_result.get('windows')
+        for segment in segments:
+            if windows is not None:
+                segment['lip_sync_score'], segment['lip_sync_confidence'] = windows.score(segment['start'], segment['end'])
+            else:
+                segment['lip_sync_score'] = lip_sync_result['correlation_score']
+                segment['lip_sync_confidence'] = lip_sync_result['confidence']
+            if on_segment is not None:
+                on_segment(segment)
+
+    def analyze_lip_sync(self, video_path: str, audio_path: str, start_time: float, end_time: float) -> Dict[str, Any]:
+        """Lip sync for one participant; landmark extraction fans out over the stage executor in chunks.
+
+        Runs on a thread of this process, since stages cannot submit work to the pool
+        they run in. Scoring is cheap next to landmark extraction.
+        """
+        audio_data = self.audio_buffer.slice(audio_path, start_time, end_time)
+        try:
+            audio_features = get_feature_engine().mfcc_with_deltas(audio_path, 13, start_time, end_time)
+            return self.lip_sync_analyzer.analyze_video(video_path, audio_data, self.audio_buffer.sr, audio_features,
+                                                        start_time, end_time, executor=self.executor.executor)
+        finally:
+            self.audio_buffer.release(audio_path)
+
+    async def enroll_person(self, person_name: str, video_path: str) -> None:
+        """Adds a person's embeddings to the recognizer, from the gallery store when their video is unchanged."""
+        key = None
+        if self.gallery_store is not None:
+            key = await asyncio.to_thread(self.gallery_store.key, video_path, self.face_recognizer.settings())
+            embeddings = self.gallery_store.get(person_name, key)
+            if embeddings is not None:
+                self.face_recognizer.add_person(person_name, embeddings)
+                return
+        embeddings = await self.executor.run(enroll_faces_stage, self.config, video_path, person_name)
+        if len(embeddings):
+            self.face_recognizer.add_person(person_name, embeddings)
+            if key is not None:
+                self.gallery_store.put(person_name, key, embeddings)
+
+    async def stream_segments(self, audio_path: str, person_name: str) -> AsyncIterator[Dict]:
+        """Yields a track's segments as each streaming window is transcribed."""
+        async for segment in self.audio_processor.stream_audio(
+                audio_path, person_name, self.config.AUDIO.stream_window, self.config.AUDIO.stream_overlap):
+            yield segment
+
+    def extract_video_frames(self, video_path: str, start_time: float, end_time: float) -> List[np.ndarray]:
+        return extract_video_frames(video_path, start_time, end_time)
+
+    def face_tracker(self) -> FaceTracker:
+        """A fresh tracker for one video."""
+        return FaceTracker(
+            iou_threshold=self.config.FACE_RECOGNITION.track_iou_threshold,
+            max_misses=self.config.FACE_RECOGNITION.track_max_misses,
+            refresh_interval=self.config.FACE_RECOGNITION.track_refresh_interval
+        )
+
+    def close(self):
+        self.executor.shutdown()
+
+    async def generate_summary(self, segments: List[Dict]) -> str:
+        logger.info("Generating meeting summary using Perplexity API")
+        try:
+            transcript = " ".join([f"{seg['speaker']}: {seg['text']}" for seg in segments])
+            async with aiohttp.ClientSession() as session:
+                async with session.post(
+                    self.config.PERPLEXITY.api_url,
+                    headers={
+                        "Authorization": f"Bearer {self.config.PERPLEXITY.api_key}",
+                        "Content-Type": "application/json"
+                    },
+                    json={
+                        "model": "llama-3.1-sonar-huge-128k-online",  # 유효한 모델로 변경
+                        "messages": [
+                            {"role": "system", "content": "You are a helpful korean assistant that summarizes meeting transcripts."},
+                            {"role": "user", "content": f"Please summarize the following meeting transcript in korean:\n\n{transcript}"}
+                        ]
+                    }
+                ) as response:
+                    result = await response.json()
+                    if 'choices' in result:
+                        summary = result['choices'][0]['message']['content']
+                        logger.info("Meeting summary generated successfully")
+                        return summary
+                    else:
+                        error_message = result.get('error', {}).get('message', 'Unknown error occurred')
+                        logger.error(f'Error in Perplexity API response: {error_message}')
+                        return f'Failed to generate summary: {error_message}'
+        except Exception as e:
+            logger.error(f"Error generating summary: {e}")
+            return "Failed to generate summary"
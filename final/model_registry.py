@@ -0,0 +1,137 @@
+import logging
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+import torch
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+def current_rss_bytes() -> Optional[int]:
+    """Resident set size of this process, or None when it cannot be measured."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process, or None when it cannot be measured."""
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss)
+    return None
+
+def _as_plain_linear(module: torch.nn.Module) -> None:
+    """Swaps Whisper's Linear subclass for torch.nn.Linear, which quantize_dynamic recognizes."""
+    for name, child in module.named_children():
+        if isinstance(child, torch.nn.Linear) and type(child) is not torch.nn.Linear:
+            plain = torch.nn.Linear(child.in_features, child.out_features, bias=child.bias is not None)
+            plain.weight = child.weight
+            plain.bias = child.bias
+            setattr(module, name, plain)
+        else:
+            _as_plain_linear(child)
+
+def quantize_whisper(model: torch.nn.Module) -> torch.nn.Module:
+    """Dynamic int8 quantization of every Linear layer, for CPU inference."""
+    _as_plain_linear(model)
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+@dataclass(frozen=True)
+class ModelLoadStats:
+    key: str
+    load_seconds: float
+    rss_delta_bytes: Optional[int]
+
+class ModelRegistry:
+    """Process-wide cache of heavy models, each loaded once on first use."""
+
+    def __init__(self):
+        self._models: Dict[str, Any] = {}
+        self._stats: Dict[str, ModelLoadStats] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        if key in self._models:
+            return self._models[key]
+        with self._locks_guard:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            if key not in self._models:
+                logger.info(f"Loading model: {key}")
+                rss_before = current_rss_bytes()
+                start = time.perf_counter()
+                self._models[key] = loader()
+                elapsed = time.perf_counter() - start
+                rss_after = current_rss_bytes()
+                rss_delta = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+                self._stats[key] = ModelLoadStats(key, elapsed, rss_delta)
+                logger.info(f"Loaded {key} in {elapsed:.2f}s" +
+                            (f", RSS +{rss_delta / 1024 ** 2:.0f} MB" if rss_delta is not None else ""))
+        return self._models[key]
+
+    def whisper(self, name: str, device: torch.device, quantize: bool = False):
+        if quantize and device.type != 'cpu':
+            logger.warning(f"Int8 quantization is CPU-only; loading fp32 Whisper on {device}")
+            quantize = False
+
+        def load():
+            import whisper
+            model = whisper.load_model(name, device=device)
+            return quantize_whisper(model) if quantize else model
+        return self.get(f"whisper:{name}:{device}" + (":int8" if quantize else ""), load)
+
+    def face_model(self, name: str, device: torch.device):
+        def load():
+            from deepface import DeepFace
+            model = DeepFace.build_model(name)
+            if isinstance(model, torch.nn.Module):
+                model.to(device)
+            return model
+        return self.get(f"deepface:{name}", load)
+
+    def dlib_face_detector(self):
+        def load():
+            import dlib
+            return dlib.get_frontal_face_detector()
+        return self.get("dlib:frontal_face_detector", load)
+
+    def dlib_shape_predictor(self, path: str):
+        def load():
+            import dlib
+            return dlib.shape_predictor(path)
+        return self.get(f"dlib:shape_predictor:{os.path.abspath(path)}", load)
+
+    def stats(self) -> List[ModelLoadStats]:
+        return list(self._stats.values())
+
+    def log_report(self) -> None:
+        if not self._stats:
+            logger.info("No models loaded")
+            return
+        for stat in self._stats.values():
+            memory = f"{stat.rss_delta_bytes / 1024 ** 2:.0f} MB" if stat.rss_delta_bytes is not None else "n/a"
+            logger.info(f"Model {stat.key}: load time {stat.load_seconds:.2f}s, memory {memory}")
+
+_registry = ModelRegistry()
+
+def get_registry() -> ModelRegistry:
+    return _registry
@@ -0,0 +1,198 @@
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+import cv2
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int
+    items: int = 0
+    busy_seconds: float = 0.0
+
+    def utilization(self, elapsed: float) -> float:
+        """Fraction of the stage's worker time spent inside its function."""
+        return self.busy_seconds / max(elapsed * self.workers, 1e-9)
+
+class _Stage:
+    def __init__(self, name: str, fn: Callable, workers: int, batch_size: int):
+        self.fn = fn
+        self.batch_size = batch_size
+        self.stats = StageStats(name, workers)
+        self.lock = threading.Lock()
+        self.finished = 0
+
+class Pipeline:
+    """Runs a source and a chain of stages on threads connected by bounded queues.
+
+    The source iterable (typically OpenCV decoding) runs on its own thread; each stage
+    runs `workers` threads. A full queue blocks the stage feeding it, so a slow stage
+    throttles everything upstream instead of buffering frames. A stage function maps
+    one item to one result (None drops the item); with `batch_size` > 1 it receives a
+    list of up to `batch_size` queued items and returns a list of results. Results are
+    yielded in completion order. Iterate inside `with` so an early exit stops the threads.
+    """
+
+    def __init__(self, source: Iterable, queue_size: int = 8, name: str = "pipeline"):
+        self.source = source
+        self.queue_size = queue_size
+        self.name = name
+        self.source_stats = StageStats("decode", 1)
+        self.stages: List[_Stage] = []
+        self.results = 0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._error: Optional[BaseException] = None
+
+    def add_stage(self, name: str, fn: Callable, workers: int = 1, batch_size: int = 1) -> "Pipeline":
+        self.stages.append(_Stage(name, fn, max(1, workers), max(1, batch_size)))
+        return self
+
+    def _put(self, target: queue.Queue, item: Any) -> None:
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, source: queue.Queue) -> Any:
+        while not self._stop.is_set():
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _fail(self, error: BaseException) -> None:
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    def _run_source(self, outbox: queue.Queue) -> None:
+        iterator = iter(self.source)
+        try:
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                item = next(iterator, _DONE)
+                self.source_stats.busy_seconds += time.perf_counter() - start
+                if item is _DONE:
+                    break
+                self.source_stats.items += 1
+                self._put(outbox, item)
+        except Exception as e:
+            logger.error(f"Error in {self.name} source: {e}")
+            self._fail(e)
+        finally:
+            # Closing a generator source runs its cleanup, such as releasing the capture.
+            if hasattr(iterator, 'close'):
+                iterator.close()
+        self._put(outbox, _DONE)
+
+    def _run_stage(self, stage: _Stage, inbox: queue.Queue, outbox: queue.Queue) -> None:
+        while True:
+            item = self._get(inbox)
+            if item is _DONE:
+                # Hand the marker on to sibling workers; the last one to finish passes it downstream.
+                self._put(inbox, _DONE)
+                with stage.lock:
+                    stage.finished += 1
+                    last = stage.finished == stage.stats.workers
+                if last:
+                    self._put(outbox, _DONE)
+                return
+            batch = [item]
+            while len(batch) < stage.batch_size:
+                try:
+                    item = inbox.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _DONE:
+                    self._put(inbox, _DONE)
+                    break
+                batch.append(item)
+            start = time.perf_counter()
+            try:
+                results = stage.fn(batch) if stage.batch_size > 1 else [stage.fn(batch[0])]
+            except Exception as e:
+                logger.error(f"Error in {self.name} stage {stage.stats.name}: {e}")
+                self._fail(e)
+                return
+            with stage.lock:
+                stage.stats.busy_seconds += time.perf_counter() - start
+                stage.stats.items += len(batch)
+            for result in results:
+                if result is not None:
+                    self._put(outbox, result)
+
+    def __enter__(self) -> "Pipeline":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[Any]:
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        self._threads = [threading.Thread(target=self._run_source, args=(queues[0],), name=f"{self.name}-decode", daemon=True)]
+        for index, stage in enumerate(self.stages):
+            for worker in range(stage.stats.workers):
+                self._threads.append(threading.Thread(
+                    target=self._run_stage, args=(stage, queues[index], queues[index + 1]),
+                    name=f"{self.name}-{stage.stats.name}-{worker}", daemon=True))
+        start = time.perf_counter()
+        for thread in self._threads:
+            thread.start()
+        try:
+            while True:
+                item = self._get(queues[-1])
+                if item is _DONE:
+                    break
+                self.results += 1
+                yield item
+        finally:
+            self.elapsed = time.perf_counter() - start
+            self.close()
+        if self._error is not None:
+            raise self._error
+
+    def close(self) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def stats(self) -> List[StageStats]:
+        return [self.source_stats] + [stage.stats for stage in self.stages]
+
+    def throughput(self) -> float:
+        """Source items per second over the pipeline's run."""
+        return self.source_stats.items / max(self.elapsed, 1e-9)
+
+    def log_stats(self) -> None:
+        stages = ", ".join(f"{stats.name} {stats.items} items {stats.utilization(self.elapsed):.0%} busy"
+                           for stats in self.stats())
+        logger.info(f"{self.name}: {self.source_stats.items} items in {self.elapsed:.2f}s "
+                    f"({self.throughput():.1f}/s); {stages}")
+
+def video_frames(video_path: str, rgb: bool = True) -> Iterator[Tuple[int, np.ndarray]]:
+    """Yields (index, frame) for every frame of a video, converted to RGB unless `rgb` is False."""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        index = 0
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield index, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) if rgb else frame
+            index += 1
+    finally:
+        cap.release()
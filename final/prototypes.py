@@ -0,0 +1,78 @@
+import logging
+from typing import Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def _sq_distances(points: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    sq = (np.einsum('ij,ij->i', points, points)[:, None] + np.einsum('ij,ij->i', centers, centers)[None, :]
+          - 2.0 * points @ centers.T)
+    return np.maximum(sq, 0.0)
+
+def kmeans_plus_plus(points: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """k-means++ seeding: each new center is drawn with probability proportional to its squared distance."""
+    centers = np.empty((k, points.shape[1]), dtype=points.dtype)
+    centers[0] = points[rng.integers(len(points))]
+    nearest = _sq_distances(points, centers[:1])[:, 0]
+    for i in range(1, k):
+        total = nearest.sum()
+        index = rng.choice(len(points), p=nearest / total) if total > 0 else rng.integers(len(points))
+        centers[i] = points[index]
+        nearest = np.minimum(nearest, _sq_distances(points, centers[i:i + 1])[:, 0])
+    return centers
+
+def acceptance_limits(radii: np.ndarray, threshold: float, max_widen: float = 1.25) -> np.ndarray:
+    """Distance below which each matched row accepts a query.
+
+    A prototype's radius widens the limit beyond `threshold` up to `threshold * max_widen`
+    but never tightens it, so tight or singleton clusters (radius 0) still accept
+    everything within the threshold and one spread-out cluster cannot accept faces far
+    beyond it.
+    """
+    return np.minimum(np.maximum(radii, threshold), threshold * max_widen)
+
+def compress_embeddings(embeddings: np.ndarray, k: int, metric: str = "cosine", radius_quantile: float = 0.99,
+                        iterations: int = 25, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Reduces embeddings to at most k k-means prototypes.
+
+    Returns (prototypes, radii), where each radius is the `radius_quantile` of the
+    distances from a prototype to the embeddings assigned to it. For the cosine and
+    euclidean_l2 metrics this is spherical k-means on unit vectors.
+    """
+    spherical = metric in ("cosine", "euclidean_l2")
+    points = np.asarray(embeddings, dtype=np.float32)
+    if spherical:
+        points = points / np.maximum(np.linalg.norm(points, axis=1, keepdims=True), 1e-12)
+    k = min(k, len(points))
+    rng = np.random.default_rng(seed)
+    centers = kmeans_plus_plus(points, k, rng)
+    assignment = None
+    for _ in range(iterations):
+        sq = _sq_distances(points, centers)
+        new_assignment = np.argmin(sq, axis=1)
+        if assignment is not None and np.array_equal(new_assignment, assignment):
+            break
+        assignment = new_assignment
+        counts = np.bincount(assignment, minlength=k)
+        membership = np.zeros((k, len(points)), dtype=points.dtype)
+        membership[assignment, np.arange(len(points))] = 1.0
+        sums = membership @ points
+        for empty in np.flatnonzero(counts == 0):
+            # Re-seed an empty cluster at the point farthest from its center.
+            farthest = int(np.argmax(sq[np.arange(len(points)), assignment]))
+            sums[empty], counts[empty] = points[farthest], 1
+        centers = sums / counts[:, None]
+        if spherical:
+            centers /= np.maximum(np.linalg.norm(centers, axis=1, keepdims=True), 1e-12)
+
+    assignment = np.argmin(_sq_distances(points, centers), axis=1)
+    if metric == "cosine":
+        distances = 1.0 - np.einsum('ij,ij->i', points, centers[assignment])
+    else:
+        distances = np.linalg.norm(points - centers[assignment], axis=1)
+    radii = np.zeros(k, dtype=np.float32)
+    for cluster in range(k):
+        members = distances[assignment == cluster]
+        if len(members):
+            radii[cluster] = np.quantile(members, radius_quantile)
+    return centers.astype(np.float32), radii
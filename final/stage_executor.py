@@ -0,0 +1,84 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+THREAD_VARIABLES = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+@contextmanager
+def _thread_environment(num_threads: int) -> Iterator[None]:
+    """Sets the native thread-count variables for processes started inside the block.
+
+    OpenMP, MKL and OpenBLAS read them once, when numpy or torch is first imported.
+    A spawned worker imports them while unpickling its main module, before any
+    initializer runs, so the variables have to be in the environment it inherits.
+    """
+    saved = {variable: os.environ.get(variable) for variable in THREAD_VARIABLES}
+    os.environ.update({variable: str(num_threads) for variable in THREAD_VARIABLES})
+    try:
+        yield
+    finally:
+        for variable, value in saved.items():
+            if value is None:
+                os.environ.pop(variable, None)
+            else:
+                os.environ[variable] = value
+
+def _noop() -> None:
+    pass
+
+def _init_worker(num_threads: int) -> None:
+    """Caps torch's and OpenCV's thread pools, which can still be resized after import."""
+    import torch
+    import cv2
+    torch.set_num_threads(num_threads)
+    cv2.setNumThreads(num_threads)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s')
+
+class StageExecutor:
+    """Runs CPU-bound pipeline stages off the event loop.
+
+    With more than one worker, stages run in a process pool and each worker's thread
+    budget is the machine's cores divided by the worker count. With one worker they
+    run on a thread in this process. Stage functions and arguments must be picklable.
+    """
+
+    def __init__(self, num_workers: int, threads_per_worker: Optional[int] = None):
+        self.num_workers = max(1, num_workers)
+        cpu_count = os.cpu_count() or 1
+        self.threads_per_worker = threads_per_worker or max(1, cpu_count // self.num_workers)
+        self._executor: Optional[Executor] = None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.num_workers > 1:
+                logger.info(f"Starting {self.num_workers} stage workers with {self.threads_per_worker} threads each")
+                with _thread_environment(self.threads_per_worker):
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.num_workers,
+                        mp_context=multiprocessing.get_context('spawn'),
+                        initializer=_init_worker,
+                        initargs=(self.threads_per_worker,)
+                    )
+                    # Workers start on demand; start them all now, while the variables are set.
+                    for future in [self._executor.submit(_noop) for _ in range(self.num_workers)]:
+                        future.result()
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='stage')
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -1,2 +1,2 @@
-import torch
-print(torch.cuda.is_available())
\ No newline at end of file
+import torch
+print(torch.cuda.is_available())
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules live flat in final/; make them importable from the tests.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
\ No newline at end of file
@@ -0,0 +1,72 @@
+import os
+import numpy as np
+import pytest
+from scipy.io import wavfile
+from audio_buffer import AudioBufferService, with_last_flag
+
+SR = 16000
+
+@pytest.fixture
+def tracks(tmp_path):
+    rng = np.random.default_rng(0)
+    paths = []
+    for index in range(3):
+        path = tmp_path / f"track{index}.wav"
+        wavfile.write(str(path), SR, (0.1 * rng.standard_normal(SR)).astype(np.float32))
+        paths.append(str(path))
+    return paths
+
+def test_with_last_flag():
+    assert list(with_last_flag([1, 2, 3])) == [(1, False), (2, False), (3, True)]
+    assert list(with_last_flag([])) == []
+
+def test_load_matches_the_file_and_is_decoded_once(tmp_path, tracks):
+    buffer = AudioBufferService(str(tmp_path / "cache"), sr=SR)
+    _, expected = wavfile.read(tracks[0])
+    np.testing.assert_allclose(buffer.load(tracks[0]), expected, atol=1e-6)
+    pcm_path = buffer._pcm_path(tracks[0])
+    mtime = os.stat(pcm_path).st_mtime_ns
+    buffer.release(tracks[0])
+    with buffer.open(tracks[0]) as audio:
+        assert len(audio) == SR
+    assert os.stat(pcm_path).st_mtime_ns >= mtime
+    assert sum(name.endswith(AudioBufferService.SUFFIX) for name in os.listdir(buffer.cache_dir)) == 1
+
+def test_slice_is_a_view_of_the_track(tmp_path, tracks):
+    buffer = AudioBufferService(str(tmp_path / "cache"), sr=SR)
+    with buffer.open(tracks[0]) as audio:
+        piece = buffer.slice(tracks[0], 0.25, 0.5)
+        np.testing.assert_array_equal(piece, audio[SR // 4:SR // 2])
+        buffer.release(tracks[0])
+
+def test_mapped_tracks_survive_eviction(tmp_path, tracks):
+    # Room for a single decoded track.
+    buffer = AudioBufferService(str(tmp_path / "cache"), sr=SR, max_bytes=SR * 4)
+    first = buffer.load(tracks[0])
+    with buffer.open(tracks[1]):
+        assert os.path.exists(buffer._pcm_path(tracks[0]))
+    buffer.release(tracks[0])
+    assert len(first) == SR
+    with buffer.open(tracks[2]):
+        pass
+    assert not os.path.exists(buffer._pcm_path(tracks[0]))
+    assert not os.path.exists(buffer._pcm_path(tracks[1]))
+    assert os.path.exists(buffer._pcm_path(tracks[2]))
+
+def test_map_is_dropped_after_the_last_release(tmp_path, tracks):
+    buffer = AudioBufferService(str(tmp_path / "cache"), sr=SR)
+    pcm_path = buffer._pcm_path(tracks[0])
+    buffer.load(tracks[0])
+    with buffer.open(tracks[0]):
+        pass
+    assert pcm_path in buffer._buffers
+    buffer.release(tracks[0])
+    assert pcm_path not in buffer._buffers
+
+def test_iter_blocks_covers_the_track(tmp_path, tracks):
+    buffer = AudioBufferService(str(tmp_path / "cache"), sr=SR)
+    decoded = np.concatenate(list(buffer.iter_blocks(tracks[0], block_seconds=0.3)))
+    cached = np.concatenate(list(buffer.iter_blocks(tracks[0], block_seconds=0.3)))
+    assert len(decoded) == SR
+    np.testing.assert_array_equal(decoded, cached)
+    assert not buffer._buffers
\ No newline at end of file
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from audio_processing import SpeechRegions, VoiceActivityDetector
+
+SR = 16000
+
+def bursts(rng, spans, seconds=6.0):
+    """Low noise with loud noise bursts at the given (start, end) seconds."""
+    audio = 0.001 * rng.standard_normal(int(seconds * SR))
+    for start, end in spans:
+        first, last = int(start * SR), int(end * SR)
+        audio[first:last] += 0.3 * rng.standard_normal(last - first)
+    return audio.astype(np.float32)
+
+def test_detects_bursts():
+    rng = np.random.default_rng(0)
+    audio = bursts(rng, [(1.0, 2.0), (3.5, 4.5)])
+    regions = VoiceActivityDetector(padding_seconds=0.0).detect(audio, SR)
+    assert len(regions) == 2
+    np.testing.assert_allclose(regions.spans / SR, [[1.0, 2.0], [3.5, 4.5]], atol=0.05)
+
+def test_short_gaps_are_bridged_and_short_blips_dropped():
+    rng = np.random.default_rng(1)
+    audio = bursts(rng, [(1.0, 2.0), (2.1, 3.0), (4.5, 4.55)])
+    regions = VoiceActivityDetector(padding_seconds=0.0).detect(audio, SR)
+    assert len(regions) == 1
+    np.testing.assert_allclose(regions.spans / SR, [[1.0, 3.0]], atol=0.05)
+
+def test_silence_has_no_speech():
+    audio = np.zeros(SR, dtype=np.float32)
+    assert len(VoiceActivityDetector().detect(audio, SR)) == 0
+
+@pytest.fixture
+def regions():
+    return SpeechRegions(spans=np.array([[16000, 32000], [64000, 72000]]), sr=SR, gap_seconds=0.5)
+
+def test_compact_joins_spans_with_gaps(regions):
+    audio = np.arange(100000, dtype=np.float32)
+    compact = regions.compact(audio)
+    assert len(compact) == 16000 + 8000 + 8000
+    np.testing.assert_array_equal(compact[:16000], audio[16000:32000])
+    np.testing.assert_array_equal(compact[16000:24000], 0)
+    np.testing.assert_array_equal(compact[24000:], audio[64000:72000])
+    assert regions.speech_seconds == 1.5
+
+def test_to_original_maps_compact_times_back(regions):
+    np.testing.assert_allclose(regions.to_original([0.0, 0.5, 1.0, 1.2, 1.5, 1.75, 2.0]),
+                               [1.0, 1.5, 2.0, 2.0, 4.0, 4.25, 4.5])
+
+def test_remap_segments(regions):
+    segments = regions.remap_segments([{'start': 0.25, 'end': 1.75}])
+    assert segments == [{'start': 1.25, 'end': 4.25}]
\ No newline at end of file
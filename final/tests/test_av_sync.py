@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from av_sync import SyncWindows, align_to_grid, audio_envelope, cross_correlation_offset, fill_gaps, resample
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+def smooth_noise(rng, n):
+    return np.convolve(rng.standard_normal(n + 8), np.ones(9) / 9, mode='valid')
+
+@pytest.mark.parametrize("lag", [0, 3, -4])
+def test_positive_lag_means_audio_trails_lips(rng, lag):
+    lip = smooth_noise(rng, 300)
+    # envelope[i + lag] == lip[i]
+    envelope = np.roll(lip, lag)
+    found, peak = cross_correlation_offset(lip, envelope, max_lag=10)
+    assert found == lag
+    assert peak > 0.9
+
+def test_max_lag_limits_the_search(rng):
+    lip = smooth_noise(rng, 300)
+    found, _ = cross_correlation_offset(lip, np.roll(lip, 20), max_lag=5)
+    assert abs(found) <= 5
+
+def test_audio_envelope_is_rms_per_video_frame():
+    sr, fps = 1000, 10
+    audio = np.concatenate([np.full(100, 0.5), np.full(100, -2.0)]).astype(np.float32)
+    envelope = audio_envelope(audio, sr, fps)
+    np.testing.assert_allclose(envelope, [0.5, 2.0], rtol=1e-6)
+
+def test_fill_gaps_interpolates_nan():
+    np.testing.assert_allclose(fill_gaps(np.array([1.0, np.nan, 3.0, np.nan])), [1.0, 2.0, 3.0, 3.0])
+    np.testing.assert_array_equal(fill_gaps(np.array([np.nan, np.nan])), [0.0, 0.0])
+
+def test_sync_windows_match_corrcoef(rng):
+    lip = smooth_noise(rng, 200)
+    envelope = lip + 0.5 * rng.standard_normal(200)
+    lip[[5, 50, 51, 120]] = np.nan
+    windows = SyncWindows(lip, envelope, fps=25.0)
+    for a, b in [(0, 200), (10, 60), (40, 55), (100, 190)]:
+        valid = ~np.isnan(lip[a:b])
+        expected = np.corrcoef(lip[a:b][valid], envelope[a:b][valid])[0, 1]
+        assert windows.correlation(a, b) == pytest.approx(expected, abs=1e-9)
+        assert windows.coverage(a, b) == pytest.approx(valid.mean())
+
+def test_sync_windows_apply_the_lag(rng):
+    lip = smooth_noise(rng, 200)
+    envelope = np.roll(lip, 4)
+    assert SyncWindows(lip, envelope, fps=25.0, lag=4).correlation(0, 190) == pytest.approx(1.0)
+
+def test_sync_windows_score_seconds_of_the_source_video(rng):
+    lip = smooth_noise(rng, 100)
+    windows = SyncWindows(lip, lip, fps=10.0, start_time=5.0)
+    assert windows.frame_range(6.0, 7.0) == (10, 20)
+    assert windows.frame_range(0.0, 100.0) == (0, 100)
+    correlation, coverage = windows.score(6.0, 7.0)
+    assert correlation == pytest.approx(1.0)
+    assert coverage == 1.0
+
+def test_sync_windows_undefined_correlation_is_zero():
+    windows = SyncWindows(np.ones(10), np.arange(10.0), fps=10.0)
+    assert windows.correlation(0, 10) == 0.0
+    assert windows.correlation(3, 4) == 0.0
+
+def test_resample_is_linear_between_samples():
+    values = np.array([[0.0, 10.0, 20.0], [1.0, 1.0, 3.0]])
+    np.testing.assert_allclose(resample(values, 2.0, np.array([0.0, 0.25, 0.75, 5.0])),
+                               [[0.0, 5.0, 15.0, 20.0], [1.0, 1.0, 2.0, 3.0]])
+
+def test_align_to_grid_puts_both_signals_on_video_time():
+    fps, feature_rate = 25.0, 31.25
+    t_video = np.arange(100) / fps
+    t_audio = np.arange(200) / feature_rate
+    lip = np.sin(t_video)
+    features = np.stack([np.sin(t_audio), np.cos(t_audio)])
+    lip[10] = np.nan
+    lip_k, features_k = align_to_grid(lip, fps, features, feature_rate)
+    assert len(lip_k) == features_k.shape[1] == 100
+    grid = np.arange(100) / fps
+    np.testing.assert_allclose(features_k[0], np.sin(grid), atol=1e-3)
+    np.testing.assert_allclose(lip_k, np.sin(grid), atol=1e-3)
\ No newline at end of file
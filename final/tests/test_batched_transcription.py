@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+import numpy as np
+import pytest
+import batched_transcription
+from batched_transcription import BatchedTranscriber, quietest_cut
+
+SR = 16000
+
+def test_quietest_cut_finds_the_gap():
+    rng = np.random.default_rng(0)
+    audio = rng.standard_normal(40 * SR).astype(np.float32)
+    audio[int(27.0 * SR):int(27.2 * SR)] = 0
+    cut = quietest_cut(audio, 0, 30 * SR, SR)
+    assert 27.0 * SR <= cut <= 27.2 * SR
+
+def test_quietest_cut_without_room_returns_end():
+    audio = np.ones(SR, dtype=np.float32)
+    assert quietest_cut(audio, 100, 100, SR) == 100
+
+@pytest.mark.parametrize("gaps", [[27.0, 52.0, 80.0], []])
+def test_windows_tile_the_track(gaps):
+    rng = np.random.default_rng(0)
+    audio = rng.standard_normal(95 * SR).astype(np.float32)
+    for gap in gaps:
+        audio[int(gap * SR):int((gap + 0.2) * SR)] = 0
+    windows = BatchedTranscriber(vad=None).plan_windows("alice", audio, SR)
+    assert all(len(window.audio) <= 30 * SR for window in windows)
+    np.testing.assert_array_equal(np.concatenate([window.audio for window in windows]), audio)
+    starts = [int(window.start * SR) for window in windows]
+    assert starts == list(np.cumsum([0] + [len(window.audio) for window in windows[:-1]]))
+    for gap, start in zip(gaps, starts[1:]):
+        assert gap * SR <= start <= (gap + 0.2) * SR
+
+def test_vad_windows_hold_whole_spans():
+    spans = np.array([[0, 10], [12, 25], [27, 40], [45, 50]]) * SR
+    vad = SimpleNamespace(detect=lambda audio, sr: SimpleNamespace(spans=spans))
+    audio = np.ones(60 * SR, dtype=np.float32)
+    windows = BatchedTranscriber(vad=vad).plan_windows("alice", audio, SR)
+    assert [(window.start, window.start + len(window.audio) / SR) for window in windows] == [(0.0, 25.0), (27.0, 50.0)]
+
+def decoding_result(compression_ratio=1.0, avg_logprob=-0.2, no_speech_prob=0.0):
+    return SimpleNamespace(compression_ratio=compression_ratio, avg_logprob=avg_logprob, no_speech_prob=no_speech_prob)
+
+def test_needs_fallback():
+    assert not BatchedTranscriber.needs_fallback(decoding_result())
+    assert BatchedTranscriber.needs_fallback(decoding_result(compression_ratio=3.0))
+    assert BatchedTranscriber.needs_fallback(decoding_result(avg_logprob=-1.5))
+    # Unlikely text in a silent window is skipped as silence, not retried.
+    assert not BatchedTranscriber.needs_fallback(decoding_result(avg_logprob=-1.5, no_speech_prob=0.9))
+
+def test_only_degenerate_windows_are_redecoded(monkeypatch):
+    calls = []
+
+    def decode(model, mel, options):
+        calls.append((options.temperature, len(mel)))
+        if len(calls) == 1:
+            return [decoding_result(), decoding_result(compression_ratio=3.0), decoding_result()]
+        # Window 1 keeps repeating itself below temperature 0.4.
+        return [decoding_result(compression_ratio=3.0 if options.temperature < 0.4 else 1.0)]
+
+    model = SimpleNamespace(dims=SimpleNamespace(n_mels=80))
+    monkeypatch.setattr(BatchedTranscriber, "whisper_model", property(lambda self: model))
+    monkeypatch.setattr(batched_transcription.whisper, "decode", decode)
+    transcriber = BatchedTranscriber()
+    transcriber.device = batched_transcription.torch.device("cpu")
+    windows = [batched_transcription.TranscriptionWindow("alice", 0.0, np.zeros(SR, dtype=np.float32))] * 3
+    results = transcriber.decode_batch(windows)
+    assert calls == [(0.0, 3), (0.2, 1), (0.4, 1)]
+    assert all(not BatchedTranscriber.needs_fallback(result) for result in results)
\ No newline at end of file
@@ -0,0 +1,40 @@
+import os
+from cache_utils import cache_key, evict_lru, file_digest
+
+def write_entries(directory, sizes):
+    paths = []
+    for index, size in enumerate(sizes):
+        path = directory / f"entry{index}.bin"
+        path.write_bytes(b"x" * size)
+        # Oldest first: entry0 is the least recently used.
+        os.utime(path, (1000 + index, 1000 + index))
+        paths.append(path)
+    return paths
+
+def test_cache_key_is_order_independent_and_sensitive_to_values():
+    assert cache_key(a=1, b="x") == cache_key(b="x", a=1)
+    assert cache_key(a=1, b="x") != cache_key(a=2, b="x")
+
+def test_file_digest_follows_content(tmp_path):
+    path = tmp_path / "file"
+    path.write_bytes(b"one")
+    first = file_digest(str(path), chunk_size=2)
+    path.write_bytes(b"two")
+    assert file_digest(str(path), chunk_size=2) != first
+
+def test_evict_lru_removes_oldest_first(tmp_path):
+    paths = write_entries(tmp_path, [100, 100, 100, 100])
+    assert evict_lru(str(tmp_path), 250) == 2
+    assert [path.exists() for path in paths] == [False, False, True, True]
+
+def test_evict_lru_skips_kept_files(tmp_path):
+    paths = write_entries(tmp_path, [100, 100, 100, 100])
+    evict_lru(str(tmp_path), 250, keep=[str(paths[0])])
+    assert [path.exists() for path in paths] == [True, False, False, True]
+
+def test_evict_lru_only_counts_matching_suffix(tmp_path):
+    paths = write_entries(tmp_path, [100, 100])
+    other = tmp_path / "entry.keep"
+    other.write_bytes(b"x" * 1000)
+    assert evict_lru(str(tmp_path), 150, suffix=".bin") == 1
+    assert other.exists() and not paths[0].exists() and paths[1].exists()
\ No newline at end of file
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from dtw import band_bound, dtw_antidiagonal, dtw_distance, dtw_naive, njit
+
+def dtw_banded_reference(x, y, band):
+    """O(n*m) DTW restricted to the cells band_bound allows."""
+    n, m = len(x), len(y)
+    bound = band_bound(n, m, band)
+    matrix = np.full((n + 1, m + 1), np.inf)
+    matrix[0, 0] = 0.0
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            if abs(i * m - j * n) <= bound:
+                cost = abs(x[i - 1] - y[j - 1])
+                matrix[i, j] = cost + min(matrix[i - 1, j], matrix[i, j - 1], matrix[i - 1, j - 1])
+    return float(matrix[n, m])
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+@pytest.mark.parametrize("n, m", [(1, 1), (7, 7), (20, 13), (13, 20), (40, 41)])
+def test_unconstrained_matches_naive(rng, n, m):
+    x, y = rng.standard_normal(n), rng.standard_normal(m)
+    expected = dtw_naive(x, y)
+    assert dtw_antidiagonal(x, y) == pytest.approx(expected)
+    assert dtw_distance(x, y, compiled=False) == pytest.approx(expected)
+    if njit is not None:
+        assert dtw_distance(x, y) == pytest.approx(expected)
+
+@pytest.mark.parametrize("n, m, band", [(30, 30, 1), (30, 30, 4), (25, 40, 3), (40, 25, 5), (50, 12, 2)])
+def test_banded_matches_reference(rng, n, m, band):
+    x, y = rng.standard_normal(n), rng.standard_normal(m)
+    expected = dtw_banded_reference(x, y, band)
+    assert dtw_antidiagonal(x, y, band) == pytest.approx(expected)
+    if njit is not None:
+        assert dtw_distance(x, y, band) == pytest.approx(expected)
+
+def test_band_is_exactly_band_cells_for_equal_lengths():
+    n = 10
+    bound = band_bound(n, n, 3)
+    allowed = [(i, j) for i in range(n + 1) for j in range(n + 1) if abs(i * n - j * n) <= bound]
+    assert max(abs(i - j) for i, j in allowed) == 3
+
+def test_band_never_lowers_the_unconstrained_distance(rng):
+    x, y = rng.standard_normal(30), rng.standard_normal(30)
+    assert dtw_distance(x, y, 2, compiled=False) >= dtw_naive(x, y) - 1e-9
+
+def test_empty_sequence_is_infinite():
+    assert dtw_distance(np.zeros(0), np.ones(3)) == float('inf')
\ No newline at end of file
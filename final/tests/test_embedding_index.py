@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from embedding_index import EmbeddingIndex
+
+def brute_force(gallery, labels, queries, metric):
+    if metric in ("cosine", "euclidean_l2"):
+        gallery = gallery / np.linalg.norm(gallery, axis=1, keepdims=True)
+        queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    if metric == "cosine":
+        distances = 1.0 - queries @ gallery.T
+    else:
+        distances = np.linalg.norm(queries[:, None, :] - gallery[None, :, :], axis=2)
+    best = np.argmin(distances, axis=1)
+    return [labels[i] for i in best], distances[np.arange(len(queries)), best]
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    gallery = (rng.standard_normal((60, 16)) * rng.uniform(0.5, 3.0, (60, 1))).astype(np.float32)
+    labels = [f"person_{i % 4}" for i in range(60)]
+    queries = rng.standard_normal((25, 16)).astype(np.float32)
+    return gallery, labels, queries
+
+@pytest.mark.parametrize("metric", ["cosine", "euclidean", "euclidean_l2"])
+def test_search_matches_brute_force(data, metric):
+    gallery, labels, queries = data
+    index = EmbeddingIndex(metric, initial_capacity=4)
+    for row, label in zip(gallery, labels):
+        index.add(label, row)
+    names, distances, _ = index.search(queries)
+    expected_names, expected_distances = brute_force(gallery, labels, queries, metric)
+    assert names == expected_names
+    np.testing.assert_allclose(distances, expected_distances, rtol=1e-4, atol=1e-4)
+
+def test_remove_returns_rows_and_keeps_the_rest(data):
+    gallery, labels, queries = data
+    index = EmbeddingIndex("euclidean")
+    for row, label in zip(gallery, labels):
+        index.add(label, row)
+    removed = index.remove("person_1")
+    assert len(removed) == 15
+    assert len(index) == 45
+    assert "person_1" not in index.names
+    names, _, _ = index.search(queries)
+    assert "person_1" not in names
+
+def test_empty_index_returns_unknown():
+    names, distances, _ = EmbeddingIndex().search(np.ones((2, 4)))
+    assert names == ["Unknown", "Unknown"]
+    assert np.isinf(distances).all()
+
+def test_unknown_metric_is_rejected():
+    with pytest.raises(ValueError):
+        EmbeddingIndex("manhattan")
\ No newline at end of file
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("deepface")
+torch = pytest.importorskip("torch")
+from face_recognition_module import FaceRecognizer
+
+class CountingModel(torch.nn.Module):
+    input_shape = (16, 16)
+
+    def __init__(self):
+        super().__init__()
+        self.batch_sizes = []
+
+    def forward(self, faces):
+        self.batch_sizes.append(len(faces))
+        return faces.reshape(len(faces), -1)[:, :4]
+
+@pytest.fixture
+def recognizer(monkeypatch):
+    model = CountingModel()
+    monkeypatch.setattr(FaceRecognizer, "model", property(lambda self: model))
+    recognizer = FaceRecognizer(batch_size=4)
+    recognizer.device = torch.device("cpu")
+    return recognizer
+
+def test_embeddings_are_computed_in_batches(recognizer):
+    rng = np.random.default_rng(0)
+    faces = [rng.integers(0, 255, (20 + i, 18, 3), dtype=np.uint8) for i in range(10)]
+    embeddings = recognizer.get_embeddings(faces)
+    assert recognizer.model.batch_sizes == [4, 4, 2]
+    assert embeddings.shape == (10, 4)
+    # Batching does not change any face's embedding.
+    for face, embedding in zip(faces, embeddings):
+        np.testing.assert_allclose(recognizer.get_embedding(face), embedding, rtol=1e-6)
+
+def test_prototype_radius_widens_acceptance_up_to_the_cap(recognizer):
+    recognizer.threshold, recognizer.max_widen = 0.4, 1.25
+    recognizer.gallery.add("alice", np.array([[1.0, 0.0]]), radii=np.array([1.0]))
+    # Cosine distances 0.45 (within the capped limit of 0.5) and 0.6 (within the radius, beyond the cap).
+    queries = np.array([[0.55, np.sqrt(1 - 0.55 ** 2)], [0.4, np.sqrt(1 - 0.4 ** 2)]])
+    assert recognizer.match_embeddings(queries) == ["alice", "Unknown"]
\ No newline at end of file
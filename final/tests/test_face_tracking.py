@@ -0,0 +1,42 @@
+import numpy as np
+from face_tracking import FaceTracker, iou_matrix
+
+def test_iou_matrix():
+    a = np.array([[0, 0, 10, 10], [100, 100, 10, 10]])
+    b = np.array([[0, 0, 10, 10], [5, 0, 10, 10]])
+    np.testing.assert_allclose(iou_matrix(a, b), [[1.0, 50 / 150], [0.0, 0.0]])
+
+def test_moving_face_keeps_its_track():
+    tracker = FaceTracker()
+    first = tracker.update([(100, 100, 50, 50)], 0)[0]
+    for frame in range(1, 10):
+        track = tracker.update([(100 + 5 * frame, 100, 50, 50)], frame)[0]
+        assert track.track_id == first.track_id
+
+def test_fast_mover_matches_by_centroid():
+    tracker = FaceTracker(iou_threshold=0.3, centroid_threshold=0.5)
+    first = tracker.update([(100, 100, 50, 50)], 0)[0]
+    # Moved 24 px diagonally: IoU below 0.3 but within half a face size.
+    assert tracker.update([(117, 117, 50, 50)], 1)[0].track_id == first.track_id
+
+def test_two_faces_get_separate_tracks():
+    tracker = FaceTracker()
+    tracks = tracker.update([(0, 0, 50, 50), (300, 0, 50, 50)], 0)
+    assert tracks[0].track_id != tracks[1].track_id
+    swapped = tracker.update([(302, 0, 50, 50), (2, 0, 50, 50)], 1)
+    assert [track.track_id for track in swapped] == [tracks[1].track_id, tracks[0].track_id]
+
+def test_lost_face_comes_back_as_a_new_track():
+    tracker = FaceTracker(max_misses=2)
+    first = tracker.update([(0, 0, 50, 50)], 0)[0]
+    for frame in range(1, 4):
+        tracker.update([], frame)
+    assert tracker.update([(0, 0, 50, 50)], 4)[0].track_id != first.track_id
+
+def test_identity_is_refreshed_every_interval():
+    tracker = FaceTracker(refresh_interval=10)
+    track = tracker.update([(0, 0, 50, 50)], 0)[0]
+    assert tracker.needs_embedding(track, 0)
+    tracker.set_identity(track, "alice", 0)
+    assert not tracker.needs_embedding(track, 9)
+    assert tracker.needs_embedding(track, 10)
\ No newline at end of file
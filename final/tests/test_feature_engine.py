@@ -0,0 +1,23 @@
+import numpy as np
+import librosa
+from feature_engine import FeatureEngine
+
+SR = 16000
+
+def test_mfcc_matches_librosa():
+    rng = np.random.default_rng(0)
+    audio = rng.standard_normal(3 * SR + 123).astype(np.float32)
+    engine = FeatureEngine(sr=SR, batch_frames=7)
+    expected = librosa.feature.mfcc(y=audio, sr=SR, n_mfcc=13)
+    np.testing.assert_allclose(engine.mfcc_from_audio(audio), expected, rtol=1e-3, atol=1e-2)
+
+def test_mel_power_batches_agree():
+    rng = np.random.default_rng(1)
+    audio = rng.standard_normal(SR).astype(np.float32)
+    np.testing.assert_allclose(FeatureEngine(sr=SR, batch_frames=3).mel_power(audio),
+                               FeatureEngine(sr=SR, batch_frames=4096).mel_power(audio), rtol=1e-4)
+
+def test_time_frame_round_trip():
+    engine = FeatureEngine(sr=SR, hop_length=512)
+    assert engine.frames_per_second == SR / 512
+    assert engine.time_to_frame(engine.frame_to_time(40)) == 40
\ No newline at end of file
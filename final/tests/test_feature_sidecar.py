@@ -0,0 +1,22 @@
+import json
+import numpy as np
+from feature_sidecar import load_feature_sidecar, segment_features, write_feature_sidecar
+
+def test_sidecar_round_trip(tmp_path):
+    rng = np.random.default_rng(0)
+    segments = [{'text': 'a', 'mfcc': rng.standard_normal((13, 5)).astype(np.float32)},
+                {'text': 'no features'},
+                {'text': 'b', 'mfcc': rng.standard_normal((13, 7)).astype(np.float32)}]
+    originals = [segment.get('mfcc') for segment in segments]
+    json_path = str(tmp_path / "analysis.json")
+    write_feature_sidecar(segments, json_path)
+    # The segments now hold only JSON-serializable references.
+    json.dumps(segments)
+    assert segments[0]['mfcc'] == {'file': 'analysis.mfcc.npy', 'offset': 0, 'frames': 5}
+    assert segments[2]['mfcc']['offset'] == 5
+    assert 'mfcc' not in segments[1]
+    sidecar = load_feature_sidecar(json_path)
+    assert sidecar.dtype == np.float16 and sidecar.shape == (12, 13)
+    for segment, original in zip(segments, originals):
+        if original is not None:
+            np.testing.assert_allclose(segment_features(sidecar, segment), original, atol=1e-2)
\ No newline at end of file
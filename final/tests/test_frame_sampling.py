@@ -0,0 +1,42 @@
+import numpy as np
+from frame_sampling import EnrollmentSampler, EnrollmentSampling
+
+def test_stride_and_unchanged_frames_are_skipped():
+    sampler = EnrollmentSampler(EnrollmentSampling(stride=5, max_gap=30))
+    frame = np.full((72, 128, 3), 100, dtype=np.uint8)
+    sampled = [index for index in range(60) if sampler.is_candidate(index) and sampler.should_sample(index, frame)]
+    assert sampled == [0, 30]
+    assert sampler.stats.skipped_stride == 48
+    assert sampler.stats.skipped_unchanged == 10
+
+def test_scene_change_is_sampled():
+    sampler = EnrollmentSampler(EnrollmentSampling(stride=1))
+    dark = np.zeros((72, 128, 3), dtype=np.uint8)
+    bright = np.zeros((72, 128, 3), dtype=np.uint8)
+    bright[..., 2] = 255
+    assert sampler.should_sample(0, dark)
+    assert not sampler.should_sample(1, dark)
+    assert sampler.should_sample(2, bright)
+
+def feed(sampler, rng, frames):
+    direction = rng.standard_normal(8)
+    for _ in range(frames):
+        if sampler.update(direction + 0.01 * rng.standard_normal((1, 8))):
+            break
+    return sampler.stats
+
+def test_no_early_stop_by_default():
+    stats = feed(EnrollmentSampler(EnrollmentSampling()), np.random.default_rng(0), 200)
+    assert stats.faces_embedded == 200 and not stats.stopped_early
+
+def test_early_stop_waits_for_min_faces():
+    stats = feed(EnrollmentSampler(EnrollmentSampling(stability_patience=3, min_faces=50)), np.random.default_rng(0), 200)
+    assert stats.stopped_early and stats.faces_embedded == 50
+    stats = feed(EnrollmentSampler(EnrollmentSampling(stability_patience=3, min_faces=5)), np.random.default_rng(0), 200)
+    assert stats.stopped_early and stats.faces_embedded == 5
+
+def test_changing_embeddings_do_not_stop():
+    sampler = EnrollmentSampler(EnrollmentSampling(stability_patience=3, min_faces=1))
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        assert not sampler.update(rng.standard_normal((1, 8)) * 10)
\ No newline at end of file
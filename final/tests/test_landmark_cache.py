@@ -0,0 +1,56 @@
+import os
+import numpy as np
+import pytest
+from landmark_cache import LandmarkCache
+
+@pytest.fixture
+def files(tmp_path):
+    video = tmp_path / "video.avi"
+    predictor = tmp_path / "predictor.dat"
+    video.write_bytes(b"frames")
+    predictor.write_bytes(b"model")
+    return str(video), str(predictor)
+
+@pytest.fixture
+def cache(tmp_path):
+    return LandmarkCache(str(tmp_path / "cache"))
+
+SETTINGS = {"detect_interval": 1, "roi_margin": 0.1}
+
+def test_round_trip_keeps_nan_rows(cache, files):
+    video, predictor = files
+    landmarks = np.arange(3 * 40, dtype=np.float32).reshape(3, 40)
+    landmarks[1] = np.nan
+    movements = np.array([1.0, np.nan, 2.5], dtype=np.float32)
+    key = cache.key(video, 0, 3, predictor, SETTINGS)
+    assert cache.get(key) is None
+    cache.put(key, landmarks, movements)
+    cached_landmarks, cached_movements = cache.get(key)
+    np.testing.assert_array_equal(cached_landmarks, landmarks)
+    np.testing.assert_array_equal(cached_movements, movements)
+
+def test_key_changes_with_inputs_settings_and_version(cache, files, monkeypatch):
+    video, predictor = files
+    key = cache.key(video, 0, 3, predictor, SETTINGS)
+    assert key == cache.key(video, 0, 3, predictor, dict(SETTINGS))
+    assert key != cache.key(video, 0, 4, predictor, SETTINGS)
+    assert key != cache.key(video, 0, 3, predictor, {**SETTINGS, "detect_interval": 5})
+    monkeypatch.setattr(LandmarkCache, "VERSION", LandmarkCache.VERSION + 1)
+    assert key != cache.key(video, 0, 3, predictor, SETTINGS)
+
+def test_key_follows_file_contents(cache, files):
+    video, predictor = files
+    key = cache.key(video, 0, 3, predictor, SETTINGS)
+    with open(video, "ab") as f:
+        f.write(b"more")
+    os.utime(video, ns=(os.stat(video).st_atime_ns, os.stat(video).st_mtime_ns + 10 ** 9))
+    assert key != cache.key(video, 0, 3, predictor, SETTINGS)
+
+def test_unreadable_entry_is_discarded(cache, files):
+    video, predictor = files
+    key = cache.key(video, 0, 3, predictor, SETTINGS)
+    path = os.path.join(cache.cache_dir, key + LandmarkCache.SUFFIX)
+    with open(path, "wb") as f:
+        f.write(b"not an npy file")
+    assert cache.get(key) is None
+    assert not os.path.exists(path)
\ No newline at end of file
@@ -0,0 +1,37 @@
+import threading
+import time
+from model_registry import ModelRegistry
+
+def test_model_is_loaded_once():
+    registry = ModelRegistry()
+    loads = []
+
+    def load():
+        loads.append(1)
+        return object()
+    first = registry.get("model", load)
+    assert registry.get("model", load) is first
+    assert len(loads) == 1
+    assert [stat.key for stat in registry.stats()] == ["model"]
+
+def test_concurrent_first_use_loads_once():
+    registry = ModelRegistry()
+    loads = []
+
+    def load():
+        loads.append(1)
+        time.sleep(0.05)
+        return object()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("model", load))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(loads) == 1
+    assert all(result is results[0] for result in results)
+
+def test_different_keys_load_separately():
+    registry = ModelRegistry()
+    assert registry.get("a", lambda: "a") == "a"
+    assert registry.get("b", lambda: "b") == "b"
\ No newline at end of file
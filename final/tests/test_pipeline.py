@@ -0,0 +1,56 @@
+import threading
+import time
+import pytest
+from pipeline import Pipeline
+
+def test_every_item_passes_through_all_stages():
+    with Pipeline(range(50), queue_size=2) as pipeline:
+        pipeline.add_stage("double", lambda x: 2 * x, workers=3).add_stage("inc", lambda x: x + 1)
+        results = sorted(pipeline)
+    assert results == [2 * x + 1 for x in range(50)]
+    assert [stats.items for stats in pipeline.stats()] == [50, 50, 50]
+
+def test_batched_stage_receives_lists():
+    sizes = []
+
+    def batch(items):
+        sizes.append(len(items))
+        return [sum(items)]
+
+    with Pipeline(range(20), queue_size=20) as pipeline:
+        pipeline.add_stage("slow", lambda x: (time.sleep(0.001), x)[1]).add_stage("batch", batch, batch_size=8)
+        total = sum(pipeline)
+    assert total == sum(range(20))
+    assert max(sizes) <= 8
+
+def test_none_drops_items():
+    with Pipeline(range(10)) as pipeline:
+        pipeline.add_stage("odd", lambda x: x if x % 2 else None)
+        assert sorted(pipeline) == [1, 3, 5, 7, 9]
+
+def test_stage_error_is_raised_to_the_consumer():
+    def fail(x):
+        if x == 3:
+            raise RuntimeError("boom")
+        return x
+
+    with Pipeline(range(10)) as pipeline:
+        pipeline.add_stage("fail", fail)
+        with pytest.raises(RuntimeError, match="boom"):
+            list(pipeline)
+
+def test_early_exit_stops_the_threads():
+    closed = threading.Event()
+
+    def source():
+        try:
+            for i in range(10 ** 6):
+                yield i
+        finally:
+            closed.set()
+
+    with Pipeline(source(), queue_size=2) as pipeline:
+        pipeline.add_stage("identity", lambda x: x)
+        for _ in pipeline:
+            break
+    assert closed.wait(2.0)
\ No newline at end of file
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from prototypes import acceptance_limits, compress_embeddings
+
+@pytest.fixture
+def clusters():
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((3, 8)) * 5
+    points = np.concatenate([center + 0.1 * rng.standard_normal((50, 8)) for center in centers])
+    return centers, points.astype(np.float32)
+
+def test_euclidean_prototypes_find_the_clusters(clusters):
+    centers, points = clusters
+    prototypes, radii = compress_embeddings(points, 3, "euclidean")
+    nearest = np.linalg.norm(centers[:, None, :] - prototypes[None, :, :], axis=2).min(axis=1)
+    assert (nearest < 0.2).all()
+    assert (radii > 0).all() and (radii < 1.0).all()
+
+def test_radius_covers_the_quantile_of_members(clusters):
+    _, points = clusters
+    prototypes, radii = compress_embeddings(points, 3, "euclidean", radius_quantile=1.0)
+    distances = np.linalg.norm(points[:, None, :] - prototypes[None, :, :], axis=2)
+    assignment = np.argmin(distances, axis=1)
+    for cluster in range(3):
+        assert radii[cluster] == pytest.approx(distances[assignment == cluster, cluster].max(), rel=1e-5)
+
+@pytest.mark.parametrize("metric", ["cosine", "euclidean_l2"])
+def test_spherical_metrics_give_unit_prototypes(clusters, metric):
+    _, points = clusters
+    prototypes, _ = compress_embeddings(points, 3, metric)
+    np.testing.assert_allclose(np.linalg.norm(prototypes, axis=1), 1.0, rtol=1e-5)
+
+def test_never_more_prototypes_than_embeddings(clusters):
+    _, points = clusters
+    prototypes, radii = compress_embeddings(points[:2], 5)
+    assert len(prototypes) == len(radii) == 2
+    np.testing.assert_allclose(radii, 0.0, atol=1e-6)
+
+def test_acceptance_limits_widen_but_are_capped():
+    radii = np.array([0.0, 0.5, 0.65, 2.0])
+    np.testing.assert_allclose(acceptance_limits(radii, 0.6, max_widen=1.25), [0.6, 0.6, 0.65, 0.75])
\ No newline at end of file
@@ -0,0 +1,31 @@
+import numpy as np
+from transcription_cache import CachedTranscription, TranscriptionCache
+
+def test_round_trip(tmp_path):
+    cache = TranscriptionCache(str(tmp_path / "cache"))
+    entry = CachedTranscription({'text': 'hello', 'segments': [{'start': 0.0, 'end': 1.5}]},
+                                np.arange(26, dtype=np.float32).reshape(13, 2), np.array([[0, 16000]]))
+    cache.put("key", entry)
+    loaded = cache.get("key")
+    assert loaded.transcription == entry.transcription
+    np.testing.assert_array_equal(loaded.mfcc, entry.mfcc)
+    np.testing.assert_array_equal(loaded.speech_spans, entry.speech_spans)
+    assert cache.get("missing") is None
+
+def test_key_changes_with_audio_model_and_options(tmp_path):
+    cache = TranscriptionCache(str(tmp_path / "cache"))
+    audio = tmp_path / "a.wav"
+    audio.write_bytes(b"audio")
+    key = cache.key(str(audio), "large", {'vad': True})
+    assert key == cache.key(str(audio), "large", {'vad': True})
+    assert key != cache.key(str(audio), "base", {'vad': True})
+    assert key != cache.key(str(audio), "large", {'vad': False})
+    audio.write_bytes(b"other audio")
+    assert key != cache.key(str(audio), "large", {'vad': True})
+
+def test_unreadable_entry_is_discarded(tmp_path):
+    cache = TranscriptionCache(str(tmp_path / "cache"))
+    path = tmp_path / "cache" / ("bad" + TranscriptionCache.SUFFIX)
+    path.write_bytes(b"not an npz")
+    assert cache.get("bad") is None
+    assert not path.exists()
\ No newline at end of file
@@ -0,0 +1,71 @@
+import io
+import json
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, Optional
+import numpy as np
+from cache_utils import cache_key, evict_lru, file_digest, touch
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CachedTranscription:
+    transcription: Dict
+    mfcc: np.ndarray
+    speech_spans: Optional[np.ndarray] = None
+
+class TranscriptionCache:
+    SUFFIX = '.transcription.npz'
+
+    def __init__(self, cache_dir: str, max_bytes: int = 2 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        logger.info(f"Transcription cache at {cache_dir} (limit: {max_bytes / 1024 ** 2:.0f} MB)")
+
+    def key(self, audio_path: str, model_name: str, options: Dict) -> str:
+        return cache_key(audio=file_digest(audio_path), model=model_name, options=options)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + self.SUFFIX)
+
+    def get(self, key: str) -> Optional[CachedTranscription]:
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                transcription = json.loads(data['transcription'].tobytes().decode('utf-8'))
+                mfcc = data['mfcc']
+                speech_spans = data['speech_spans'] if 'speech_spans' in data.files else None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {path}: {e}")
+            os.remove(path)
+            return None
+        touch(path)
+        logger.info(f"Transcription cache hit: {key[:12]}")
+        return CachedTranscription(transcription, mfcc, speech_spans)
+
+    def put(self, key: str, entry: CachedTranscription) -> None:
+        arrays = {
+            'transcription': np.frombuffer(json.dumps(entry.transcription, default=float).encode('utf-8'), dtype=np.uint8),
+            'mfcc': np.asarray(entry.mfcc, dtype=np.float32),
+        }
+        if entry.speech_spans is not None:
+            arrays['speech_spans'] = np.asarray(entry.speech_spans, dtype=np.int64)
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        # Write to a temporary file first so concurrent readers never see a partial entry.
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(buffer.getvalue())
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.error(f"Error writing transcription cache entry: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        evict_lru(self.cache_dir, self.max_bytes, self.SUFFIX)